@@ -0,0 +1,24 @@
+"""add (date, hall) index to schedules
+
+Revision ID: add_date_hall_index_to_schedules
+Revises: add_schedule_id_to_ticket_seats
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = 'add_date_hall_index_to_schedules'
+down_revision: Union[str, None] = 'add_schedule_id_to_ticket_seats'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_schedules_date_hall', 'schedules', ['date', 'hall'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_schedules_date_hall', table_name='schedules')
@@ -0,0 +1,33 @@
+"""add rating_avg and rating_count to movies
+
+Revision ID: add_rating_aggregates_to_movies
+Revises: add_date_hall_index_to_schedules
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = 'add_rating_aggregates_to_movies'
+down_revision: Union[str, None] = 'add_date_hall_index_to_schedules'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('movies', sa.Column('rating_avg', sa.Float(), nullable=True))
+    op.add_column('movies', sa.Column('rating_count', sa.Integer(), nullable=False, server_default='0'))
+    op.execute(
+        """
+        UPDATE movies SET
+            rating_count = (SELECT count(*) FROM reviews r WHERE r.movie_id = movies.id),
+            rating_avg = (SELECT avg(r.rating) FROM reviews r WHERE r.movie_id = movies.id)
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('movies', 'rating_count')
+    op.drop_column('movies', 'rating_avg')
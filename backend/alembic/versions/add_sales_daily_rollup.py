@@ -0,0 +1,52 @@
+"""add sales_daily rollup table
+
+Revision ID: add_sales_daily_rollup
+Revises: add_rating_aggregates_to_movies
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = 'add_sales_daily_rollup'
+down_revision: Union[str, None] = 'add_rating_aggregates_to_movies'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'sales_daily',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('schedule_id', sa.Integer(), sa.ForeignKey('schedules.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('movie_id', sa.Integer(), sa.ForeignKey('movies.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('hall', sa.Integer(), nullable=True),
+        sa.Column('orders', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('seats', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('revenue', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('seat_revenue', sa.Float(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('day', 'schedule_id'),
+    )
+    op.create_index('ix_sales_daily_movie_id', 'sales_daily', ['movie_id'])
+    op.execute(
+        """
+        INSERT INTO sales_daily (day, schedule_id, movie_id, hall, orders, seats, revenue, seat_revenue)
+        SELECT t.purchase_date, s.id, s.movie_id, s.hall,
+               count(*), coalesce(sum(ts.seats), 0), coalesce(sum(t.total_price), 0), coalesce(sum(ts.seat_revenue), 0)
+        FROM tickets t
+        JOIN schedules s ON s.id = t.schedule_id
+        LEFT JOIN (
+            SELECT ticket_id, count(*) AS seats, sum(price) AS seat_revenue
+            FROM ticket_seats GROUP BY ticket_id
+        ) ts ON ts.ticket_id = t.id
+        WHERE t.purchase_date IS NOT NULL
+        GROUP BY t.purchase_date, s.id, s.movie_id, s.hall
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sales_daily_movie_id', table_name='sales_daily')
+    op.drop_table('sales_daily')
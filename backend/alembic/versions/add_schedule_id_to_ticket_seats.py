@@ -0,0 +1,101 @@
+"""add schedule_id to ticket_seats and unique seat position per schedule
+
+Revision ID: add_schedule_id_to_ticket_seats
+Revises: add_seat_version_to_schedules
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = 'add_schedule_id_to_ticket_seats'
+down_revision: Union[str, None] = 'add_seat_version_to_schedules'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _row_label_to_index(label):
+    if not label:
+        return None
+    val = 0
+    for ch in str(label).strip().upper():
+        if not ('A' <= ch <= 'Z'):
+            return None
+        val = val * 26 + (ord(ch) - 64)
+    return max(0, val - 1)
+
+
+def _position(row_index, col_index, row_label, seat_number, seat):
+    r, c = row_index, col_index
+    if r is None and row_label:
+        r = _row_label_to_index(row_label)
+    if c is None and seat_number is not None:
+        c = int(seat_number) - 1
+    if (r is None or c is None) and seat:
+        parts = str(seat).split('-')
+        if len(parts) >= 2:
+            try:
+                r = r if r is not None else _row_label_to_index(parts[0])
+                c = c if c is not None else int(parts[1]) - 1
+            except ValueError:
+                pass
+    return r, c
+
+
+def upgrade() -> None:
+    op.add_column('ticket_seats', sa.Column('schedule_id', sa.Integer(), nullable=True))
+
+    conn = op.get_bind()
+    conn.execute(sa.text(
+        """
+        UPDATE ticket_seats
+        SET schedule_id = t.schedule_id
+        FROM tickets t
+        WHERE t.id = ticket_seats.ticket_id
+        """
+    ))
+
+    rows = conn.execute(sa.text(
+        """
+        SELECT id, row_index, col_index, row_label, seat_number, seat
+        FROM ticket_seats
+        WHERE row_index IS NULL OR col_index IS NULL
+        """
+    )).mappings().all()
+    for r in rows:
+        row_index, col_index = _position(r['row_index'], r['col_index'], r['row_label'], r['seat_number'], r['seat'])
+        if row_index is not None and col_index is not None:
+            conn.execute(
+                sa.text("UPDATE ticket_seats SET row_index = :r, col_index = :c WHERE id = :id"),
+                { 'r': row_index, 'c': col_index, 'id': r['id'] }
+            )
+
+    duplicates = conn.execute(sa.text(
+        """
+        SELECT schedule_id, row_index, col_index, count(*) AS cnt
+        FROM ticket_seats
+        WHERE row_index IS NOT NULL AND col_index IS NOT NULL
+        GROUP BY schedule_id, row_index, col_index
+        HAVING count(*) > 1
+        """
+    )).all()
+    if duplicates:
+        listed = ', '.join(f"schedule {d[0]} seat ({d[1]}, {d[2]}) x{d[3]}" for d in duplicates[:20])
+        raise RuntimeError(f"Cannot enforce unique seats, already double-sold: {listed}")
+
+    op.alter_column('ticket_seats', 'schedule_id', nullable=False)
+    op.create_foreign_key('fk_ticket_seats_schedule_id', 'ticket_seats', 'schedules', ['schedule_id'], ['id'])
+    op.create_index(
+        'uq_ticket_seats_schedule_position',
+        'ticket_seats',
+        ['schedule_id', 'row_index', 'col_index'],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_ticket_seats_schedule_position', table_name='ticket_seats')
+    op.drop_constraint('fk_ticket_seats_schedule_id', 'ticket_seats', type_='foreignkey')
+    op.drop_column('ticket_seats', 'schedule_id')
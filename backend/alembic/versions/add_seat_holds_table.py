@@ -0,0 +1,32 @@
+"""add seat_holds table for shared seat holds
+
+Revision ID: add_seat_holds_table
+Revises: b81e3395dd24
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = 'add_seat_holds_table'
+down_revision: Union[str, None] = 'b81e3395dd24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'seat_holds',
+        sa.Column('schedule_id', sa.Integer(), sa.ForeignKey('schedules.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('row_index', sa.Integer(), primary_key=True),
+        sa.Column('col_index', sa.Integer(), primary_key=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+    )
+    op.create_index('ix_seat_holds_expires_at', 'seat_holds', ['expires_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_seat_holds_expires_at', table_name='seat_holds')
+    op.drop_table('seat_holds')
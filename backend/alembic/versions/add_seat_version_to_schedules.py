@@ -0,0 +1,24 @@
+"""add seat_version to schedules
+
+Revision ID: add_seat_version_to_schedules
+Revises: add_seat_holds_table
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = 'add_seat_version_to_schedules'
+down_revision: Union[str, None] = 'add_seat_holds_table'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('schedules', sa.Column('seat_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    op.drop_column('schedules', 'seat_version')
@@ -0,0 +1,194 @@
+"""Generate resized variants for images uploaded before the variant pipeline.
+
+Walks static/uploads and the image columns of movies, slides and news, runs
+every original through media.images in a process pool and then points the
+rows at the default-width JPEG variant in batched transactions. Rows holding
+legacy URLs (/static/uploads/..., absolute http(s)://host/...) are rewritten
+too; external URLs and data: URIs are left alone. Originals are kept.
+
+Progress is appended to a state file, so an interrupted run picks up where it
+stopped; --dry-run only reports what would be done.
+
+    python scripts/backfill_images.py --workers 4
+    python scripts/backfill_images.py --database-url postgresql://... --batch-size 500
+    python scripts/backfill_images.py --dry-run
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(BACKEND, 'src')
+sys.path.insert(0, SRC)
+
+COLUMNS = [('movies', 'image'), ('movies', 'big_image'), ('slides', 'image'), ('news', 'image')]
+SOURCE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp', '.bmp', '.tif', '.tiff')
+
+
+def process_file(path, out_dir):
+    from media import images
+    try:
+        with open(path, 'rb') as f:
+            digest = images.content_hash(f.read())
+        result = images.process(path, digest, out_dir)
+    except (OSError, images.InvalidImage) as e:
+        return None, str(e) or type(e).__name__
+    return result.url(), None
+
+
+def load_state(path):
+    done, failed = {}, {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry.get('url'):
+                    done[entry['name']] = entry['url']
+                    failed.pop(entry['name'], None)
+                elif entry.get('error'):
+                    failed[entry['name']] = entry['error']
+    except FileNotFoundError:
+        pass
+    return done, failed
+
+
+def find_references(db):
+    from sqlalchemy import text
+    from media import images
+    refs = []
+    for table, column in COLUMNS:
+        rows = db.execute(text(f'SELECT id, {column} FROM {table} WHERE {column} IS NOT NULL')).all()
+        for row_id, url in rows:
+            name = images.upload_name(url)
+            if name is None or images.VARIANT_NAME.match(name):
+                continue
+            refs.append((table, column, row_id, url, name))
+    return refs
+
+
+def find_files(uploads_dir):
+    from media import images
+    try:
+        entries = os.listdir(uploads_dir)
+    except FileNotFoundError:
+        return []
+    return sorted(
+        name for name in entries
+        if not name.startswith('.')
+        and name.lower().endswith(SOURCE_EXTENSIONS)
+        and not images.VARIANT_NAME.match(name)
+        and os.path.isfile(os.path.join(uploads_dir, name))
+    )
+
+
+def run_pool(pending, args, done, failed):
+    total = len(pending)
+    started = last = time.perf_counter()
+    finished = errors = 0
+    with open(args.state, 'a', encoding='utf-8') as state, ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(process_file, os.path.join(args.uploads_dir, name), args.uploads_dir): name for name in pending}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                url, error = future.result()
+            except Exception as e:
+                url, error = None, f'{type(e).__name__}: {e}'
+            if url:
+                done[name] = url
+                failed.pop(name, None)
+            else:
+                failed[name] = error
+                errors += 1
+            state.write(json.dumps({'name': name, 'url': url, 'error': error}) + '\n')
+            state.flush()
+            finished += 1
+            now = time.perf_counter()
+            if now - last >= 1 or finished == total:
+                last = now
+                rate = finished / (now - started) if now > started else 0.0
+                eta = (total - finished) / rate if rate else 0.0
+                print(f'\r  {finished}/{total}  failed={errors}  {rate:.1f} files/s  eta {eta:.0f}s', end='', file=sys.stderr, flush=True)
+    if total:
+        print(file=sys.stderr)
+
+
+def update_rows(db, refs, done, batch_size, dry_run):
+    from sqlalchemy import text
+    import http_cache
+    tags = {'movies': http_cache.MOVIES, 'slides': http_cache.SLIDES, 'news': http_cache.NEWS}
+    updated = 0
+    for table, column in COLUMNS:
+        # the old value is part of the WHERE so an edit made while the backfill
+        # ran is never overwritten
+        params = [
+            {'id': row_id, 'old': url, 'new': done[name]}
+            for t, c, row_id, url, name in refs
+            if t == table and c == column and name in done
+        ]
+        if not params:
+            continue
+        print(f'{table}.{column}: {len(params)} row(s)')
+        if dry_run:
+            continue
+        stmt = text(f'UPDATE {table} SET {column} = :new WHERE id = :id AND {column} = :old')
+        for i in range(0, len(params), batch_size):
+            db.execute(stmt, params[i:i + batch_size])
+            http_cache.bump(db, tags[table])
+            db.commit()
+            updated += len(params[i:i + batch_size])
+    return updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url')
+    parser.add_argument('--uploads-dir')
+    parser.add_argument('--state', help='progress file (default: backend/.backfill-state.jsonl, outside the served static tree)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--batch-size', type=int, default=200)
+    parser.add_argument('--retry-failed', action='store_true', help='process files that failed in an earlier run again')
+    parser.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args()
+    if args.database_url:
+        os.environ['SQLALCHEMY_DATABASE_URL'] = args.database_url
+
+    from database import SessionLocal
+    from media import images
+    args.uploads_dir = os.path.abspath(args.uploads_dir or images.UPLOADS_DIR)
+    args.state = args.state or os.path.join(BACKEND, '.backfill-state.jsonl')
+    args.batch_size = max(1, args.batch_size)
+
+    done, failed = load_state(args.state)
+    with SessionLocal() as db:
+        refs = find_references(db)
+        names = set(find_files(args.uploads_dir)) | {r[4] for r in refs}
+        missing = sorted(n for n in names if not os.path.isfile(os.path.join(args.uploads_dir, n)))
+        pending = sorted(
+            n for n in names
+            if n not in missing and n not in done and (args.retry_failed or n not in failed)
+        )
+        print(
+            f'{len(names)} file(s), {len(refs)} row reference(s); {len(done)} already processed, '
+            f'{len(pending)} to process, {len(missing)} missing'
+        )
+        for name in missing:
+            print(f'  missing: {name}')
+
+        if pending and not args.dry_run:
+            run_pool(pending, args, done, failed)
+        for name in sorted(failed):
+            print(f'  failed: {name}: {failed[name]}')
+
+        updated = update_rows(db, refs, done, args.batch_size, args.dry_run)
+    if not args.dry_run:
+        print(f'{updated} row(s) updated')
+
+
+if __name__ == '__main__':
+    main()
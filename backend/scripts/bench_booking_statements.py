@@ -0,0 +1,77 @@
+"""Count the SQL statements one booking issues, by number of seats.
+
+Runs user.service.create_ticket against a scratch SQLite database (or
+--database-url, which must already have the schema) and counts statements
+with a before_cursor_execute listener, commit included. A warm-up booking
+runs first so that one-off cache loads (price matrix, cache versions) are not
+counted.
+
+    python scripts/bench_booking_statements.py
+    python scripts/bench_booking_statements.py --seats 1 10 50
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, SRC)
+
+
+def seed(db):
+    from schemas import Movie, Schedule, TicketPrice, User
+    movie = Movie(title='Bench', genre='Bench', duration='120')
+    user = User(first_name='Bench', last_name='Bench', email=f'bench-{time.time_ns()}@example.com', password='x')
+    db.add_all([movie, user])
+    db.flush()
+    schedule = Schedule(date=date.today() + timedelta(days=7), time='18:00', movie_id=movie.id, hall=1)
+    db.add(schedule)
+    if not db.query(TicketPrice).count():
+        db.add(TicketPrice(type='normalny', cheap_thursday='15', three_days_before='20', two_days_before='22',
+                           one_day_before='24', same_day='25'))
+    db.commit()
+    return user.id, schedule.id
+
+
+def seats(row, count):
+    return [
+        {'seat': f'{row}-{c + 1}', 'type': 'normalny', 'row_index': row, 'col_index': c, 'seat_number': c + 1}
+        for c in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url')
+    parser.add_argument('--seats', type=int, nargs='+', default=[1, 10, 50])
+    args = parser.parse_args()
+    scratch = not args.database_url
+    os.environ['SQLALCHEMY_DATABASE_URL'] = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    os.environ.setdefault('JWT_SECRET_KEY', 'bench')
+
+    from sqlalchemy import event
+    import schemas  # noqa: F401
+    from database import Base, SessionLocal, engine
+    from user.service import create_ticket
+    if scratch:
+        Base.metadata.create_all(engine)
+
+    statements = []
+    event.listen(engine, 'before_cursor_execute', lambda conn, cursor, stmt, *a: statements.append(stmt))
+
+    with SessionLocal() as db:
+        user_id, schedule_id = seed(db)
+        create_ticket(db, user_id, {'schedule_id': schedule_id, 'seats': seats(0, 1)})
+        print(f'{"seats":>6}{"statements":>12}{"ms":>9}')
+        for row, count in enumerate(args.seats, start=1):
+            statements.clear()
+            started = time.perf_counter()
+            create_ticket(db, user_id, {'schedule_id': schedule_id, 'seats': seats(row, count)})
+            elapsed = (time.perf_counter() - started) * 1000
+            print(f'{count:>6}{len(statements):>12}{elapsed:>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
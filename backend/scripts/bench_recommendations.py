@@ -0,0 +1,131 @@
+"""Compare per-user recommendation ranking with the NumPy batch scorer.
+
+By default the benchmark runs on a synthetic catalogue. Pass --database-url to
+start from a real database instead (e.g. one restored from
+db/snapshot-test.sql with pg_restore); --scale then replicates its movies and
+users to reach a catalogue of the requested size.
+
+    python scripts/bench_recommendations.py --movies 5000 --users 2000
+    python scripts/bench_recommendations.py --database-url postgresql://... --scale 50
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, SRC)
+
+
+def synthetic_index(n_movies, n_categories, n_users, tickets_per_user, seed):
+    from user.recommendations import MovieEntry, RecommendationIndex, UserProfile
+    rng = random.Random(seed)
+    today = date.today()
+    movies, by_category = {}, {}
+    for mid in range(1, n_movies + 1):
+        cats = tuple(sorted(rng.sample(range(1, n_categories + 1), rng.randint(0, 3))))
+        rated = rng.random() < 0.7
+        movies[mid] = MovieEntry(
+            id=mid, title=f'Movie {mid % (n_movies // 2 or 1)}', image=None, duration='120', cast=None,
+            description=None, premiere_date=today + timedelta(days=rng.randint(-720, 60)),
+            category_ids=cats, category_names=[f'C{c}' for c in cats],
+            avg=round(rng.uniform(1, 5), 2) if rated else None,
+        )
+        for c in cats:
+            by_category.setdefault(c, set()).add(mid)
+    weights = [1.0 / (i ** 0.8) for i in range(1, n_movies + 1)]
+    ids = list(movies)
+    profiles = {}
+    for uid in range(1, n_users + 1):
+        profile = profiles[uid] = UserProfile()
+        for mid in rng.choices(ids, weights, k=rng.randint(0, tickets_per_user * 2)):
+            e = movies[mid]
+            e.pop += 1
+            profile.watched.add(mid)
+            for c in e.category_ids:
+                profile.cat_scores[c] = profile.cat_scores.get(c, 0) + 1
+    return RecommendationIndex(
+        movies=movies, by_category=by_category, profiles=profiles,
+        max_pop=max((e.pop for e in movies.values()), default=0),
+        built_at=datetime.utcnow(), build_ms=0.0,
+    )
+
+
+def scaled_index(base, scale):
+    from dataclasses import replace
+    from user.recommendations import RecommendationIndex, UserProfile
+    if scale <= 1:
+        return base
+    movie_off = max(base.movies, default=0) + 1
+    user_off = max(base.profiles, default=0) + 1
+    movies, by_category, profiles = {}, {}, {}
+    for k in range(scale):
+        for e in base.movies.values():
+            m = replace(e, id=e.id + k * movie_off, category_names=list(e.category_names))
+            movies[m.id] = m
+            for c in m.category_ids:
+                by_category.setdefault(c, set()).add(m.id)
+    for k in range(scale):
+        for uid, p in base.profiles.items():
+            # the k-th copy of a user watched the k-th copy of each movie
+            profiles[uid + k * user_off] = UserProfile(
+                cat_scores=dict(p.cat_scores), watched={mid + k * movie_off for mid in p.watched}
+            )
+    for e in base.movies.values():
+        for k in range(scale):
+            movies[e.id + k * movie_off].pop = e.pop
+    return RecommendationIndex(
+        movies=dict(sorted(movies.items())), by_category=by_category, profiles=profiles,
+        max_pop=base.max_pop, built_at=datetime.utcnow(), build_ms=0.0,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--movies', type=int, default=3000)
+    parser.add_argument('--categories', type=int, default=25)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--tickets-per-user', type=int, default=8)
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--database-url')
+    parser.add_argument('--scale', type=int, default=1)
+    args = parser.parse_args()
+
+    os.environ['SQLALCHEMY_DATABASE_URL'] = args.database_url or os.environ.get('SQLALCHEMY_DATABASE_URL') or 'sqlite://'
+    from user import recommendations
+    from user.recommendation_batch import rank_batch
+
+    if args.database_url:
+        from database import SessionLocal
+        db = SessionLocal()
+        try:
+            index = scaled_index(recommendations.build(db), args.scale)
+        finally:
+            db.close()
+    else:
+        index = synthetic_index(args.movies, args.categories, args.users, args.tickets_per_user, args.seed)
+    user_ids = list(index.profiles)
+    print(f'movies={len(index.movies)} categories={len(index.by_category)} users={len(user_ids)} limit={args.limit}')
+
+    started = time.perf_counter()
+    loop = {}
+    for uid in user_ids:
+        picked = recommendations._rank(index, index.profiles[uid], args.limit)
+        loop[uid] = [e.id for e in picked or recommendations._rank(index, recommendations.UserProfile(), args.limit)]
+    loop_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    batch = rank_batch(index, user_ids, args.limit)
+    batch_s = time.perf_counter() - started
+
+    mismatched = sum(1 for uid in user_ids if loop[uid] != [e.id for e in batch[uid]])
+    print(f'per-user loop: {loop_s:8.3f} s  ({loop_s / max(len(user_ids), 1) * 1000:.3f} ms/user)')
+    print(f'numpy batch:   {batch_s:8.3f} s  ({batch_s / max(len(user_ids), 1) * 1000:.3f} ms/user)')
+    print(f'speedup: {loop_s / batch_s if batch_s else float("inf"):.1f}x  mismatched users: {mismatched}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""Closed-loop load test for the read routes that have an async port.
+
+Start the API twice with the same number of uvicorn workers, once with
+ASYNC_DB_ENABLED=false and once with ASYNC_DB_ENABLED=true, and point this
+script at each:
+
+    python scripts/loadtest_db.py --base-url http://127.0.0.1:8000 --concurrency 64 --duration 30
+    python scripts/loadtest_db.py --base-url ... --email user@example.com --password secret
+
+Without credentials the authenticated ticket listing is skipped. Every
+virtual user cycles through the routes and the report gives throughput and
+latency percentiles per route.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import date
+
+import httpx
+
+
+def routes(schedule_id, with_tickets):
+    today = date.today().isoformat()
+    out = [
+        ('catalogue', '/movie/movies'),
+        ('repertoire', f'/movie/repertoire?date_from={today}&limit=100'),
+        ('seat-map', f'/movie/schedules/{schedule_id}/blocked-seats'),
+    ]
+    if with_tickets:
+        out.append(('tickets', '/user/tickets'))
+    return out
+
+
+async def login(client, email, password):
+    r = await client.post('/user/login', json={'email': email, 'password': password})
+    r.raise_for_status()
+    return {'Authorization': 'Bearer ' + r.json()['access_token']}
+
+
+async def first_schedule(client):
+    r = await client.get(f'/movie/repertoire?date_from={date.today().isoformat()}&limit=1')
+    r.raise_for_status()
+    items = r.json()['items']
+    return items[0]['id'] if items else 1
+
+
+async def worker(client, plan, headers, deadline, samples, errors, offset):
+    i = offset
+    while time.perf_counter() < deadline:
+        name, path = plan[i % len(plan)]
+        i += 1
+        started = time.perf_counter()
+        try:
+            r = await client.get(path, headers=headers)
+            ok = r.status_code == 200
+        except httpx.HTTPError:
+            ok = False
+        if ok:
+            samples.setdefault(name, []).append(time.perf_counter() - started)
+        else:
+            errors[name] = errors.get(name, 0) + 1
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[q - 1]
+
+
+async def run(args):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url.rstrip('/'), limits=limits, timeout=args.timeout) as client:
+        headers = {}
+        if args.email:
+            headers = await login(client, args.email, args.password)
+        schedule_id = args.schedule_id or await first_schedule(client)
+        plan = routes(schedule_id, bool(headers))
+        if args.route:
+            plan = [r for r in plan if r[0] in args.route]
+
+        warmup = time.perf_counter() + args.warmup
+        await asyncio.gather(*(worker(client, plan, headers, warmup, {}, {}, n) for n in range(args.concurrency)))
+
+        samples, errors = {}, {}
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(worker(client, plan, headers, deadline, samples, errors, n) for n in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    total = sum(len(v) for v in samples.values())
+    print(f'{args.base_url}  concurrency={args.concurrency}  duration={elapsed:.1f}s')
+    print(f'{"route":<12}{"ok":>8}{"err":>6}{"rps":>9}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}')
+    for name, _ in plan:
+        values = samples.get(name, [])
+        print(
+            f'{name:<12}{len(values):>8}{errors.get(name, 0):>6}{len(values) / elapsed:>9.1f}'
+            f'{percentile(values, 50) * 1000:>9.1f}{percentile(values, 95) * 1000:>9.1f}{percentile(values, 99) * 1000:>9.1f}'
+        )
+    every = [v for values in samples.values() for v in values]
+    print(
+        f'{"total":<12}{total:>8}{sum(errors.values()):>6}{total / elapsed:>9.1f}'
+        f'{percentile(every, 50) * 1000:>9.1f}{percentile(every, 95) * 1000:>9.1f}{percentile(every, 99) * 1000:>9.1f}'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--duration', type=float, default=30.0)
+    parser.add_argument('--warmup', type=float, default=3.0)
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--email')
+    parser.add_argument('--password')
+    parser.add_argument('--schedule-id', type=int)
+    parser.add_argument('--route', action='append', choices=['catalogue', 'repertoire', 'seat-map', 'tickets'])
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+import csv
+import io
+import json
+from datetime import date
+from itertools import groupby
+from typing import Iterator, Optional
+from sqlalchemy import select
+from database import ReadSessionLocal, apply_statement_timeout
+from config import DB_REPORT_STATEMENT_TIMEOUT_MS
+from schemas import Ticket, TicketSeat, Schedule, Movie
+
+YIELD_PER = 1000
+FLUSH_ROWS = 500
+
+CSV_COLUMNS = [
+    'ticket_id', 'ticket_code', 'purchase_date', 'user_id', 'total_price',
+    'schedule_id', 'schedule_date', 'schedule_time', 'hall', 'movie_id', 'movie_title',
+    'seat', 'seat_type', 'seat_price', 'row_label', 'seat_number',
+]
+
+
+def _statement(since: Optional[date], until: Optional[date]):
+    stmt = (
+        select(
+            Ticket.id.label('ticket_id'),
+            Ticket.ticket_code,
+            Ticket.purchase_date,
+            Ticket.user_id,
+            Ticket.total_price,
+            Schedule.id.label('schedule_id'),
+            Schedule.date.label('schedule_date'),
+            Schedule.time.label('schedule_time'),
+            Schedule.hall,
+            Movie.id.label('movie_id'),
+            Movie.title.label('movie_title'),
+            TicketSeat.seat,
+            TicketSeat.type.label('seat_type'),
+            TicketSeat.price.label('seat_price'),
+            TicketSeat.row_label,
+            TicketSeat.seat_number,
+        )
+        .join(Schedule, Schedule.id == Ticket.schedule_id)
+        .join(Movie, Movie.id == Schedule.movie_id)
+        .outerjoin(TicketSeat, TicketSeat.ticket_id == Ticket.id)
+        .order_by(Ticket.id, TicketSeat.id)
+    )
+    if since is not None:
+        stmt = stmt.where(Ticket.purchase_date >= since)
+    if until is not None:
+        stmt = stmt.where(Ticket.purchase_date <= until)
+    return stmt.execution_options(yield_per=YIELD_PER)
+
+
+def _rows(since: Optional[date], until: Optional[date]):
+    # The request-scoped session is closed before a StreamingResponse body is
+    # sent, so the generator owns its own session for the whole stream.
+    db = ReadSessionLocal()
+    apply_statement_timeout(db, DB_REPORT_STATEMENT_TIMEOUT_MS)
+    try:
+        for row in db.execute(_statement(since, until)):
+            yield row
+    finally:
+        db.close()
+
+
+def _iso(value):
+    return value.isoformat() if value is not None else None
+
+
+def stream_csv(since: Optional[date], until: Optional[date]) -> Iterator[str]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(CSV_COLUMNS)
+    pending = 0
+    for row in _rows(since, until):
+        m = row._mapping
+        writer.writerow([
+            _iso(m[c]) if c in ('purchase_date', 'schedule_date') else m[c]
+            for c in CSV_COLUMNS
+        ])
+        pending += 1
+        if pending >= FLUSH_ROWS:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+            pending = 0
+    yield buf.getvalue()
+
+
+def stream_ndjson(since: Optional[date], until: Optional[date]) -> Iterator[str]:
+    # Rows arrive ordered by ticket, so grouping consecutive rows rebuilds
+    # each ticket with its seats without holding more than one in memory.
+    chunk = []
+    for _, rows in groupby(_rows(since, until), key=lambda r: r.ticket_id):
+        rows = list(rows)
+        first = rows[0]
+        chunk.append(json.dumps({
+            'ticket_id': first.ticket_id,
+            'ticket_code': first.ticket_code,
+            'purchase_date': _iso(first.purchase_date),
+            'user_id': first.user_id,
+            'total_price': first.total_price,
+            'schedule': {
+                'id': first.schedule_id,
+                'date': _iso(first.schedule_date),
+                'time': first.schedule_time,
+                'hall': first.hall,
+            },
+            'movie': {'id': first.movie_id, 'title': first.movie_title},
+            'seats': [
+                {
+                    'seat': r.seat,
+                    'type': r.seat_type,
+                    'price': r.seat_price,
+                    'row_label': r.row_label,
+                    'seat_number': r.seat_number,
+                }
+                for r in rows if r.seat is not None
+            ],
+        }, ensure_ascii=False))
+        if len(chunk) >= FLUSH_ROWS:
+            yield '\n'.join(chunk) + '\n'
+            chunk = []
+    if chunk:
+        yield '\n'.join(chunk) + '\n'
@@ -1,17 +1,28 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from get_db import get_db
+from get_db import get_db, db_with_statement_timeout
 from user import service
 from user.schemas import UserCreate, UserResponse, UserLogin
-from user.service import admin_required
+from user.service import admin_required, admin_catalogue_write
 from sqlalchemy import func
-from schemas import Ticket, TicketSeat, Schedule, Movie, Slide, News, TicketPrice
+from schemas import Schedule, Movie, Slide, News, TicketPrice, SalesDaily
 from datetime import date, timedelta, datetime
 from typing import Optional
 from admin.schemas import SlideCreate, SlideUpdate, NewsCreate, NewsUpdate, TicketPriceUpdate
+from movie import seat_holds
+from admin import sales_rollup, export
+from payments import pricing
+from fastapi.responses import StreamingResponse
+from user import recommendations, passwords
+import database
+import db_routing
+import http_cache
+from config import DB_REPORT_STATEMENT_TIMEOUT_MS
 
 router = APIRouter()
 
+get_report_db = db_with_statement_timeout(DB_REPORT_STATEMENT_TIMEOUT_MS, read=True)
+
 @router.post("/register", response_model=UserResponse)
 def register_user(user: UserCreate, db: Session = Depends(get_db)):
     existing_user = service.get_user_by_email(db, user.email)
@@ -75,98 +86,81 @@ def admin_delete_user(user_id: int, db: Session = Depends(get_db), current_user
     result = service.delete_user(db, user_id)
     return result
 
+def _stats_range(days: int, from_date: Optional[date], to_date: Optional[date]):
+    if from_date and to_date:
+        return from_date, to_date
+    return date.today() - timedelta(days=days), date.today()
+
 @router.get("/stats/overview")
-def stats_overview(days: int = 30, from_date: Optional[date] = None, to_date: Optional[date] = None, db: Session = Depends(get_db), current_user = Depends(admin_required)):
+def stats_overview(days: int = 30, from_date: Optional[date] = None, to_date: Optional[date] = None, db: Session = Depends(get_report_db), current_user = Depends(admin_required)):
     try:
-        if from_date and to_date:
-            since = from_date
-            until = to_date
-        else:
-            since = date.today() - timedelta(days=days)
-            until = date.today()
-
-        total_revenue_q = db.query(func.coalesce(func.sum(Ticket.total_price), 0.0))
-        total_orders_q = db.query(func.count(Ticket.id))
-        total_tickets_q = db.query(func.count(TicketSeat.id)).join(Ticket, TicketSeat.ticket_id == Ticket.id)
+        since, until = _stats_range(days, from_date, to_date)
 
+        totals_q = db.query(
+            func.coalesce(func.sum(SalesDaily.revenue), 0.0),
+            func.coalesce(func.sum(SalesDaily.orders), 0),
+            func.coalesce(func.sum(SalesDaily.seats), 0),
+        )
         if from_date and to_date:
-            total_revenue_q = total_revenue_q.filter(Ticket.purchase_date.between(since, until))
-            total_orders_q = total_orders_q.filter(Ticket.purchase_date.between(since, until))
-            total_tickets_q = total_tickets_q.filter(Ticket.purchase_date.between(since, until))
-
-        total_revenue = total_revenue_q.scalar() or 0.0
-        total_orders = total_orders_q.scalar() or 0
-        total_tickets = total_tickets_q.scalar() or 0
+            totals_q = totals_q.filter(SalesDaily.day.between(since, until))
+        total_revenue, total_orders, total_tickets = totals_q.one()
 
         daily_rows = (
             db.query(
-                Ticket.purchase_date.label('d'),
-                func.coalesce(func.sum(Ticket.total_price), 0.0).label('revenue'),
-                func.count(Ticket.id).label('orders')
-            )
-            .filter(Ticket.purchase_date.between(since, until))
-            .group_by(Ticket.purchase_date)
-            .order_by(Ticket.purchase_date)
-            .all()
-        )
-        seats_daily_rows = (
-            db.query(
-                Ticket.purchase_date.label('d'),
-                func.count(TicketSeat.id).label('tickets')
+                SalesDaily.day.label('d'),
+                func.sum(SalesDaily.revenue).label('revenue'),
+                func.sum(SalesDaily.orders).label('orders'),
+                func.sum(SalesDaily.seats).label('tickets'),
             )
-            .join(TicketSeat, TicketSeat.ticket_id == Ticket.id)
-            .filter(Ticket.purchase_date.between(since, until))
-            .group_by(Ticket.purchase_date)
+            .filter(SalesDaily.day.between(since, until))
+            .group_by(SalesDaily.day)
             .all()
         )
-        seats_map = {r.d: r.tickets for r in seats_daily_rows}
+        by_day = {r.d: r for r in daily_rows}
         last_days = []
         cur = since
         while cur <= until:
-            row = next((x for x in daily_rows if x.d == cur), None)
+            row = by_day.get(cur)
             last_days.append({
                 'date': cur.isoformat(),
                 'revenue': float(row.revenue) if row else 0.0,
                 'orders': int(row.orders) if row else 0,
-                'tickets': int(seats_map.get(cur, 0)),
+                'tickets': int(row.tickets) if row else 0,
             })
             cur += timedelta(days=1)
 
         return {
-            'total_revenue': float(total_revenue),
-            'total_orders': int(total_orders),
-            'total_tickets': int(total_tickets),
+            'total_revenue': float(total_revenue or 0.0),
+            'total_orders': int(total_orders or 0),
+            'total_tickets': int(total_tickets or 0),
             'last_days': last_days,
         }
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/stats/top-movies")
-def stats_top_movies(days: int = 30, limit: int = 5, from_date: Optional[date] = None, to_date: Optional[date] = None, db: Session = Depends(get_db), current_user = Depends(admin_required)):
+def stats_top_movies(days: int = 30, limit: int = 5, from_date: Optional[date] = None, to_date: Optional[date] = None, db: Session = Depends(get_report_db), current_user = Depends(admin_required)):
     try:
-        if from_date and to_date:
-            since = from_date
-            until = to_date
-        else:
-            since = date.today() - timedelta(days=days)
-            until = date.today()
+        since, until = _stats_range(days, from_date, to_date)
 
-        q = (
+        agg = (
             db.query(
-                Movie.id.label('movie_id'),
-                Movie.title.label('title'),
-                func.count(TicketSeat.id).label('tickets_sold'),
-                func.coalesce(func.sum(Ticket.total_price), 0.0).label('revenue')
+                SalesDaily.movie_id.label('movie_id'),
+                func.sum(SalesDaily.seats).label('tickets_sold'),
+                func.sum(SalesDaily.revenue).label('revenue'),
             )
-            .join(Schedule, Schedule.movie_id == Movie.id)
-            .join(Ticket, Ticket.schedule_id == Schedule.id)
-            .join(TicketSeat, TicketSeat.ticket_id == Ticket.id)
-            .filter(Ticket.purchase_date.between(since, until))
-            .group_by(Movie.id, Movie.title)
-            .order_by(func.count(TicketSeat.id).desc())
+            .filter(SalesDaily.day.between(since, until))
+            .group_by(SalesDaily.movie_id)
+            .having(func.sum(SalesDaily.seats) > 0)
+            .subquery()
+        )
+        rows = (
+            db.query(Movie.id.label('movie_id'), Movie.title.label('title'), agg.c.tickets_sold, agg.c.revenue)
+            .join(agg, agg.c.movie_id == Movie.id)
+            .order_by(agg.c.tickets_sold.desc())
             .limit(limit)
+            .all()
         )
-        rows = q.all()
         return [
             {
                 'movie_id': r.movie_id,
@@ -180,15 +174,21 @@ def stats_top_movies(days: int = 30, limit: int = 5, from_date: Optional[date] =
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/stats/top-sessions")
-def stats_top_sessions(days: int = 30, limit: int = 5, from_date: Optional[date] = None, to_date: Optional[date] = None, db: Session = Depends(get_db), current_user = Depends(admin_required)):
+def stats_top_sessions(days: int = 30, limit: int = 5, from_date: Optional[date] = None, to_date: Optional[date] = None, db: Session = Depends(get_report_db), current_user = Depends(admin_required)):
     try:
-        if from_date and to_date:
-            since = from_date
-            until = to_date
-        else:
-            since = date.today() - timedelta(days=days)
-            until = date.today()
+        since, until = _stats_range(days, from_date, to_date)
 
+        agg = (
+            db.query(
+                SalesDaily.schedule_id.label('schedule_id'),
+                func.sum(SalesDaily.seats).label('tickets_sold'),
+                func.sum(SalesDaily.seat_revenue).label('revenue'),
+            )
+            .filter(SalesDaily.day.between(since, until))
+            .group_by(SalesDaily.schedule_id)
+            .having(func.sum(SalesDaily.seats) > 0)
+            .subquery()
+        )
         rows = (
             db.query(
                 Schedule.id.label('schedule_id'),
@@ -196,15 +196,12 @@ def stats_top_sessions(days: int = 30, limit: int = 5, from_date: Optional[date]
                 Schedule.time.label('time'),
                 Schedule.hall.label('hall'),
                 Movie.title.label('movie_title'),
-                func.count(TicketSeat.id).label('tickets_sold'),
-                func.coalesce(func.sum(TicketSeat.price), 0.0).label('revenue')
+                agg.c.tickets_sold,
+                agg.c.revenue,
             )
+            .join(agg, agg.c.schedule_id == Schedule.id)
             .join(Movie, Movie.id == Schedule.movie_id)
-            .join(Ticket, Ticket.schedule_id == Schedule.id)
-            .join(TicketSeat, TicketSeat.ticket_id == Ticket.id)
-            .filter(Ticket.purchase_date.between(since, until))
-            .group_by(Schedule.id, Schedule.date, Schedule.time, Schedule.hall, Movie.title)
-            .order_by(func.count(TicketSeat.id).desc())
+            .order_by(agg.c.tickets_sold.desc())
             .limit(limit)
             .all()
         )
@@ -223,13 +220,59 @@ def stats_top_sessions(days: int = 30, limit: int = 5, from_date: Optional[date]
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.post("/stats/rebuild")
+def stats_rebuild(from_date: Optional[date] = None, to_date: Optional[date] = None, db: Session = Depends(get_db), current_user = Depends(admin_required)):
+    rows = sales_rollup.rebuild(db, from_date, to_date)
+    return {'status': 'ok', 'rows': rows}
+
+@router.get("/export/sales")
+def export_sales(format: str = 'csv', from_date: Optional[date] = None, to_date: Optional[date] = None, current_user = Depends(admin_required)):
+    if format not in ('csv', 'ndjson'):
+        raise HTTPException(status_code=400, detail="Obsługiwane formaty: csv, ndjson")
+    if from_date and to_date and to_date < from_date:
+        raise HTTPException(status_code=400, detail="to_date nie może być wcześniejsza niż from_date")
+    suffix = '_'.join(d.isoformat() for d in (from_date, to_date) if d) or 'all'
+    if format == 'csv':
+        body, media_type = export.stream_csv(from_date, to_date), 'text/csv; charset=utf-8'
+    else:
+        body, media_type = export.stream_ndjson(from_date, to_date), 'application/x-ndjson'
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={'Content-Disposition': f'attachment; filename="sales_{suffix}.{format}"'},
+    )
+
+@router.get('/metrics/seat-holds')
+def metrics_seat_holds(current_user = Depends(admin_required)):
+    return seat_holds.metrics()
+
+@router.get('/metrics/recommendations')
+def metrics_recommendations(current_user = Depends(admin_required)):
+    return recommendations.metrics()
+
+@router.get('/metrics/db-pool')
+def metrics_db_pool(current_user = Depends(admin_required)):
+    return database.pool_metrics()
+
+@router.get('/metrics/db-routing')
+def metrics_db_routing(current_user = Depends(admin_required)):
+    return db_routing.router.metrics()
+
+@router.get('/metrics/http-cache')
+def metrics_http_cache(current_user = Depends(admin_required)):
+    return http_cache.metrics()
+
+@router.get('/metrics/password-hashing')
+def metrics_password_hashing(current_user = Depends(admin_required)):
+    return passwords.hasher.metrics()
+
 
 @router.get('/slides')
 def admin_list_slides(db: Session = Depends(get_db), current_user = Depends(admin_required)):
     return db.query(Slide).order_by(Slide.sort_order.asc(), Slide.id.desc()).all()
 
 @router.post('/slides')
-def admin_create_slide(payload: SlideCreate, db: Session = Depends(get_db), current_user = Depends(admin_required)):
+def admin_create_slide(payload: SlideCreate, db: Session = Depends(get_db), current_user = Depends(admin_catalogue_write)):
     slide = Slide(
         title=payload.title,
         description=payload.description,
@@ -239,12 +282,13 @@ def admin_create_slide(payload: SlideCreate, db: Session = Depends(get_db), curr
         is_public=1 if (payload.is_public is None or payload.is_public) else 0,
     )
     db.add(slide)
+    http_cache.bump(db, http_cache.SLIDES)
     db.commit()
     db.refresh(slide)
     return slide
 
 @router.patch('/slides/{slide_id}')
-def admin_update_slide(slide_id: int, payload: SlideUpdate, db: Session = Depends(get_db), current_user = Depends(admin_required)):
+def admin_update_slide(slide_id: int, payload: SlideUpdate, db: Session = Depends(get_db), current_user = Depends(admin_catalogue_write)):
     slide = db.query(Slide).filter(Slide.id == slide_id).first()
     if not slide:
         raise HTTPException(status_code=404, detail='Slide not found')
@@ -260,16 +304,18 @@ def admin_update_slide(slide_id: int, payload: SlideUpdate, db: Session = Depend
         slide.sort_order = payload.sort_order
     if payload.is_public is not None:
         slide.is_public = 1 if payload.is_public else 0
+    http_cache.bump(db, http_cache.SLIDES)
     db.commit()
     db.refresh(slide)
     return slide
 
 @router.delete('/slides/{slide_id}')
-def admin_delete_slide(slide_id: int, db: Session = Depends(get_db), current_user = Depends(admin_required)):
+def admin_delete_slide(slide_id: int, db: Session = Depends(get_db), current_user = Depends(admin_catalogue_write)):
     slide = db.query(Slide).filter(Slide.id == slide_id).first()
     if not slide:
         raise HTTPException(status_code=404, detail='Slide not found')
     db.delete(slide)
+    http_cache.bump(db, http_cache.SLIDES)
     db.commit()
     return { 'status': 'ok' }
 
@@ -278,7 +324,7 @@ def admin_list_news(db: Session = Depends(get_db), current_user = Depends(admin_
     return db.query(News).order_by(News.date.desc(), News.id.desc()).all()
 
 @router.post('/news')
-def admin_create_news(payload: NewsCreate, db: Session = Depends(get_db), current_user = Depends(admin_required)):
+def admin_create_news(payload: NewsCreate, db: Session = Depends(get_db), current_user = Depends(admin_catalogue_write)):
     n = News(
         title=payload.title,
         content=payload.content,
@@ -288,12 +334,13 @@ def admin_create_news(payload: NewsCreate, db: Session = Depends(get_db), curren
         is_public=1 if (payload.is_public is None or payload.is_public) else 0,
     )
     db.add(n)
+    http_cache.bump(db, http_cache.NEWS)
     db.commit()
     db.refresh(n)
     return n
 
 @router.patch('/news/{news_id}')
-def admin_update_news(news_id: int, payload: NewsUpdate, db: Session = Depends(get_db), current_user = Depends(admin_required)):
+def admin_update_news(news_id: int, payload: NewsUpdate, db: Session = Depends(get_db), current_user = Depends(admin_catalogue_write)):
     n = db.query(News).filter(News.id == news_id).first()
     if not n:
         raise HTTPException(status_code=404, detail='News not found')
@@ -312,16 +359,18 @@ def admin_update_news(news_id: int, payload: NewsUpdate, db: Session = Depends(g
         n.movie_id = payload.movie_id
     if payload.is_public is not None:
         n.is_public = 1 if payload.is_public else 0
+    http_cache.bump(db, http_cache.NEWS)
     db.commit()
     db.refresh(n)
     return n
 
 @router.delete('/news/{news_id}')
-def admin_delete_news(news_id: int, db: Session = Depends(get_db), current_user = Depends(admin_required)):
+def admin_delete_news(news_id: int, db: Session = Depends(get_db), current_user = Depends(admin_catalogue_write)):
     n = db.query(News).filter(News.id == news_id).first()
     if not n:
         raise HTTPException(status_code=404, detail='News not found')
     db.delete(n)
+    http_cache.bump(db, http_cache.NEWS)
     db.commit()
     return { 'status': 'ok' }
 
@@ -330,7 +379,7 @@ def admin_list_ticket_prices(db: Session = Depends(get_db), current_user = Depen
     return db.query(TicketPrice).order_by(TicketPrice.id.asc()).all()
 
 @router.patch('/ticket-prices/{price_id}')
-def admin_update_ticket_price(price_id: int, payload: TicketPriceUpdate, db: Session = Depends(get_db), current_user = Depends(admin_required)):
+def admin_update_ticket_price(price_id: int, payload: TicketPriceUpdate, db: Session = Depends(get_db), current_user = Depends(admin_catalogue_write)):
     row = db.query(TicketPrice).filter(TicketPrice.id == price_id).first()
     if not row:
         raise HTTPException(status_code=404, detail='Pozycja cennika nie istnieje')
@@ -346,6 +395,8 @@ def admin_update_ticket_price(price_id: int, payload: TicketPriceUpdate, db: Ses
         row.one_day_before = payload.one_day_before
     if payload.same_day is not None:
         row.same_day = payload.same_day
+    http_cache.bump(db, http_cache.TICKET_PRICES)
+    pricing.invalidate(db)
     db.commit()
     db.refresh(row)
     return row
\ No newline at end of file
@@ -0,0 +1,91 @@
+from datetime import date
+from typing import Iterable, Optional
+from sqlalchemy import text, delete, update
+from sqlalchemy.orm import Session
+from schemas import SalesDaily
+
+# One row per (purchase day, schedule) with the schedule's movie and hall
+# copied in, so the dashboard never has to touch tickets or ticket_seats.
+# Written in the same transaction as the ticket itself.
+
+_UPSERT = text(
+    """
+    INSERT INTO sales_daily (day, schedule_id, movie_id, hall, orders, seats, revenue, seat_revenue)
+    SELECT :day, s.id, s.movie_id, s.hall, :orders, :seats, :revenue, :seat_revenue
+    FROM schedules s WHERE s.id = :schedule_id
+    ON CONFLICT (day, schedule_id) DO UPDATE SET
+        orders = sales_daily.orders + EXCLUDED.orders,
+        seats = sales_daily.seats + EXCLUDED.seats,
+        revenue = sales_daily.revenue + EXCLUDED.revenue,
+        seat_revenue = sales_daily.seat_revenue + EXCLUDED.seat_revenue
+    """
+)
+
+_REBUILD = """
+    INSERT INTO sales_daily (day, schedule_id, movie_id, hall, orders, seats, revenue, seat_revenue)
+    SELECT t.purchase_date, s.id, s.movie_id, s.hall,
+           count(*), coalesce(sum(ts.seats), 0), coalesce(sum(t.total_price), 0), coalesce(sum(ts.seat_revenue), 0)
+    FROM tickets t
+    JOIN schedules s ON s.id = t.schedule_id
+    LEFT JOIN (
+        SELECT ticket_id, count(*) AS seats, sum(price) AS seat_revenue
+        FROM ticket_seats GROUP BY ticket_id
+    ) ts ON ts.ticket_id = t.id
+    WHERE t.purchase_date IS NOT NULL {where}
+    GROUP BY t.purchase_date, s.id, s.movie_id, s.hall
+"""
+
+
+def record_ticket(db: Session, day: date, schedule_id: int, seats: int, revenue: float, seat_revenue: float, sign: int = 1):
+    if day is None:
+        return
+    db.execute(_UPSERT, {
+        'day': day,
+        'schedule_id': schedule_id,
+        'orders': sign,
+        'seats': sign * seats,
+        'revenue': sign * float(revenue or 0.0),
+        'seat_revenue': sign * float(seat_revenue or 0.0),
+    })
+
+
+def remove_tickets(db: Session, tickets: Iterable):
+    for t in tickets:
+        record_ticket(
+            db, t.purchase_date, t.schedule_id,
+            len(t.seats), t.total_price, sum(float(s.price or 0.0) for s in t.seats),
+            sign=-1,
+        )
+
+
+def drop_schedules(db: Session, schedule_ids: Iterable[int]):
+    ids = list(schedule_ids)
+    if ids:
+        db.execute(delete(SalesDaily).where(SalesDaily.schedule_id.in_(ids)).execution_options(synchronize_session=False))
+
+
+def move_schedule_hall(db: Session, schedule_id: int, hall: Optional[int]):
+    db.execute(
+        update(SalesDaily)
+        .where(SalesDaily.schedule_id == schedule_id)
+        .values(hall=hall)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def rebuild(db: Session, since: Optional[date] = None, until: Optional[date] = None) -> int:
+    params = {}
+    where = ''
+    stmt = delete(SalesDaily)
+    if since is not None:
+        where += ' AND t.purchase_date >= :since'
+        params['since'] = since
+        stmt = stmt.where(SalesDaily.day >= since)
+    if until is not None:
+        where += ' AND t.purchase_date <= :until'
+        params['until'] = until
+        stmt = stmt.where(SalesDaily.day <= until)
+    db.execute(stmt.execution_options(synchronize_session=False))
+    res = db.execute(text(_REBUILD.format(where=where)), params)
+    db.commit()
+    return max(res.rowcount or 0, 0)
@@ -1,15 +1,13 @@
 from sqlalchemy.orm import Session
-from passlib.context import CryptContext
 from schemas import User
 from user.schemas import UserCreate
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from user.passwords import hash_password, verify_password
 
 def get_user_by_email(db: Session, email: str):
     return db.query(User).filter(User.email == email).first()
 
 def create_user(db: Session, user: UserCreate):
-    hashed_password = pwd_context.hash(user.password)
+    hashed_password = hash_password(user.password)
     db_user = User(
         email=user.email,
         first_name=user.first_name,
@@ -23,6 +21,6 @@ def create_user(db: Session, user: UserCreate):
 
 def authenticate_user(db: Session, email: str, password: str):
     user = get_user_by_email(db, email)
-    if not user or not pwd_context.verify(password, user.password):
+    if not user or not verify_password(password, user.password):
         return None
     return user
\ No newline at end of file
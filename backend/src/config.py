@@ -6,12 +6,57 @@ BASE_DIR = Path(__file__).resolve().parents[1]
 load_dotenv(BASE_DIR / ".env")
 
 SQLALCHEMY_DATABASE_URL = os.getenv("SQLALCHEMY_DATABASE_URL", "")
+SQLALCHEMY_READ_DATABASE_URL = os.getenv("SQLALCHEMY_READ_DATABASE_URL", "").strip()
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").strip().lower() in ("1", "true", "yes", "on")
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+DB_REPORT_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_REPORT_STATEMENT_TIMEOUT_MS", "0"))
+SQLALCHEMY_REPLICA_URLS = [
+    u.strip() for u in os.getenv("SQLALCHEMY_REPLICA_URLS", SQLALCHEMY_READ_DATABASE_URL).split(",") if u.strip()
+]
+DB_REPLICA_MAX_LAG_SECONDS = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", "5"))
+DB_REPLICA_CHECK_SECONDS = float(os.getenv("DB_REPLICA_CHECK_SECONDS", "5"))
+DB_READ_YOUR_WRITES_SECONDS = int(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "30"))
 SECRET_KEY = os.getenv("JWT_SECRET_KEY", "")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 10
 REFRESH_TOKEN_EXPIRE_MINUTES = 10080
 STRIPE_SECRET_KEY = os.getenv("STRIPE_SECRET_KEY", "")
 FRONTEND_BASE_URL = os.getenv("FRONTEND_BASE_URL", "")
+# the API is served under this prefix (FastAPI root_path); URLs the API
+# hands out to clients are built from it
+API_ROOT_PATH = "/api"
+SEAT_HOLD_BACKEND = os.getenv("SEAT_HOLD_BACKEND", "memory").strip().lower()
+SEAT_HOLD_SECONDS = int(os.getenv("SEAT_HOLD_SECONDS", "120"))
+SEAT_HOLD_SWEEP_SECONDS = float(os.getenv("SEAT_HOLD_SWEEP_SECONDS", "5"))
+SEAT_EVENTS_KEEPALIVE_SECONDS = float(os.getenv("SEAT_EVENTS_KEEPALIVE_SECONDS", "15"))
+SEAT_EVENTS_RESYNC_SECONDS = float(os.getenv("SEAT_EVENTS_RESYNC_SECONDS", "30"))
+QR_CACHE_SIZE = int(os.getenv("QR_CACHE_SIZE", "2048"))
+QR_CACHE_DIR = os.getenv("QR_CACHE_DIR", "").strip()
+RATING_RECONCILE_SECONDS = float(os.getenv("RATING_RECONCILE_SECONDS", "3600"))
+RECOMMENDATIONS_REFRESH_SECONDS = float(os.getenv("RECOMMENDATIONS_REFRESH_SECONDS", "600"))
+PRINCIPAL_CACHE_SECONDS = float(os.getenv("PRINCIPAL_CACHE_SECONDS", "30"))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "thread").strip().lower()
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", "16"))
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
+IMAGE_VARIANT_WIDTHS = sorted({int(w) for w in os.getenv("IMAGE_VARIANT_WIDTHS", "320,640,1024,1600").split(",") if w.strip()})
+IMAGE_DEFAULT_WIDTH = int(os.getenv("IMAGE_DEFAULT_WIDTH", "1024"))
+IMAGE_FORMATS = [f.strip().lower() for f in os.getenv("IMAGE_FORMATS", "webp,jpeg").split(",") if f.strip()]
+IMAGE_QUALITY = int(os.getenv("IMAGE_QUALITY", "80"))
+STATIC_IMMUTABLE_MAX_AGE = int(os.getenv("STATIC_IMMUTABLE_MAX_AGE", str(365 * 24 * 3600)))
+STATIC_OFFLOAD = os.getenv("STATIC_OFFLOAD", "").strip().lower()
+STATIC_ACCEL_PREFIX = "/" + os.getenv("STATIC_ACCEL_PREFIX", "/internal-static/").strip().strip("/") + "/"
+HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", "60"))
+HTTP_CACHE_STALE_SECONDS = int(os.getenv("HTTP_CACHE_STALE_SECONDS", "300"))
+CACHE_VERSION_TTL_SECONDS = float(os.getenv("CACHE_VERSION_TTL_SECONDS", "2"))
+PRICING_TIMEZONE = os.getenv("PRICING_TIMEZONE", "Europe/Warsaw").strip()
+ASYNC_DB_ENABLED = os.getenv("ASYNC_DB_ENABLED", "false").strip().lower() in ("1", "true", "yes", "on")
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", "").strip()
 
 _cors_from_env = os.getenv("CORS_ALLOW_ORIGINS", "").strip()
 if _cors_from_env:
@@ -1,14 +1,131 @@
-from sqlalchemy import create_engine
+from threading import Lock
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 try:
-    from config import SQLALCHEMY_DATABASE_URL
+    from config import (
+        SQLALCHEMY_DATABASE_URL, SQLALCHEMY_READ_DATABASE_URL, ASYNC_DB_ENABLED, ASYNC_DATABASE_URL,
+        DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING, DB_STATEMENT_TIMEOUT_MS,
+    )
 except ModuleNotFoundError:
-    from .config import SQLALCHEMY_DATABASE_URL
+    from .config import (
+        SQLALCHEMY_DATABASE_URL, SQLALCHEMY_READ_DATABASE_URL, ASYNC_DB_ENABLED, ASYNC_DATABASE_URL,
+        DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING, DB_STATEMENT_TIMEOUT_MS,
+    )
+
+
+def engine_options(url: str, is_async: bool = False) -> dict:
+    # SQLite (local development) keeps SQLAlchemy's default pool.
+    if url.startswith('sqlite'):
+        return {}
+    options = {
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_timeout': DB_POOL_TIMEOUT,
+        'pool_recycle': DB_POOL_RECYCLE,
+        'pool_pre_ping': DB_POOL_PRE_PING,
+    }
+    if DB_STATEMENT_TIMEOUT_MS > 0 and url.startswith(('postgresql', 'postgres://')):
+        if is_async:
+            options['connect_args'] = {'server_settings': {'statement_timeout': str(DB_STATEMENT_TIMEOUT_MS)}}
+        else:
+            options['connect_args'] = {'options': f'-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}'}
+    return options
+
 
 engine = create_engine(
-    SQLALCHEMY_DATABASE_URL
+    SQLALCHEMY_DATABASE_URL,
+    **engine_options(SQLALCHEMY_DATABASE_URL)
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base = declarative_base()
\ No newline at end of file
+# Heavy read-only work (admin stats, exports) can be pointed at a replica;
+# without SQLALCHEMY_READ_DATABASE_URL it shares the primary engine.
+read_engine = engine
+if SQLALCHEMY_READ_DATABASE_URL and SQLALCHEMY_READ_DATABASE_URL != SQLALCHEMY_DATABASE_URL:
+    read_engine = create_engine(SQLALCHEMY_READ_DATABASE_URL, **engine_options(SQLALCHEMY_READ_DATABASE_URL))
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+Base = declarative_base()
+
+
+def async_database_url(url: str) -> str:
+    for prefix in ('postgresql+psycopg2://', 'postgresql://', 'postgres://'):
+        if url.startswith(prefix):
+            return 'postgresql+asyncpg://' + url[len(prefix):]
+    if url.startswith('sqlite://'):
+        return 'sqlite+aiosqlite://' + url[len('sqlite://'):]
+    return url
+
+
+async_engine = None
+AsyncSessionLocal = None
+if ASYNC_DB_ENABLED:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    _async_url = ASYNC_DATABASE_URL or async_database_url(SQLALCHEMY_DATABASE_URL)
+    async_engine = create_async_engine(_async_url, **engine_options(_async_url, is_async=True))
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+def apply_statement_timeout(session, timeout_ms: int):
+    # SET LOCAL lasts until the end of the transaction, so it is re-applied
+    # every time the session begins a new one.
+    if timeout_ms <= 0 or session.get_bind().dialect.name != 'postgresql':
+        return
+
+    @event.listens_for(session, 'after_begin')
+    def _set_timeout(session, transaction, connection):
+        connection.exec_driver_sql(f'SET LOCAL statement_timeout = {int(timeout_ms)}')
+
+
+_stats_lock = Lock()
+_pool_timeouts = 0
+_statement_timeouts = 0
+
+
+def record_pool_timeout():
+    global _pool_timeouts
+    with _stats_lock:
+        _pool_timeouts += 1
+
+
+def record_statement_timeout():
+    global _statement_timeouts
+    with _stats_lock:
+        _statement_timeouts += 1
+
+
+def is_statement_timeout(exc) -> bool:
+    # PostgreSQL query_canceled, raised when statement_timeout fires
+    return getattr(getattr(exc, 'orig', None), 'pgcode', None) == '57014'
+
+
+def _pool_status(e) -> dict:
+    pool = e.pool
+    out = {'url': e.url.render_as_string(hide_password=True), 'pool': type(pool).__name__}
+    for name in ('size', 'checkedin', 'checkedout', 'overflow', 'timeout'):
+        fn = getattr(pool, name, None)
+        if callable(fn):
+            out[name] = fn()
+    max_overflow = getattr(pool, '_max_overflow', None)
+    if 'size' in out and max_overflow is not None and max_overflow >= 0:
+        out['max_overflow'] = max_overflow
+        capacity = out['size'] + max_overflow
+        out['utilization'] = round(out['checkedout'] / capacity, 3) if capacity else None
+    return out
+
+
+def pool_metrics() -> dict:
+    engines = {'primary': engine}
+    if read_engine is not engine:
+        engines['read'] = read_engine
+    if async_engine is not None:
+        engines['async'] = async_engine.sync_engine
+    with _stats_lock:
+        counters = {'pool_timeouts': _pool_timeouts, 'statement_timeouts': _statement_timeouts}
+    return {
+        'engines': {name: _pool_status(e) for name, e in engines.items()},
+        'statement_timeout_ms': DB_STATEMENT_TIMEOUT_MS,
+        **counters,
+    }
@@ -0,0 +1,211 @@
+import asyncio
+import hashlib
+import hmac
+import time
+from dataclasses import dataclass
+from itertools import count
+from threading import Lock
+from typing import Dict, List, Optional
+from fastapi import Request, Response
+from jose import JWTError, jwt
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session, sessionmaker
+from config import (
+    SQLALCHEMY_REPLICA_URLS, DB_REPLICA_MAX_LAG_SECONDS, DB_READ_YOUR_WRITES_SECONDS,
+    SECRET_KEY, ALGORITHM,
+)
+import database
+
+# Public catalogue reads go to a replica whose replay lag is within
+# DB_REPLICA_MAX_LAG_SECONDS; with no such replica they fall back to the
+# primary. A user who has just bought a ticket (or posted a review) is pinned
+# to the primary for DB_READ_YOUR_WRITES_SECONDS, both in this process (by
+# user id) and through a short-lived cookie, signed with SECRET_KEY, that any
+# worker can see. A cached public route whose cache_versions counters just
+# moved is also read from the primary (http_cache.conditional marks the
+# request).
+
+STICKY_COOKIE = 'db_primary_until'
+
+_LAG = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+    """
+)
+
+
+@dataclass
+class Replica:
+    name: str
+    engine: object
+    session_factory: sessionmaker
+    lag: Optional[float] = None
+    healthy: bool = False
+    checked_at: Optional[float] = None
+    error: Optional[str] = None
+    reads: int = 0
+
+
+def _measure_lag(replica: Replica) -> Optional[float]:
+    if replica.engine.dialect.name != 'postgresql':
+        return 0.0
+    with replica.engine.connect() as conn:
+        lag = conn.execute(_LAG).scalar()
+    return float(lag) if lag is not None else None
+
+
+class ReplicaRouter:
+    def __init__(self, urls: List[str], max_lag: float, sticky_seconds: int):
+        self.max_lag = max_lag
+        self.sticky_seconds = sticky_seconds
+        self.replicas: List[Replica] = []
+        for i, url in enumerate(urls):
+            if url == database.SQLALCHEMY_READ_DATABASE_URL and database.read_engine is not database.engine:
+                e = database.read_engine
+            else:
+                e = create_engine(url, **database.engine_options(url))
+            self.replicas.append(Replica(
+                name=f'replica-{i + 1}',
+                engine=e,
+                session_factory=sessionmaker(autocommit=False, autoflush=False, bind=e),
+            ))
+        self._next = count()
+        self._pinned: Dict[int, float] = {}
+        self._lock = Lock()
+        self.stats = {'replica_reads': 0, 'fallbacks': 0, 'sticky_reads': 0}
+
+    def check(self):
+        for replica in self.replicas:
+            try:
+                lag = _measure_lag(replica)
+                replica.lag, replica.healthy, replica.error = lag, lag is not None, None
+            except Exception as e:
+                replica.lag, replica.healthy, replica.error = None, False, type(e).__name__
+            replica.checked_at = time.time()
+
+    def pick(self) -> Optional[Replica]:
+        usable = [r for r in self.replicas if r.healthy and r.lag is not None and r.lag <= self.max_lag]
+        if not usable:
+            return None
+        return usable[next(self._next) % len(usable)]
+
+    def pin(self, user_id: Optional[int]):
+        if user_id is None or self.sticky_seconds <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            for key in [k for k, until in self._pinned.items() if until <= now]:
+                del self._pinned[key]
+            self._pinned[user_id] = now + self.sticky_seconds
+
+    def has_pins(self) -> bool:
+        return bool(self._pinned)
+
+    def is_pinned(self, user_id: Optional[int]) -> bool:
+        if user_id is None:
+            return False
+        with self._lock:
+            until = self._pinned.get(user_id)
+        return until is not None and until > time.monotonic()
+
+    def session(self, sticky: bool = False) -> Session:
+        if not self.replicas:
+            return database.SessionLocal()
+        with self._lock:
+            if sticky:
+                self.stats['sticky_reads'] += 1
+                return database.SessionLocal()
+            replica = self.pick()
+            if replica is None:
+                self.stats['fallbacks'] += 1
+                return database.SessionLocal()
+            replica.reads += 1
+            self.stats['replica_reads'] += 1
+        return replica.session_factory()
+
+    def metrics(self) -> dict:
+        with self._lock:
+            stats = {**self.stats, 'pinned_users': len(self._pinned)}
+        return {
+            'max_lag_seconds': self.max_lag,
+            'read_your_writes_seconds': self.sticky_seconds,
+            'replicas': [
+                {
+                    'name': r.name,
+                    'url': r.engine.url.render_as_string(hide_password=True),
+                    'healthy': r.healthy,
+                    'lag_seconds': r.lag,
+                    'checked_at': r.checked_at,
+                    'error': r.error,
+                    'reads': r.reads,
+                }
+                for r in self.replicas
+            ],
+            **stats,
+        }
+
+
+router = ReplicaRouter(SQLALCHEMY_REPLICA_URLS, DB_REPLICA_MAX_LAG_SECONDS, DB_READ_YOUR_WRITES_SECONDS)
+
+
+def _token_user_id(request: Request) -> Optional[int]:
+    auth = request.headers.get('authorization') or ''
+    scheme, _, token = auth.partition(' ')
+    if scheme.lower() != 'bearer' or not token:
+        return None
+    try:
+        uid = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get('uid')
+    except JWTError:
+        return None
+    return int(uid) if uid is not None else None
+
+
+def _sign(until: int) -> str:
+    return hmac.new(SECRET_KEY.encode('utf-8'), f'{STICKY_COOKIE}:{until}'.encode('utf-8'), hashlib.sha256).hexdigest()
+
+
+def _cookie_until(value: Optional[str]) -> Optional[int]:
+    # only values this API issued, and never further out than one window
+    until, _, signature = (value or '').partition('.')
+    if not until.isdigit() or not hmac.compare_digest(signature, _sign(int(until))):
+        return None
+    now = time.time()
+    return int(until) if now < int(until) <= now + router.sticky_seconds else None
+
+
+def is_sticky(request: Request) -> bool:
+    # the ETag of a cached public route may already name a change the
+    # replicas have not replayed yet
+    if getattr(request.state, 'db_primary', False):
+        return True
+    if _cookie_until(request.cookies.get(STICKY_COOKIE)) is not None:
+        return True
+    # decoding the token is only worth it while someone is pinned here
+    return router.has_pins() and router.is_pinned(_token_user_id(request))
+
+
+def mark_write(response: Response, user_id: Optional[int]):
+    if not router.replicas or router.sticky_seconds <= 0:
+        return
+    router.pin(user_id)
+    until = int(time.time()) + router.sticky_seconds
+    response.set_cookie(
+        STICKY_COOKIE,
+        f'{until}.{_sign(until)}',
+        max_age=router.sticky_seconds,
+        httponly=True,
+        samesite='lax',
+    )
+
+
+async def run_lag_monitor(interval_seconds: float):
+    while True:
+        try:
+            await asyncio.to_thread(router.check)
+        except Exception:
+            pass
+        await asyncio.sleep(interval_seconds)
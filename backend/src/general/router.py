@@ -1,25 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from schemas import TicketPrice, Slide, Movie, News
 from general.schemas import TicketPriceResponse, SlideResponse, AnnouncementResponse, NewsResponse
-from get_db import get_db
+from get_db import get_replica_db
+import http_cache
+from config import HTTP_CACHE_MAX_AGE
+from media import images
 from datetime import date
 router = APIRouter()
 
-@router.get("/ticket-prices", response_model=list[TicketPriceResponse])
-def get_ticket_prices(db: Session = Depends(get_db)):
+@router.get("/ticket-prices", response_model=list[TicketPriceResponse], dependencies=[Depends(http_cache.conditional(http_cache.TICKET_PRICES))])
+def get_ticket_prices(db: Session = Depends(get_replica_db)):
     return db.query(TicketPrice).all()
 
 @router.get('/slides', response_model=list[SlideResponse])
-def get_slides(db: Session = Depends(get_db)):
+def get_slides(db: Session = Depends(get_replica_db)):
     return db.query(Slide).order_by(Slide.sort_order.asc(), Slide.id.desc()).all()
 
-@router.get('/public/slides', response_model=list[SlideResponse])
-def get_public_slides(db: Session = Depends(get_db)):
+@router.get('/public/slides', response_model=list[SlideResponse], dependencies=[Depends(http_cache.conditional(http_cache.SLIDES))])
+def get_public_slides(db: Session = Depends(get_replica_db)):
     return db.query(Slide).filter(Slide.is_public == 1).order_by(Slide.sort_order.asc(), Slide.id.desc()).all()
 
-@router.get('/public/announcements', response_model=list[AnnouncementResponse])
-def get_public_announcements(limit: int | None = None, db: Session = Depends(get_db)):
+@router.get('/public/announcements', response_model=list[AnnouncementResponse], dependencies=[Depends(http_cache.conditional(http_cache.MOVIES, daily=True))])
+def get_public_announcements(limit: int | None = None, db: Session = Depends(get_replica_db)):
     q = db.query(Movie).filter(Movie.premiere_date != None)
     today = date.today()
     q = q.filter(Movie.premiere_date >= today)
@@ -28,16 +31,25 @@ def get_public_announcements(limit: int | None = None, db: Session = Depends(get
         q = q.limit(limit)
     return q.all()
 
-@router.get('/public/news', response_model=list[NewsResponse])
-def get_public_news(limit: int | None = None, db: Session = Depends(get_db)):
+@router.get('/public/news', response_model=list[NewsResponse], dependencies=[Depends(http_cache.conditional(http_cache.NEWS))])
+def get_public_news(limit: int | None = None, db: Session = Depends(get_replica_db)):
     q = db.query(News).filter(News.is_public == 1).order_by(News.date.desc(), News.id.desc())
     if limit and limit > 0:
         q = q.limit(limit)
     return q.all()
 
-@router.get('/public/news/{news_id}', response_model=NewsResponse)
-def get_public_news_item(news_id: int, db: Session = Depends(get_db)):
+@router.get('/public/news/{news_id}', response_model=NewsResponse, dependencies=[Depends(http_cache.conditional(http_cache.NEWS))])
+def get_public_news_item(news_id: int, db: Session = Depends(get_replica_db)):
     row = db.query(News).filter(News.id == news_id, News.is_public == 1).first()
     if not row:
         raise HTTPException(status_code=404, detail='News not found')
-    return row
\ No newline at end of file
+    return row
+
+@router.get('/images/{digest}')
+def get_image_variants(digest: str, response: Response):
+    result = images.image_set(digest)
+    if result is None:
+        raise HTTPException(status_code=404, detail='Image not found')
+    # re-processing an upload can add formats to its manifest
+    response.headers['Cache-Control'] = f'public, max-age={HTTP_CACHE_MAX_AGE}'
+    return result.to_dict()
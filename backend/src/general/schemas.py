@@ -1,6 +1,7 @@
 from pydantic import BaseModel
 from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey
 from datetime import date
+from media.schemas import WithImageSrcset
 
 class TicketPriceResponse(BaseModel):
     id: int
@@ -14,7 +15,7 @@ class TicketPriceResponse(BaseModel):
     class Config:
         orm_mode = True
 
-class SlideResponse(BaseModel):
+class SlideResponse(WithImageSrcset):
     id: int
     title: str
     description: str | None = None
@@ -26,7 +27,7 @@ class SlideResponse(BaseModel):
     class Config:
         orm_mode = True
 
-class AnnouncementResponse(BaseModel):
+class AnnouncementResponse(WithImageSrcset):
     id: int
     title: str
     image: str | None = None
@@ -38,7 +39,7 @@ class AnnouncementResponse(BaseModel):
     class Config:
         orm_mode = True
 
-class NewsResponse(BaseModel):
+class NewsResponse(WithImageSrcset):
     id: int
     title: str
     content: str | None = None
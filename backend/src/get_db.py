@@ -1,11 +1,44 @@
 try:
-    from database import SessionLocal
+    from database import SessionLocal, ReadSessionLocal, AsyncSessionLocal, apply_statement_timeout
+    import db_routing
 except ModuleNotFoundError:
-    from .database import SessionLocal
+    from .database import SessionLocal, ReadSessionLocal, AsyncSessionLocal, apply_statement_timeout
+    from . import db_routing
+from fastapi import Request
 
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def get_replica_db(request: Request):
+    db = db_routing.router.session(sticky=db_routing.is_sticky(request))
+    try:
+        yield db
+    finally:
+        db.close()
+
+def db_with_statement_timeout(timeout_ms: int, read: bool = False):
+    session_factory = ReadSessionLocal if read else SessionLocal
+
+    def dependency():
+        db = session_factory()
+        apply_statement_timeout(db, timeout_ms)
+        try:
+            yield db
+        finally:
+            db.close()
+    return dependency
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,134 @@
+import hashlib
+import time
+from datetime import date
+from threading import Lock
+from typing import Dict, Optional
+from fastapi import HTTPException, Request, Response
+from sqlalchemy import event, select, text
+from sqlalchemy.orm import Session
+from config import HTTP_CACHE_MAX_AGE, HTTP_CACHE_STALE_SECONDS, CACHE_VERSION_TTL_SECONDS, DB_REPLICA_MAX_LAG_SECONDS
+from database import SessionLocal
+from schemas import CacheVersion
+
+# Public catalogue responses are validated by a per-table version counter
+# stored in cache_versions. Write paths bump the counter in the same
+# transaction as the change; readers hold the counters in memory for
+# CACHE_VERSION_TTL_SECONDS, so an If-None-Match hit is answered with 304
+# before the handler (and its query) runs. The body itself may come from a
+# replica, so for DB_REPLICA_MAX_LAG_SECONDS after a worker sees one of a
+# route's own counters move, that route reads from the primary; otherwise a
+# lagging replica could serve the old rows under the new ETag.
+
+SLIDES = 'slides'
+NEWS = 'news'
+TICKET_PRICES = 'ticket_prices'
+MOVIES = 'movies'
+SCHEDULES = 'schedules'
+
+_BUMP = text(
+    """
+    INSERT INTO cache_versions (name, version) VALUES (:name, 1)
+    ON CONFLICT (name) DO UPDATE SET version = cache_versions.version + 1
+    """
+)
+
+_versions: Optional[Dict[str, int]] = None
+_loaded_at = 0.0
+_seen: Optional[Dict[str, int]] = None
+# table -> when this worker first saw its counter move
+_changed_at: Dict[str, float] = {}
+_lock = Lock()
+stats = {'not_modified': 0, 'misses': 0, 'version_loads': 0}
+
+
+def _forget(*_):
+    global _versions
+    with _lock:
+        _versions = None
+
+
+def bump(db: Session, *names: str):
+    for name in names:
+        db.execute(_BUMP, {'name': name})
+    _forget()
+    event.listen(db, 'after_commit', _forget, once=True)
+
+
+def _load() -> Optional[Dict[str, int]]:
+    db = SessionLocal()
+    try:
+        return {name: version for name, version in db.execute(select(CacheVersion.name, CacheVersion.version))}
+    except Exception:
+        return None
+    finally:
+        db.close()
+
+
+def versions() -> Optional[Dict[str, int]]:
+    global _versions, _loaded_at, _seen
+    with _lock:
+        if _versions is not None and time.monotonic() - _loaded_at < CACHE_VERSION_TTL_SECONDS:
+            return _versions
+    loaded = _load()
+    with _lock:
+        stats['version_loads'] += 1
+        _versions, _loaded_at = loaded, time.monotonic()
+        if loaded is not None:
+            # the first load has nothing to compare with
+            if _seen is not None:
+                for name, version in loaded.items():
+                    if _seen.get(name, 0) != version:
+                        _changed_at[name] = _loaded_at
+            _seen = loaded
+    return loaded
+
+
+def changed_within(tables, seconds: float) -> bool:
+    now = time.monotonic()
+    with _lock:
+        return any(t in _changed_at and now - _changed_at[t] < seconds for t in tables)
+
+
+def _etag(request: Request, tables, current: Dict[str, int], daily: bool) -> str:
+    parts = [request.url.path, str(sorted(request.query_params.multi_items()))]
+    parts += [f'{t}:{current.get(t, 0)}' for t in tables]
+    if daily:
+        parts.append(date.today().isoformat())
+    return '"' + hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()[:20] + '"'
+
+
+def _matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    return etag in [tag.strip().removeprefix('W/') for tag in header.split(',')]
+
+
+def conditional(*tables: str, daily: bool = False):
+    # daily: the body also depends on today's date (e.g. upcoming premieres)
+    def dependency(request: Request, response: Response):
+        current = versions()
+        if current is None:
+            return
+        etag = _etag(request, tables, current, daily)
+        if changed_within(tables, DB_REPLICA_MAX_LAG_SECONDS):
+            # read by db_routing.is_sticky when get_replica_db opens the session
+            request.state.db_primary = True
+        headers = {
+            'ETag': etag,
+            'Cache-Control': f'public, max-age={HTTP_CACHE_MAX_AGE}, stale-while-revalidate={HTTP_CACHE_STALE_SECONDS}',
+        }
+        if _matches(request.headers.get('if-none-match'), etag):
+            with _lock:
+                stats['not_modified'] += 1
+            raise HTTPException(status_code=304, headers=headers)
+        with _lock:
+            stats['misses'] += 1
+        response.headers.update(headers)
+    return dependency
+
+
+def metrics() -> dict:
+    with _lock:
+        return {'versions': dict(_versions or {}), **stats}
@@ -1,15 +1,48 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError, OperationalError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from user import router as user_router
 from admin import router as admin_router
 from movie import router as movie_router
 from general import router as general_router
 from payments import router as payments_router
 import os
-from config import CORS_ALLOW_ORIGINS
+from config import CORS_ALLOW_ORIGINS, SEAT_HOLD_SWEEP_SECONDS, RATING_RECONCILE_SECONDS, RECOMMENDATIONS_REFRESH_SECONDS, ASYNC_DB_ENABLED
+from config import DB_REPLICA_CHECK_SECONDS, API_ROOT_PATH, UPLOAD_MAX_BYTES
+import database
+import db_routing
+from database import async_engine
+from movie import seat_holds, ratings
+from media.assets import StaticAssets
+from media import uploads
+from user import recommendations, passwords
 
-app = FastAPI(root_path='/api')
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    tasks = []
+    if SEAT_HOLD_SWEEP_SECONDS > 0:
+        tasks.append(asyncio.create_task(seat_holds.run_sweeper(SEAT_HOLD_SWEEP_SECONDS)))
+    if RATING_RECONCILE_SECONDS > 0:
+        tasks.append(asyncio.create_task(ratings.run_reconciler(RATING_RECONCILE_SECONDS)))
+    if RECOMMENDATIONS_REFRESH_SECONDS > 0:
+        tasks.append(asyncio.create_task(recommendations.run_builder(RECOMMENDATIONS_REFRESH_SECONDS)))
+    if db_routing.router.replicas:
+        tasks.append(asyncio.create_task(db_routing.run_lag_monitor(DB_REPLICA_CHECK_SECONDS)))
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+        passwords.hasher.shutdown()
+        if async_engine is not None:
+            await async_engine.dispose()
+
+
+app = FastAPI(root_path=API_ROOT_PATH, lifespan=lifespan)
 
 static_dir = os.path.join(os.path.dirname(__file__), 'static')
 if not os.path.isdir(static_dir):
@@ -17,7 +50,14 @@ if not os.path.isdir(static_dir):
         os.makedirs(static_dir, exist_ok=True)
     except Exception:
         pass
-app.mount('/static', StaticFiles(directory=static_dir), name='static')
+
+app.mount('/static', StaticAssets(directory=static_dir), name='static')
+
+app.add_middleware(
+    uploads.UploadLimit,
+    paths=['/movie/movies/upload-image'],
+    max_bytes=UPLOAD_MAX_BYTES + uploads.MULTIPART_OVERHEAD,
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -26,7 +66,34 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-    
+
+@app.exception_handler(PoolTimeoutError)
+async def db_pool_timeout(request: Request, exc: PoolTimeoutError):
+    # every pooled connection stayed busy for DB_POOL_TIMEOUT seconds
+    database.record_pool_timeout()
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Serwer jest chwilowo przeciążony. Spróbuj ponownie za chwilę."},
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.exception_handler(OperationalError)
+async def db_operational_error(request: Request, exc: OperationalError):
+    if not database.is_statement_timeout(exc):
+        raise exc
+    database.record_statement_timeout()
+    return JSONResponse(status_code=503, content={"detail": "Zapytanie do bazy danych trwało zbyt długo."})
+
+
+if ASYNC_DB_ENABLED:
+    # Registered first so they take precedence over the sync versions of the
+    # same paths; the sync routes stay in the schema.
+    from movie import async_router as movie_async_router
+    from user import async_router as user_async_router
+    app.include_router(user_async_router.router, prefix='/user', tags=['user'], include_in_schema=False)
+    app.include_router(movie_async_router.router, prefix='/movie', tags=['movie'], include_in_schema=False)
+
 app.include_router(general_router.router, prefix='/general', tags=['general'])
 app.include_router(user_router.router, prefix='/user', tags=['user'])
 app.include_router(admin_router.router, prefix='/admin', tags=['admin'])
@@ -0,0 +1,207 @@
+import mimetypes
+import os
+import re
+import stat
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional, Tuple
+from urllib.parse import quote
+import anyio
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Receive, Scope, Send
+from config import STATIC_IMMUTABLE_MAX_AGE, STATIC_OFFLOAD, STATIC_ACCEL_PREFIX
+from media.images import VARIANT_NAME
+
+# Upload image names are never reused (content hash or random uuid hex plus
+# an extension), so variants and originals under /static/uploads are cached
+# as immutable. <hash>.json manifests are rewritten when an upload is
+# processed again, so they and other static files are revalidated on every
+# use. ETags are strong so ranges and
+# If-Range work; .br / .gz sidecars next to a text file are sent to clients
+# that accept them. With STATIC_OFFLOAD the response only carries headers and
+# the front proxy (nginx X-Accel-Redirect, or X-Sendfile) sends the bytes.
+# Dotfiles (.tmp-* / .upload-* files being written, state files) are never
+# served.
+
+OFFLOAD_MODES = ('x-accel-redirect', 'x-sendfile')
+CHUNK_SIZE = 64 * 1024
+COMPRESSIBLE = ('.json', '.svg', '.txt', '.css', '.js', '.html', '.xml')
+SIDECARS = (('br', '.br'), ('gzip', '.gz'))
+ORIGINAL_NAME = re.compile(r'^[0-9a-f]{32}\.(?:jpe?g|png|gif|webp|avif)$')
+
+
+def is_immutable(relpath: str) -> bool:
+    head, name = os.path.split(relpath)
+    return head == 'uploads' and bool(VARIANT_NAME.match(name) or ORIGINAL_NAME.match(name))
+
+
+def strong_etag(relpath: str, st: os.stat_result, encoding: Optional[str] = None) -> str:
+    tag = os.path.basename(relpath) if is_immutable(relpath) else f'{st.st_mtime_ns:x}-{st.st_size:x}'
+    return f'"{tag}-{encoding}"' if encoding else f'"{tag}"'
+
+
+def _accepted(header: str) -> set:
+    out = set()
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        q = params.strip()
+        if q.startswith('q='):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        out.add(coding.strip().lower())
+    return out
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # weak comparison, as If-None-Match requires
+    bare = etag[2:] if etag.startswith('W/') else etag
+    return any(t.strip() == '*' or t.strip().removeprefix('W/') == bare for t in header.split(','))
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    # (start, end) inclusive; None when the header should be ignored and the
+    # whole file sent; ValueError when the range cannot be satisfied
+    unit, _, spec = header.partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in spec:
+        return None
+    first, sep, last = (p.strip() for p in spec.partition('-'))
+    if not sep or not (first or last) or any(p and not p.isdigit() for p in (first, last)):
+        return None
+    if not first:
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError(header)
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size:
+        raise ValueError(header)
+    if end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+class PartialFileResponse(Response):
+    def __init__(self, path: str, start: int, end: int, size: int, headers: dict, media_type: str):
+        super().__init__(status_code=206, headers=headers, media_type=media_type)
+        self.path = path
+        self.start = start
+        self.length = end - start + 1
+        self.headers['content-range'] = f'bytes {start}-{end}/{size}'
+        self.headers['content-length'] = str(self.length)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        await send({'type': 'http.response.start', 'status': self.status_code, 'headers': self.raw_headers})
+        if scope['method'].upper() == 'HEAD':
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+            return
+        remaining = self.length
+        async with await anyio.open_file(self.path, 'rb') as f:
+            await f.seek(self.start)
+            while remaining > 0:
+                chunk = await f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': remaining > 0})
+        if remaining > 0:
+            # the file shrank underneath us
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+
+
+class StaticAssets(StaticFiles):
+    def __init__(self, *args, offload: str = STATIC_OFFLOAD, accel_prefix: str = STATIC_ACCEL_PREFIX, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.offload = offload if offload in OFFLOAD_MODES else ''
+        self.accel_prefix = accel_prefix
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if any(part.startswith('.') for part in path.replace(os.sep, '/').split('/')):
+            raise HTTPException(status_code=404)
+        return await super().get_response(path, scope)
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        full_path = str(full_path)
+        request_headers = Headers(scope=scope)
+        relpath = os.path.relpath(full_path, os.path.realpath(str(self.directory))).replace(os.sep, '/')
+        media_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+        headers = {
+            'cache-control': (
+                f'public, max-age={STATIC_IMMUTABLE_MAX_AGE}, immutable' if is_immutable(relpath) else 'no-cache'
+            ),
+            'accept-ranges': 'bytes',
+            'last-modified': formatdate(stat_result.st_mtime, usegmt=True),
+        }
+        compressible = full_path.endswith(COMPRESSIBLE)
+        if compressible:
+            headers['vary'] = 'Accept-Encoding'
+
+        if self.offload:
+            # the proxy does ranges, compression (gzip_static) and conditionals
+            headers['etag'] = strong_etag(relpath, stat_result)
+            if self.offload == 'x-accel-redirect':
+                headers['x-accel-redirect'] = self.accel_prefix + quote(relpath)
+            else:
+                headers['x-sendfile'] = full_path
+            return Response(status_code=status_code, headers=headers, media_type=media_type)
+
+        path, st, encoding = full_path, stat_result, None
+        if compressible and status_code == 200 and 'range' not in request_headers:
+            accepted = _accepted(request_headers.get('accept-encoding', ''))
+            for coding, suffix in SIDECARS:
+                if coding not in accepted:
+                    continue
+                try:
+                    sidecar = os.stat(full_path + suffix)
+                except OSError:
+                    continue
+                if stat.S_ISREG(sidecar.st_mode) and sidecar.st_mtime >= stat_result.st_mtime:
+                    path, st, encoding = full_path + suffix, sidecar, coding
+                    headers['content-encoding'] = coding
+                    break
+        etag = headers['etag'] = strong_etag(relpath, stat_result, encoding)
+
+        if status_code == 200:
+            if_none_match = request_headers.get('if-none-match')
+            if (
+                _etag_matches(if_none_match, etag) if if_none_match is not None
+                else self._not_modified_since(request_headers.get('if-modified-since'), stat_result)
+            ):
+                return Response(status_code=304, headers={k: v for k, v in headers.items() if k != 'content-encoding'})
+
+            range_header = request_headers.get('range')
+            if range_header and encoding is None and self._if_range_holds(request_headers.get('if-range'), etag, stat_result):
+                try:
+                    byte_range = parse_range(range_header, st.st_size)
+                except ValueError:
+                    return Response(status_code=416, headers={**headers, 'content-range': f'bytes */{st.st_size}'})
+                if byte_range is not None:
+                    return PartialFileResponse(path, *byte_range, st.st_size, headers, media_type)
+
+        return FileResponse(path, status_code=status_code, headers=headers, media_type=media_type, stat_result=st)
+
+    @staticmethod
+    def _not_modified_since(header: Optional[str], st: os.stat_result) -> bool:
+        if not header:
+            return False
+        try:
+            since = parsedate_to_datetime(header).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(st.st_mtime) <= since
+
+    @staticmethod
+    def _if_range_holds(header: Optional[str], etag: str, st: os.stat_result) -> bool:
+        if not header:
+            return True
+        if header.startswith('"'):
+            return header.strip() == etag
+        try:
+            return int(st.st_mtime) == int(parsedate_to_datetime(header).timestamp())
+        except (TypeError, ValueError):
+            return False
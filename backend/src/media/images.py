@@ -0,0 +1,234 @@
+import gzip
+import hashlib
+import io
+import json
+import os
+import re
+import tempfile
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+from PIL import Image, ImageOps, UnidentifiedImageError
+from config import API_ROOT_PATH, IMAGE_VARIANT_WIDTHS, IMAGE_DEFAULT_WIDTH, IMAGE_FORMATS, IMAGE_QUALITY
+
+# Every upload becomes a fixed grid of width slots x formats named
+# <hash>-<slot>w.<ext>, plus a <hash>.json manifest. A slot wider than the
+# source holds the source size, so every name in the grid exists and a client
+# can build a srcset from any stored URL. Movie.image / Slide.image /
+# News.image keep pointing at the IMAGE_DEFAULT_WIDTH JPEG.
+
+UPLOADS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'static', 'uploads'))
+URL_PREFIX = API_ROOT_PATH + '/static/uploads/'
+
+_EXTENSIONS = {'jpeg': 'jpg', 'webp': 'webp', 'avif': 'avif'}
+_MIME = {'jpeg': 'image/jpeg', 'webp': 'image/webp', 'avif': 'image/avif'}
+MANIFEST_CACHE_SIZE = 1024
+DIGEST = re.compile(r'^[0-9a-f]{32}$')
+VARIANT_NAME = re.compile(r'^(?P<hash>[0-9a-f]{32})-(?P<slot>\d+)w\.(?P<ext>jpg|webp|avif)$')
+
+
+class InvalidImage(ValueError):
+    pass
+
+
+def _supported_formats() -> List[str]:
+    Image.init()
+    out = [f for f in IMAGE_FORMATS if f in _EXTENSIONS and f.upper() in Image.SAVE]
+    # JPEG is the fallback every stored URL points at
+    if 'jpeg' not in out:
+        out.append('jpeg')
+    return out
+
+
+FORMATS = _supported_formats()
+_manifests: Dict[str, 'ImageSet'] = {}
+
+
+@dataclass
+class Variant:
+    slot: int
+    width: int
+    height: int
+    format: str
+    name: str
+    size: int
+
+    @property
+    def url(self) -> str:
+        return URL_PREFIX + self.name
+
+
+@dataclass
+class ImageSet:
+    hash: str
+    width: int
+    height: int
+    variants: List[Variant] = field(default_factory=list)
+
+    def url(self, fmt: str = 'jpeg', slot: int | None = None) -> str:
+        slot = slot or default_slot()
+        return URL_PREFIX + variant_name(self.hash, slot, fmt)
+
+    def srcset(self, fmt: str) -> str:
+        seen, parts = set(), []
+        for v in sorted((v for v in self.variants if v.format == fmt), key=lambda v: v.slot):
+            if v.width in seen:
+                continue
+            seen.add(v.width)
+            parts.append(f'{v.url} {v.width}w')
+        return ', '.join(parts)
+
+    def to_dict(self) -> dict:
+        return {
+            'hash': self.hash,
+            'url': self.url(),
+            'width': self.width,
+            'height': self.height,
+            'srcset': {fmt: self.srcset(fmt) for fmt in FORMATS},
+            'types': {fmt: _MIME[fmt] for fmt in FORMATS},
+            'variants': [{**asdict(v), 'url': v.url} for v in self.variants],
+        }
+
+
+def default_slot() -> int:
+    fits = [w for w in IMAGE_VARIANT_WIDTHS if w <= IMAGE_DEFAULT_WIDTH]
+    return max(fits) if fits else min(IMAGE_VARIANT_WIDTHS)
+
+
+def variant_name(digest: str, slot: int, fmt: str) -> str:
+    return f'{digest}-{slot}w.{_EXTENSIONS[fmt]}'
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:32]
+
+
+def _manifest_path(digest: str, out_dir: str) -> str:
+    return os.path.join(out_dir, f'{digest}.json')
+
+
+def _write_atomic(path: str, write):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _open(source) -> Image.Image:
+    try:
+        im = Image.open(source)
+        im.load()
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError) as e:
+        raise InvalidImage(str(e) or 'Nieprawidłowy plik obrazu')
+    im = ImageOps.exif_transpose(im)
+    if im.mode not in ('RGB', 'RGBA'):
+        im = im.convert('RGBA' if 'A' in im.getbands() or 'transparency' in im.info else 'RGB')
+    return im
+
+
+def _encode(im: Image.Image, fmt: str, f):
+    if fmt == 'jpeg':
+        if im.mode == 'RGBA':
+            flat = Image.new('RGB', im.size, (255, 255, 255))
+            flat.paste(im, mask=im.getchannel('A'))
+            im = flat
+        im.save(f, 'JPEG', quality=IMAGE_QUALITY, optimize=True, progressive=True)
+    elif fmt == 'webp':
+        im.save(f, 'WEBP', quality=IMAGE_QUALITY, method=4)
+    else:
+        im.save(f, fmt.upper(), quality=IMAGE_QUALITY)
+
+
+def load_manifest(digest: str, out_dir: str = UPLOADS_DIR) -> Optional[ImageSet]:
+    try:
+        with open(_manifest_path(digest, out_dir), 'r', encoding='utf-8') as f:
+            raw = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return ImageSet(
+        hash=raw['hash'], width=raw['width'], height=raw['height'],
+        variants=[Variant(**v) for v in raw['variants']],
+    )
+
+
+def process(source, digest: str, out_dir: str = UPLOADS_DIR) -> ImageSet:
+    # source: bytes or a path / binary file object Pillow can open
+    existing = load_manifest(digest, out_dir)
+    if existing is not None and {v.format for v in existing.variants} >= set(FORMATS):
+        return existing
+    os.makedirs(out_dir, exist_ok=True)
+    im = _open(io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source)
+    result = ImageSet(hash=digest, width=im.width, height=im.height)
+    for slot in IMAGE_VARIANT_WIDTHS:
+        width = min(slot, im.width)
+        height = max(1, round(im.height * width / im.width))
+        resized = im if width == im.width else im.resize((width, height), Image.LANCZOS)
+        for fmt in FORMATS:
+            name = variant_name(digest, slot, fmt)
+            path = os.path.join(out_dir, name)
+            if not os.path.exists(path):
+                _write_atomic(path, lambda f: _encode(resized, fmt, f))
+            result.variants.append(Variant(slot, width, height, fmt, name, os.path.getsize(path)))
+    body = json.dumps(asdict(result), separators=(',', ':')).encode('utf-8')
+    _write_atomic(_manifest_path(digest, out_dir), lambda f: f.write(body))
+    # precompressed sidecar for media.assets; the image variants themselves
+    # do not shrink under gzip
+    packed = gzip.compress(body, mtime=0)
+    if len(packed) < len(body):
+        _write_atomic(_manifest_path(digest, out_dir) + '.gz', lambda f: f.write(packed))
+    _manifests.pop(digest, None)
+    return result
+
+
+def process_bytes(data: bytes, out_dir: str = UPLOADS_DIR) -> ImageSet:
+    return process(data, content_hash(data), out_dir)
+
+
+def image_set(digest: str) -> Optional[ImageSet]:
+    if not DIGEST.match(digest):
+        return None
+    hit = _manifests.get(digest)
+    if hit is None:
+        hit = load_manifest(digest)
+        if hit is not None:
+            if len(_manifests) >= MANIFEST_CACHE_SIZE:
+                _manifests.clear()
+            _manifests[digest] = hit
+    return hit
+
+
+def image_set_for_url(url: Optional[str]) -> Optional[ImageSet]:
+    if not url:
+        return None
+    m = VARIANT_NAME.match(url.rsplit('/', 1)[-1])
+    return image_set(m.group('hash')) if m else None
+
+
+def srcset_for_url(url: Optional[str]) -> Optional[str]:
+    # one format, since an <img> takes one srcset: webp when it was made
+    result = image_set_for_url(url)
+    if result is None:
+        return None
+    fmt = 'webp' if any(v.format == 'webp' for v in result.variants) else 'jpeg'
+    return result.srcset(fmt) or None
+
+
+def upload_name(url: Optional[str]) -> Optional[str]:
+    # file name under static/uploads for any URL form the image columns
+    # have held: /api/static/..., legacy /static/... and absolute URLs
+    if not url or url.startswith('data:'):
+        return None
+    path = urlparse(url).path if url.startswith(('http://', 'https://')) else url
+    for prefix in (URL_PREFIX, '/static/uploads/'):
+        if path.startswith(prefix):
+            name = path[len(prefix):]
+            return name if name and '/' not in name else None
+    return None
+
@@ -0,0 +1,13 @@
+from pydantic import BaseModel, computed_field
+from typing import Optional
+from media import images
+
+class WithImageSrcset(BaseModel):
+    # responses carry the srcset of their image so the page has it on first
+    # render; None for images stored before the variant pipeline
+    image: Optional[str] = None
+
+    @computed_field
+    @property
+    def image_srcset(self) -> Optional[str]:
+        return images.srcset_for_url(self.image)
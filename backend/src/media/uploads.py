@@ -0,0 +1,138 @@
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import BinaryIO, Iterable
+import filetype
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from media.images import UPLOADS_DIR
+
+# Uploads are copied chunk by chunk into a temp file next to their final
+# location, sniffed from their first bytes, hashed on the way and renamed
+# into place under the content hash, so identical uploads share one file
+# and a half-written upload is never visible. FastAPI parses a multipart body
+# before any dependency (admin_required included) runs, so UploadLimit caps
+# the body at the ASGI level, by Content-Length and by counting what arrives.
+
+CHUNK_SIZE = 1024 * 1024
+SNIFF_BYTES = 261
+ALLOWED = {'image/jpeg': 'jpg', 'image/png': 'png'}
+# room for the multipart boundaries and part headers around the file
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class UnsupportedType(Exception):
+    pass
+
+
+@dataclass
+class StoredFile:
+    digest: str
+    path: str
+    size: int
+    mime: str
+    duplicate: bool
+
+
+def _sniff(head: bytes) -> str:
+    kind = filetype.guess(head)
+    if kind is None or kind.mime not in ALLOWED:
+        raise UnsupportedType(kind.mime if kind else None)
+    return kind.mime
+
+
+def store(src: BinaryIO, max_bytes: int, out_dir: str = UPLOADS_DIR) -> StoredFile:
+    os.makedirs(out_dir, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=out_dir, prefix='.upload-')
+    hasher = hashlib.sha256()
+    size = 0
+    head = b''
+    mime = None
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            while True:
+                chunk = src.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge()
+                if mime is None:
+                    head += chunk[:SNIFF_BYTES - len(head)]
+                    if len(head) >= SNIFF_BYTES:
+                        mime = _sniff(head)
+                hasher.update(chunk)
+                f.write(chunk)
+            if mime is None:
+                mime = _sniff(head)
+            f.flush()
+            os.fsync(f.fileno())
+        digest = hasher.hexdigest()[:32]
+        path = os.path.join(out_dir, f'{digest}.{ALLOWED[mime]}')
+        duplicate = os.path.exists(path)
+        if duplicate:
+            os.unlink(tmp)
+        else:
+            os.replace(tmp, path)
+        return StoredFile(digest, path, size, mime, duplicate)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class UploadLimit:
+    def __init__(self, app: ASGIApp, paths: Iterable[str], max_bytes: int):
+        self.app = app
+        self.paths = set(paths)
+        self.max_bytes = max_bytes
+
+    def _guarded(self, scope: Scope) -> bool:
+        if scope['type'] != 'http' or scope['method'] != 'POST':
+            return False
+        path, root = scope['path'], scope.get('root_path', '')
+        if root and path.startswith(root):
+            path = path[len(root):]
+        return path in self.paths
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if not self._guarded(scope):
+            await self.app(scope, receive, send)
+            return
+        too_large = JSONResponse({'detail': 'Plik jest za duży'}, status_code=413)
+        length = dict(scope['headers']).get(b'content-length', b'')
+        if length.isdigit() and int(length) > self.max_bytes:
+            await too_large(scope, receive, send)
+            return
+
+        received = 0
+        exceeded = False
+
+        async def limited_receive() -> Message:
+            nonlocal received, exceeded
+            message = await receive()
+            if message['type'] == 'http.request':
+                received += len(message.get('body', b''))
+                if received > self.max_bytes:
+                    exceeded = True
+                    raise UploadTooLarge()
+            return message
+
+        async def guarded_send(message: Message):
+            # the form parser turns any error into a 400; replaced by the 413
+            if not exceeded:
+                await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except UploadTooLarge:
+            pass
+        if exceeded:
+            await too_large(scope, receive, send)
@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+import http_cache
+from get_db import get_async_db
+from movie import async_service
+from movie.router import parse_movie_expansions
+from movie.schemas import SchedulePage, MovieListItem
+from movie.service import REPERTOIRE_MAX_LIMIT
+from typing import Optional
+from datetime import date, timedelta
+
+router = APIRouter()
+
+@router.get("/movies", response_model=list[MovieListItem], response_model_exclude_unset=True,
+            dependencies=[Depends(http_cache.conditional(http_cache.MOVIES, http_cache.SCHEDULES, daily=True))])
+async def get_movies(
+    include: Optional[str] = None,
+    schedules_from: Optional[date] = Query(None, alias="from"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    expand = parse_movie_expansions(include)
+    if "schedules" not in expand:
+        return await async_service.get_movies(db)
+    return await async_service.get_movies(db, with_schedules=True, schedules_from=schedules_from or date.today())
+
+@router.get("/repertoire", response_model=SchedulePage)
+async def get_repertoire(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    hall: Optional[int] = None,
+    movie_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=REPERTOIRE_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    date_from = date_from or date.today()
+    date_to = date_to or (date_from + timedelta(days=6))
+    try:
+        items, next_cursor = await async_service.get_repertoire(db, date_from, date_to, hall, movie_id, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": items, "next_cursor": next_cursor}
+
+@router.get("/schedules/{schedule_id}/blocked-seats")
+async def get_blocked_seats(schedule_id: int, db: AsyncSession = Depends(get_async_db)):
+    return {"blocked_seats": await async_service.get_blocked_seats(db, schedule_id)}
@@ -0,0 +1,61 @@
+import asyncio
+from datetime import date, datetime
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import SEAT_HOLD_BACKEND
+from schemas import Schedule
+from movie import occupancy, ratings
+from movie.seat_holds import store as seat_hold_store
+from movie.service import (
+    REPERTOIRE_MAX_LIMIT,
+    movies_statement,
+    expose_schedules,
+    repertoire_statement,
+    repertoire_page,
+    sold_seats_statement,
+    sold_seat_positions,
+)
+
+# AsyncSession counterparts of the hot read paths in movie.service. The
+# statements are shared with the sync functions so both stacks return the
+# same rows; only the execution differs.
+
+
+async def get_movies(db: AsyncSession, with_schedules: bool = False, schedules_from: date | None = None):
+    movies = (await db.execute(movies_statement(with_schedules, schedules_from))).unique().scalars().all()
+    ratings.expose(movies)
+    if with_schedules:
+        expose_schedules(movies)
+    return movies
+
+
+async def get_repertoire(db: AsyncSession, date_from: date, date_to: date, hall: int | None = None,
+                         movie_id: int | None = None, limit: int = 100, cursor: str | None = None):
+    limit = max(1, min(limit, REPERTOIRE_MAX_LIMIT))
+    stmt = repertoire_statement(date_from, date_to, hall, movie_id, limit, cursor)
+    return repertoire_page((await db.execute(stmt)).unique().scalars().all(), limit)
+
+
+async def get_sold_seats(db: AsyncSession, schedule_id: int) -> occupancy.SeatOccupancy:
+    version = (await db.execute(select(Schedule.seat_version).where(Schedule.id == schedule_id))).scalar()
+    if version is None:
+        return occupancy.SeatOccupancy(0)
+    cached = occupancy.get(schedule_id, version)
+    if cached is not None:
+        return cached
+    sold = sold_seat_positions((await db.execute(sold_seats_statement(schedule_id))).all())
+    return occupancy.put(schedule_id, occupancy.SeatOccupancy(version, sold))
+
+
+async def _held_seats(schedule_id: int):
+    now = datetime.utcnow()
+    # the database-backed hold store uses the sync engine
+    if SEAT_HOLD_BACKEND == 'database':
+        return await asyncio.to_thread(seat_hold_store.held, schedule_id, now)
+    return seat_hold_store.held(schedule_id, now)
+
+
+async def get_blocked_seats(db: AsyncSession, schedule_id: int):
+    temp_blocked = set(await _held_seats(schedule_id))
+    sold = await get_sold_seats(db, schedule_id)
+    return list(temp_blocked.union(sold.seats()))
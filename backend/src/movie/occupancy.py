@@ -0,0 +1,100 @@
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class SeatOccupancy:
+    __slots__ = ('version', 'rows', 'cols', 'bits', '_seats')
+
+    def __init__(self, version: int, seats: Iterable[Tuple[int, int]] = (), rows: int = 0, cols: int = 0):
+        seats = [(int(r), int(c)) for r, c in seats if r is not None and c is not None and r >= 0 and c >= 0]
+        self.version = version
+        self.rows = max([rows] + [r + 1 for r, _ in seats])
+        self.cols = max([cols] + [c + 1 for _, c in seats])
+        self.bits = bytearray((self.rows * self.cols + 7) // 8)
+        self._seats: Optional[List[Tuple[int, int]]] = None
+        for r, c in seats:
+            self._set(r, c, True)
+
+    def _set(self, row: int, col: int, value: bool):
+        pos = row * self.cols + col
+        if value:
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        else:
+            self.bits[pos >> 3] &= ~(1 << (pos & 7)) & 0xFF
+        self._seats = None
+
+    def __contains__(self, seat: Tuple[int, int]) -> bool:
+        row, col = seat
+        if row < 0 or col < 0 or row >= self.rows or col >= self.cols:
+            return False
+        pos = row * self.cols + col
+        return bool(self.bits[pos >> 3] & (1 << (pos & 7)))
+
+    def __len__(self) -> int:
+        return len(self.seats())
+
+    def seats(self) -> List[Tuple[int, int]]:
+        if self._seats is None:
+            out = []
+            cols = self.cols
+            for byte_idx, byte in enumerate(self.bits):
+                if not byte:
+                    continue
+                for bit in range(8):
+                    if byte & (1 << bit):
+                        pos = (byte_idx << 3) + bit
+                        out.append(divmod(pos, cols))
+            self._seats = out
+        return self._seats
+
+    def with_changes(self, version: int, sold: Iterable[Tuple[int, int]] = (), released: Iterable[Tuple[int, int]] = ()) -> 'SeatOccupancy':
+        sold = [(int(r), int(c)) for r, c in sold if r is not None and c is not None and r >= 0 and c >= 0]
+        released = set((int(r), int(c)) for r, c in released if r is not None and c is not None)
+        if any(r >= self.rows or c >= self.cols for r, c in sold):
+            seats = [s for s in self.seats() if s not in released] + sold
+            return SeatOccupancy(version, seats, self.rows, self.cols)
+        updated = SeatOccupancy(version, (), self.rows, self.cols)
+        updated.bits = bytearray(self.bits)
+        for r, c in released:
+            if (r, c) in updated:
+                updated._set(r, c, False)
+        for r, c in sold:
+            updated._set(r, c, True)
+        return updated
+
+
+_cache: Dict[int, SeatOccupancy] = {}
+_lock = Lock()
+
+
+def get(schedule_id: int, version: int) -> Optional[SeatOccupancy]:
+    occ = _cache.get(schedule_id)
+    if occ is not None and occ.version == version:
+        return occ
+    return None
+
+
+def put(schedule_id: int, occ: SeatOccupancy) -> SeatOccupancy:
+    with _lock:
+        current = _cache.get(schedule_id)
+        if current is None or current.version <= occ.version:
+            _cache[schedule_id] = occ
+    return occ
+
+
+def apply(schedule_id: int, version: int, sold: Iterable[Tuple[int, int]] = (), released: Iterable[Tuple[int, int]] = ()):
+    # Incremental update after a committed write that moved the schedule from
+    # version-1 to version; anything else means we missed a write elsewhere.
+    with _lock:
+        current = _cache.get(schedule_id)
+        if current is None:
+            return
+        if current.version == version - 1:
+            _cache[schedule_id] = current.with_changes(version, sold, released)
+        elif current.version < version:
+            del _cache[schedule_id]
+
+
+def invalidate(schedule_id: int):
+    with _lock:
+        _cache.pop(schedule_id, None)
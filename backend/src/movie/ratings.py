@@ -0,0 +1,84 @@
+import asyncio
+from typing import Iterable
+from sqlalchemy import Float, cast, func, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from database import SessionLocal
+from schemas import Movie, Review
+import http_cache
+
+
+def record_review(db: Session, movie_id: int, rating: int, previous: int | None = None):
+    # Runs inside the caller's transaction. SET expressions see the row's old
+    # values, so the running average is updated atomically without a read.
+    if previous is None:
+        stmt = (
+            update(Movie)
+            .where(Movie.id == movie_id)
+            .values(
+                rating_avg=(func.coalesce(Movie.rating_avg, 0) * Movie.rating_count + rating) / (Movie.rating_count + 1),
+                rating_count=Movie.rating_count + 1,
+            )
+        )
+    elif previous != rating:
+        stmt = (
+            update(Movie)
+            .where(Movie.id == movie_id, Movie.rating_count > 0)
+            .values(rating_avg=Movie.rating_avg + (rating - previous) / cast(Movie.rating_count, Float))
+        )
+    else:
+        return
+    db.execute(stmt.execution_options(synchronize_session=False))
+    http_cache.bump(db, http_cache.MOVIES)
+
+
+def expose(movies: Iterable[Movie]):
+    # Movie.rating is what the API returns; reviews take precedence over the
+    # admin-entered value. set_committed_value keeps the session clean so a
+    # later commit never writes the average back into movies.rating.
+    for m in movies:
+        if m is not None and m.rating_count and m.rating_avg is not None:
+            set_committed_value(m, 'rating', round(float(m.rating_avg), 1))
+
+
+def reconcile(db: Session) -> int:
+    actual = {
+        mid: (int(cnt), float(avg))
+        for mid, cnt, avg in db.query(Review.movie_id, func.count(Review.id), func.avg(Review.rating)).group_by(Review.movie_id).all()
+    }
+    fixed = 0
+    for mid, count, avg in db.query(Movie.id, Movie.rating_count, Movie.rating_avg).all():
+        want_count, want_avg = actual.get(mid, (0, None))
+        if want_avg is None or avg is None:
+            same_avg = want_avg is None and avg is None
+        else:
+            same_avg = abs(float(avg) - want_avg) < 1e-9
+        if (count or 0) != want_count or not same_avg:
+            db.execute(
+                update(Movie)
+                .where(Movie.id == mid)
+                .values(rating_count=want_count, rating_avg=want_avg)
+                .execution_options(synchronize_session=False)
+            )
+            fixed += 1
+    if fixed:
+        http_cache.bump(db, http_cache.MOVIES)
+    db.commit()
+    return fixed
+
+
+def _reconcile_once() -> int:
+    db = SessionLocal()
+    try:
+        return reconcile(db)
+    finally:
+        db.close()
+
+
+async def run_reconciler(interval_seconds: float):
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await asyncio.to_thread(_reconcile_once)
+        except Exception:
+            pass
@@ -1,55 +1,77 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi import Body, UploadFile, File
+from fastapi import Body, UploadFile, File, Query
 from fastapi import Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from get_db import get_db
-from movie import service
+import http_cache
+from get_db import get_db, get_replica_db
+from database import SessionLocal
+from movie import service, seat_events
+from media import images, uploads
+from config import UPLOAD_MAX_BYTES
 from schemas import Schedule, Review
 from movie.schemas import MovieCreate, Movie, ScheduleCreate
 from movie.schemas import Schedule as ScheduleSchema
 from movie.schemas import ScheduleUpdate
-from movie.schemas import CategoryBase
-from typing import List
-from user.service import admin_required, list_movie_reviews as user_list_movie_reviews
+from movie.schemas import CategoryBase, SchedulePage, MovieListItem
+from typing import List, Optional
 import os
-import uuid
+from datetime import date, timedelta
+from user.service import admin_required, admin_catalogue_write, list_movie_reviews as user_list_movie_reviews
 
 router = APIRouter()
 
 @router.get("/categories", response_model=list[CategoryBase])
-def list_categories(db: Session = Depends(get_db)):
+def list_categories(db: Session = Depends(get_replica_db)):
     return service.get_categories(db)
 
 @router.post("/categories", response_model=CategoryBase, status_code=201)
-def add_category(name: str = Body(..., embed=True), db: Session = Depends(get_db), current_user = Depends(admin_required)):
+def add_category(name: str = Body(..., embed=True), db: Session = Depends(get_db), current_user = Depends(admin_catalogue_write)):
     cat = service.create_category(db, name)
     if not cat:
         raise HTTPException(status_code=400, detail="Invalid name")
     return cat
 
-@router.get("/movies", response_model=list[Movie])
-def get_movies(db: Session = Depends(get_db)):
-    return service.get_movies(db)
+MOVIE_LIST_EXPANSIONS = {"schedules"}
+
+def parse_movie_expansions(include: Optional[str]) -> set:
+    expand = {part.strip() for part in (include or "").split(",") if part.strip()}
+    unknown = expand - MOVIE_LIST_EXPANSIONS
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Nieznane rozszerzenie: {', '.join(sorted(unknown))}")
+    return expand
+
+@router.get("/movies", response_model=list[MovieListItem], response_model_exclude_unset=True,
+            dependencies=[Depends(http_cache.conditional(http_cache.MOVIES, http_cache.SCHEDULES, daily=True))])
+def get_movies(
+    include: Optional[str] = None,
+    schedules_from: Optional[date] = Query(None, alias="from"),
+    db: Session = Depends(get_replica_db),
+):
+    expand = parse_movie_expansions(include)
+    if "schedules" not in expand:
+        return service.get_movies(db)
+    return service.get_movies(db, with_schedules=True, schedules_from=schedules_from or date.today())
 
 @router.get("/movies/{movie_id}", response_model=Movie)
-def get_movie(movie_id: int, db: Session = Depends(get_db)):
+def get_movie(movie_id: int, db: Session = Depends(get_replica_db)):
     movie = service.get_movie_by_id(db, movie_id)
     if not movie:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Movie not found")
     return movie
 
 @router.get('/movies/{movie_id}/reviews')
-def get_movie_reviews(movie_id: int, db: Session = Depends(get_db)):
+def get_movie_reviews(movie_id: int, db: Session = Depends(get_replica_db)):
     return user_list_movie_reviews(db, movie_id)
 
 @router.post("/movies", response_model=Movie)
-def create_movie(movie: MovieCreate, db: Session = Depends(get_db), current_user = Depends(admin_required)):
+def create_movie(movie: MovieCreate, db: Session = Depends(get_db), current_user = Depends(admin_catalogue_write)):
     return service.create_movie(db, movie)
 
 from movie.schemas import MovieUpdate
 
 @router.patch("/movies/{movie_id}", response_model=Movie)
-def update_movie(movie_id: int, payload: MovieUpdate, db: Session = Depends(get_db), current_user = Depends(admin_required)):
+def update_movie(movie_id: int, payload: MovieUpdate, db: Session = Depends(get_db), current_user = Depends(admin_catalogue_write)):
     db_movie = service.get_movie_by_id(db, movie_id)
     if not db_movie:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Movie not found")
@@ -57,52 +79,68 @@ def update_movie(movie_id: int, payload: MovieUpdate, db: Session = Depends(get_
     return updated
 
 @router.post('/movies/upload-image')
-def upload_image(file: UploadFile = File(...), request: Request = None, current_user = Depends(admin_required)):
-    allowed = { 'image/jpeg', 'image/png', 'image/jpg' }
-    if file.content_type not in allowed:
+def upload_image(file: UploadFile = File(...), current_user = Depends(admin_required)):
+    try:
+        stored = uploads.store(file.file, UPLOAD_MAX_BYTES)
+    except uploads.UploadTooLarge:
+        raise HTTPException(status_code=413, detail='Plik jest za duży')
+    except uploads.UnsupportedType:
         raise HTTPException(status_code=400, detail='Dozwolone tylko JPG/PNG')
-    ext = '.jpg'
-    if file.content_type == 'image/png':
-        ext = '.png'
-    uploads_dir = os.path.join(os.path.dirname(__file__), '..', 'static', 'uploads')
-    uploads_dir = os.path.abspath(uploads_dir)
-    os.makedirs(uploads_dir, exist_ok=True)
-    filename = f"{uuid.uuid4().hex}{ext}"
-    path = os.path.join(uploads_dir, filename)
-    with open(path, 'wb') as f:
-        f.write(file.file.read())
-    rel_url = f"/api/static/uploads/{filename}"
-    return { 'url': rel_url }
+    try:
+        result = images.process(stored.path, stored.digest)
+    except images.InvalidImage:
+        if not stored.duplicate:
+            os.unlink(stored.path)
+        raise HTTPException(status_code=400, detail='Nieprawidłowy plik obrazu')
+    return result.to_dict()
 
 @router.get("/movies/{movie_id}/schedules", response_model=list[ScheduleSchema])
-def get_schedules_for_movie(movie_id: int, db: Session = Depends(get_db)):
+def get_schedules_for_movie(movie_id: int, db: Session = Depends(get_replica_db)):
     return service.get_schedules_for_movie(db, movie_id)
 
 @router.post("/schedules", response_model=ScheduleSchema)
-def create_schedule(schedule: ScheduleCreate, db: Session = Depends(get_db), current_user = Depends(admin_required)):
+def create_schedule(schedule: ScheduleCreate, db: Session = Depends(get_db), current_user = Depends(admin_catalogue_write)):
     return service.create_schedule(db, schedule)
 
 
 @router.delete("/movies/{movie_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_movie(movie_id: int, db: Session = Depends(get_db), current_user = Depends(admin_required)):
+def delete_movie(movie_id: int, db: Session = Depends(get_db), current_user = Depends(admin_catalogue_write)):
     movie = service.get_movie_by_id(db, movie_id)
     if not movie:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Movie not found")
     service.delete_movie(db, movie_id)
 
-@router.get("/get-schedules", response_model=list[ScheduleSchema])
-def get_all_schedules(db: Session = Depends(get_db)):
+@router.get("/get-schedules", response_model=list[ScheduleSchema], deprecated=True)
+def get_all_schedules(db: Session = Depends(get_replica_db)):
     return service.get_all_schedules(db)
 
+@router.get("/repertoire", response_model=SchedulePage)
+def get_repertoire(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    hall: Optional[int] = None,
+    movie_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=service.REPERTOIRE_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_replica_db),
+):
+    date_from = date_from or date.today()
+    date_to = date_to or (date_from + timedelta(days=6))
+    try:
+        items, next_cursor = service.get_repertoire(db, date_from, date_to, hall, movie_id, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": items, "next_cursor": next_cursor}
+
 @router.get("/schedules/{schedule_id}", response_model=ScheduleSchema)
-def get_schedule(schedule_id: int, db: Session = Depends(get_db)):
+def get_schedule(schedule_id: int, db: Session = Depends(get_replica_db)):
     schedule = service.get_schedule(db, schedule_id)
     if not schedule:
         raise HTTPException(status_code=404, detail="Schedule not found")
     return schedule
 
 @router.patch("/schedules/{schedule_id}", response_model=ScheduleSchema)
-def update_schedule(schedule_id: int, payload: ScheduleUpdate, db: Session = Depends(get_db), current_user = Depends(admin_required)):
+def update_schedule(schedule_id: int, payload: ScheduleUpdate, db: Session = Depends(get_db), current_user = Depends(admin_catalogue_write)):
     schedule = service.get_schedule(db, schedule_id)
     if not schedule:
         raise HTTPException(status_code=404, detail="Schedule not found")
@@ -113,7 +151,7 @@ def update_schedule(schedule_id: int, payload: ScheduleUpdate, db: Session = Dep
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.delete("/schedules/{schedule_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_schedule(schedule_id: int, db: Session = Depends(get_db), current_user = Depends(admin_required)):
+def delete_schedule(schedule_id: int, db: Session = Depends(get_db), current_user = Depends(admin_catalogue_write)):
     schedule = service.get_schedule(db, schedule_id)
     if not schedule:
         raise HTTPException(status_code=404, detail="Schedule not found")
@@ -145,4 +183,19 @@ def release_seats(schedule_id: int, seats: List[tuple[int,int]] = Body(...)):
 
 @router.get("/schedules/{schedule_id}/blocked-seats")
 def get_blocked_seats(schedule_id: int, db: Session = Depends(get_db)):
-    return {"blocked_seats": service.get_blocked_seats(db, schedule_id)}
\ No newline at end of file
+    return {"blocked_seats": service.get_blocked_seats(db, schedule_id)}
+
+def _seat_snapshot(schedule_id: int):
+    db = SessionLocal()
+    try:
+        return service.seat_snapshot(db, schedule_id)
+    finally:
+        db.close()
+
+@router.get("/schedules/{schedule_id}/seat-events")
+async def stream_seat_events(schedule_id: int, request: Request):
+    return StreamingResponse(
+        seat_events.stream(schedule_id, request, _seat_snapshot),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
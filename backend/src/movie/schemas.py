@@ -1,6 +1,7 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import date as DateType
+from media.schemas import WithImageSrcset
 
 
 
@@ -42,9 +43,8 @@ class MovieBase(BaseModel):
     categories: List[CategoryBase] = []
     premiere_date: Optional[DateType] = None
 
-class Schedule(ScheduleBase):
+class MovieSchedule(ScheduleBase):
     id: int
-    movie: Optional[MovieBase] = None 
 
     class Config:
         orm_mode = True
@@ -67,7 +67,7 @@ class MovieUpdate(BaseModel):
     premiere_date: Optional[DateType] = None
 
 
-class Movie(BaseModel):
+class Movie(WithImageSrcset):
     id: int
     title: str
     genre: str
@@ -79,13 +79,50 @@ class Movie(BaseModel):
     trailer: Optional[str]
     cast: Optional[str]
     categories: List[CategoryBase] = []
-    schedules: List[Schedule] = []
+    schedules: List[MovieSchedule] = []
     premiere_date: Optional[DateType] = None
 
     class Config:
         orm_mode = True
 
 
+class MovieSummary(WithImageSrcset):
+    id: int
+    title: str
+    genre: str
+    duration: str
+    rating: Optional[float]
+    description: Optional[str]
+    image: Optional[str]
+    big_image: Optional[str]
+    trailer: Optional[str]
+    cast: Optional[str]
+    categories: List[CategoryBase] = []
+    premiere_date: Optional[DateType] = None
+
+    class Config:
+        orm_mode = True
+
+
+class MovieListItem(MovieSummary):
+    # read from listed_schedules, which the service only sets for
+    # include=schedules; otherwise the field stays unset and is left out
+    schedules: Optional[List[MovieSchedule]] = Field(None, validation_alias='listed_schedules')
+
+
+class Schedule(ScheduleBase):
+    id: int
+    movie: Optional[MovieSummary] = None
+
+    class Config:
+        orm_mode = True
+
+
+class SchedulePage(BaseModel):
+    items: List[Schedule]
+    next_cursor: Optional[str] = None
+
+
 class BlockSeatRequest(BaseModel):
     row: int
     col: int
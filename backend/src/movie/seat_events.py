@@ -0,0 +1,125 @@
+import asyncio
+import json
+from datetime import datetime
+from threading import Lock
+from typing import Dict, Iterable, List, Set, Tuple
+from config import SEAT_HOLD_BACKEND, SEAT_EVENTS_KEEPALIVE_SECONDS, SEAT_EVENTS_RESYNC_SECONDS
+
+QUEUE_SIZE = 256
+
+
+class SeatEventBroker:
+    # Subscribers are asyncio queues owned by the event loop; publishers may
+    # run in threadpool workers, so delivery goes through call_soon_threadsafe.
+    def __init__(self):
+        self._subscribers: Dict[int, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        self._lock = Lock()
+
+    def subscribe(self, schedule_id: int) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.setdefault(schedule_id, set()).add((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, schedule_id: int, queue: asyncio.Queue):
+        with self._lock:
+            subs = self._subscribers.get(schedule_id)
+            if not subs:
+                return
+            for entry in [e for e in subs if e[1] is queue]:
+                subs.discard(entry)
+            if not subs:
+                del self._subscribers[schedule_id]
+
+    def subscriber_count(self, schedule_id: int | None = None) -> int:
+        with self._lock:
+            if schedule_id is not None:
+                return len(self._subscribers.get(schedule_id, ()))
+            return sum(len(s) for s in self._subscribers.values())
+
+    def publish(self, schedule_id: int, event: dict):
+        with self._lock:
+            subs = list(self._subscribers.get(schedule_id, ()))
+        for loop, queue in subs:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, event)
+            except RuntimeError:
+                self.unsubscribe(schedule_id, queue)
+
+
+def _offer(queue: asyncio.Queue, event: dict):
+    try:
+        queue.put_nowait(event)
+    except asyncio.QueueFull:
+        # A client that cannot keep up gets a fresh snapshot instead of the backlog.
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait({'type': 'resync'})
+
+
+broker = SeatEventBroker()
+
+
+def _seat_list(seats: Iterable[Tuple[int, int]]) -> List[List[int]]:
+    return [[int(r), int(c)] for r, c in seats]
+
+
+def publish_hold(schedule_id: int, row: int, col: int, expires: datetime):
+    broker.publish(schedule_id, {'type': 'hold', 'seats': [[row, col]], 'expires': expires.isoformat()})
+
+
+def publish_release(schedule_id: int, seats: Iterable[Tuple[int, int]]):
+    seats = _seat_list(seats)
+    if seats:
+        broker.publish(schedule_id, {'type': 'release', 'seats': seats})
+
+
+def publish_sold(schedule_id: int, seats: Iterable[Tuple[int, int]]):
+    seats = _seat_list(seats)
+    if seats:
+        broker.publish(schedule_id, {'type': 'sold', 'seats': seats})
+
+
+def publish_unsold(schedule_id: int, seats: Iterable[Tuple[int, int]]):
+    seats = _seat_list(seats)
+    if seats:
+        broker.publish(schedule_id, {'type': 'unsold', 'seats': seats})
+
+
+def _format(event: dict) -> str:
+    kind = event.get('type', 'message')
+    payload = {k: v for k, v in event.items() if k != 'type'}
+    return f"event: {kind}\ndata: {json.dumps(payload)}\n\n"
+
+
+async def stream(schedule_id: int, request, snapshot_fn):
+    # snapshot_fn(schedule_id) is blocking and returns {'held': [...], 'sold': [...]}.
+    # Events are only published within this process, so with the shared
+    # database hold store the snapshot is re-sent periodically to pick up
+    # changes made on other workers.
+    queue = broker.subscribe(schedule_id)
+    loop = asyncio.get_running_loop()
+    resync_every = SEAT_EVENTS_RESYNC_SECONDS if SEAT_HOLD_BACKEND == 'database' else None
+    try:
+        yield 'retry: 3000\n\n'
+        snapshot = await asyncio.to_thread(snapshot_fn, schedule_id)
+        yield _format({'type': 'snapshot', **snapshot})
+        last_snapshot = loop.time()
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=SEAT_EVENTS_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                event = None
+            if await request.is_disconnected():
+                break
+            resync_due = resync_every is not None and loop.time() - last_snapshot >= resync_every
+            if (event is not None and event.get('type') == 'resync') or resync_due:
+                snapshot = await asyncio.to_thread(snapshot_fn, schedule_id)
+                yield _format({'type': 'snapshot', **snapshot})
+                last_snapshot = loop.time()
+            elif event is not None:
+                yield _format(event)
+            else:
+                yield ': keepalive\n\n'
+    finally:
+        broker.unsubscribe(schedule_id, queue)
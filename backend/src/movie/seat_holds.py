@@ -0,0 +1,237 @@
+import asyncio
+import heapq
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from threading import Lock
+from typing import Dict, List, Tuple
+from sqlalchemy import text, delete, select, tuple_
+from database import engine
+from schemas import SeatHold
+from config import SEAT_HOLD_BACKEND
+from movie import seat_events
+
+MAX_PENDING_EXPIRED = 10000
+
+
+class SeatHoldStore(ABC):
+    @abstractmethod
+    def hold(self, schedule_id: int, row: int, col: int, expiry: datetime, now: datetime) -> Tuple[bool, datetime]:
+        ...
+
+    @abstractmethod
+    def held(self, schedule_id: int, now: datetime) -> List[Tuple[int, int]]:
+        ...
+
+    @abstractmethod
+    def release(self, schedule_id: int, row: int, col: int) -> bool:
+        ...
+
+    @abstractmethod
+    def release_many(self, schedule_id: int, seats: List[Tuple[int, int]]) -> int:
+        ...
+
+    @abstractmethod
+    def sweep(self, now: datetime) -> List[Tuple[int, int, int]]:
+        ...
+
+    @abstractmethod
+    def live_count(self, now: datetime) -> int:
+        ...
+
+
+class InMemorySeatHoldStore(SeatHoldStore):
+    def __init__(self):
+        self._holds: Dict[int, Dict[Tuple[int, int], datetime]] = {}
+        # min-heap of (expiry, schedule_id, row, col); entries whose seat was
+        # released or re-held are stale and skipped when popped
+        self._expiry_heap: List[Tuple[datetime, int, int, int]] = []
+        self._live = 0
+        # expired (schedule_id, row, col) not yet reported by sweep()
+        self._expired: List[Tuple[int, int, int]] = []
+        self._lock = Lock()
+
+    def _drop(self, schedule_id: int, seats: Dict[Tuple[int, int], datetime], key: Tuple[int, int]):
+        del seats[key]
+        self._live -= 1
+        if not seats:
+            del self._holds[schedule_id]
+
+    def _expire(self, now: datetime):
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= now:
+            expiry, schedule_id, row, col = heapq.heappop(heap)
+            seats = self._holds.get(schedule_id)
+            if seats is not None and seats.get((row, col)) == expiry:
+                self._drop(schedule_id, seats, (row, col))
+                if len(self._expired) < MAX_PENDING_EXPIRED:
+                    self._expired.append((schedule_id, row, col))
+
+    def hold(self, schedule_id, row, col, expiry, now):
+        with self._lock:
+            self._expire(now)
+            seats = self._holds.setdefault(schedule_id, {})
+            current = seats.get((row, col))
+            if current is not None:
+                return False, current
+            seats[(row, col)] = expiry
+            self._live += 1
+            heapq.heappush(self._expiry_heap, (expiry, schedule_id, row, col))
+            return True, expiry
+
+    def held(self, schedule_id, now):
+        with self._lock:
+            self._expire(now)
+            return list(self._holds.get(schedule_id, {}).keys())
+
+    def release(self, schedule_id, row, col):
+        with self._lock:
+            seats = self._holds.get(schedule_id)
+            if not seats or (row, col) not in seats:
+                return False
+            self._drop(schedule_id, seats, (row, col))
+            return True
+
+    def release_many(self, schedule_id, seats):
+        with self._lock:
+            schedule_map = self._holds.get(schedule_id)
+            if not schedule_map:
+                return 0
+            count = 0
+            for row, col in seats:
+                if (row, col) in schedule_map:
+                    self._drop(schedule_id, schedule_map, (row, col))
+                    count += 1
+            return count
+
+    def sweep(self, now):
+        with self._lock:
+            self._expire(now)
+            expired, self._expired = self._expired, []
+            return expired
+
+    def live_count(self, now):
+        with self._lock:
+            self._expire(now)
+            return self._live
+
+
+class DatabaseSeatHoldStore(SeatHoldStore):
+    # Shared across workers: a hold is taken by an upsert that only overwrites
+    # an expired row, so the check-and-set happens atomically in the database.
+    def __init__(self, bind=engine):
+        self._engine = bind
+
+    def hold(self, schedule_id, row, col, expiry, now):
+        params = {'sid': schedule_id, 'r': row, 'c': col, 'exp': expiry, 'now': now}
+        with self._engine.begin() as conn:
+            won = conn.execute(text(
+                """
+                INSERT INTO seat_holds (schedule_id, row_index, col_index, expires_at)
+                VALUES (:sid, :r, :c, :exp)
+                ON CONFLICT (schedule_id, row_index, col_index)
+                DO UPDATE SET expires_at = EXCLUDED.expires_at
+                WHERE seat_holds.expires_at <= :now
+                RETURNING expires_at
+                """
+            ), params).first()
+            if won is not None:
+                return True, expiry
+            current = conn.execute(select(SeatHold.expires_at).where(
+                SeatHold.schedule_id == schedule_id, SeatHold.row_index == row, SeatHold.col_index == col,
+            )).scalar()
+        return False, current
+
+    def held(self, schedule_id, now):
+        with self._engine.connect() as conn:
+            rows = conn.execute(text(
+                "SELECT row_index, col_index FROM seat_holds WHERE schedule_id = :sid AND expires_at > :now"
+            ), {'sid': schedule_id, 'now': now}).all()
+        return [(int(r), int(c)) for r, c in rows]
+
+    def release(self, schedule_id, row, col):
+        with self._engine.begin() as conn:
+            res = conn.execute(text(
+                "DELETE FROM seat_holds WHERE schedule_id = :sid AND row_index = :r AND col_index = :c"
+            ), {'sid': schedule_id, 'r': row, 'c': col})
+        return res.rowcount > 0
+
+    def release_many(self, schedule_id, seats):
+        pairs = [(int(r), int(c)) for r, c in seats]
+        if not pairs:
+            return 0
+        stmt = delete(SeatHold).where(
+            SeatHold.schedule_id == schedule_id,
+            tuple_(SeatHold.row_index, SeatHold.col_index).in_(pairs),
+        )
+        with self._engine.begin() as conn:
+            res = conn.execute(stmt)
+        return max(res.rowcount, 0)
+
+    def sweep(self, now):
+        with self._engine.begin() as conn:
+            rows = conn.execute(text(
+                "DELETE FROM seat_holds WHERE expires_at <= :now RETURNING schedule_id, row_index, col_index"
+            ), {'now': now}).all()
+        return [(int(sid), int(r), int(c)) for sid, r, c in rows]
+
+    def live_count(self, now):
+        with self._engine.connect() as conn:
+            return int(conn.execute(text(
+                "SELECT count(*) FROM seat_holds WHERE expires_at > :now"
+            ), {'now': now}).scalar() or 0)
+
+
+def _create_store() -> SeatHoldStore:
+    if SEAT_HOLD_BACKEND == 'database':
+        return DatabaseSeatHoldStore()
+    return InMemorySeatHoldStore()
+
+
+store: SeatHoldStore = _create_store()
+
+sweep_stats = {
+    'sweeps': 0,
+    'expired_total': 0,
+    'last_expired': 0,
+    'last_sweep_ms': None,
+    'max_sweep_ms': None,
+    'last_sweep_at': None,
+}
+
+
+def sweep_expired() -> int:
+    started = time.perf_counter()
+    expired = store.sweep(datetime.utcnow())
+    removed = len(expired)
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 3)
+    sweep_stats['sweeps'] += 1
+    sweep_stats['expired_total'] += removed
+    sweep_stats['last_expired'] = removed
+    sweep_stats['last_sweep_ms'] = elapsed_ms
+    sweep_stats['max_sweep_ms'] = max(sweep_stats['max_sweep_ms'] or 0.0, elapsed_ms)
+    sweep_stats['last_sweep_at'] = datetime.utcnow()
+    by_schedule: Dict[int, List[Tuple[int, int]]] = {}
+    for schedule_id, row, col in expired:
+        by_schedule.setdefault(schedule_id, []).append((row, col))
+    for schedule_id, seats in by_schedule.items():
+        seat_events.publish_release(schedule_id, seats)
+    return removed
+
+
+async def run_sweeper(interval_seconds: float):
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await asyncio.to_thread(sweep_expired)
+        except Exception:
+            pass
+
+
+def metrics() -> dict:
+    return {
+        'backend': SEAT_HOLD_BACKEND,
+        'live_holds': store.live_count(datetime.utcnow()),
+        'stream_subscribers': seat_events.broker.subscriber_count(),
+        **sweep_stats,
+    }
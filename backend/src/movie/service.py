@@ -1,12 +1,18 @@
-from sqlalchemy.orm import Session
+import base64
+from sqlalchemy.orm import Session, joinedload, selectinload, noload
 from schemas import Movie, Schedule, Ticket, TicketSeat, Category
 from movie.schemas import MovieCreate, MovieUpdate, ScheduleCreate, ScheduleUpdate
 from datetime import datetime, timedelta, date
 from typing import List, Tuple, Set
-from sqlalchemy import func
-from schemas import Review
-
-blocked_seats = {}
+from sqlalchemy import update, tuple_, select
+from config import SEAT_HOLD_SECONDS
+from movie.seat_holds import store as seat_hold_store
+from movie import occupancy
+from movie import ratings
+from user import recommendations
+from admin import sales_rollup
+from movie import seat_events
+import http_cache
 
 def get_categories(db: Session):
     return db.query(Category).order_by(Category.name.asc()).all()
@@ -20,24 +26,29 @@ def create_category(db: Session, name: str):
         return existing
     cat = Category(name=name)
     db.add(cat)
+    http_cache.bump(db, http_cache.MOVIES)
     db.commit()
     db.refresh(cat)
     return cat
 
-def get_movies(db: Session):
-    movies = db.query(Movie).all()
-    try:
-        avgs = (
-            db.query(Review.movie_id, func.avg(Review.rating))
-            .group_by(Review.movie_id)
-            .all()
-        )
-        avg_map = {mid: float(avg) if avg is not None else None for mid, avg in avgs}
-        for m in movies:
-            if m.id in avg_map:
-                m.rating = round(avg_map[m.id], 1) if avg_map[m.id] is not None else None
-    except Exception:
-        pass
+def movies_statement(with_schedules: bool = False, schedules_from: date | None = None):
+    stmt = select(Movie)
+    if with_schedules:
+        sched = Movie.schedules
+        if schedules_from is not None:
+            sched = sched.and_(Schedule.date >= schedules_from)
+        return stmt.options(selectinload(sched))
+    return stmt.options(noload(Movie.schedules))
+
+def expose_schedules(movies):
+    for m in movies:
+        m.listed_schedules = m.schedules
+
+def get_movies(db: Session, with_schedules: bool = False, schedules_from: date | None = None):
+    movies = db.execute(movies_statement(with_schedules, schedules_from)).unique().scalars().all()
+    ratings.expose(movies)
+    if with_schedules:
+        expose_schedules(movies)
     return movies
 
 
@@ -45,12 +56,7 @@ def get_movie_by_id(db: Session, movie_id: int):
     m = db.query(Movie).filter(Movie.id == movie_id).first()
     if not m:
         return None
-    try:
-        avg = db.query(func.avg(Review.rating)).filter(Review.movie_id == movie_id).scalar()
-        if avg is not None:
-            m.rating = round(float(avg), 1)
-    except Exception:
-        pass
+    ratings.expose([m])
     return m
 
 def create_movie(db: Session, movie: MovieCreate):
@@ -61,7 +67,9 @@ def create_movie(db: Session, movie: MovieCreate):
     if cat_ids:
         cats = db.query(Category).filter(Category.id.in_(cat_ids)).all()
         db_movie.categories = cats[:3]
+    http_cache.bump(db, http_cache.MOVIES)
     db.commit()
+    recommendations.invalidate()
     db.refresh(db_movie)
     return db_movie
 
@@ -77,7 +85,9 @@ def update_movie(db: Session, db_movie: Movie, payload: MovieUpdate):
         else:
             db_movie.categories = []
     db.add(db_movie)
+    http_cache.bump(db, http_cache.MOVIES)
     db.commit()
+    recommendations.invalidate()
     db.refresh(db_movie)
     return db_movie
 
@@ -90,6 +100,7 @@ def create_schedule(db: Session, schedule: ScheduleCreate):
         raise ValueError("Nie można dodać seansu dla filmu, który ma przyszłą datę premiery")
     db_schedule = Schedule(**schedule.dict())
     db.add(db_schedule)
+    http_cache.bump(db, http_cache.SCHEDULES)
     db.commit()
     db.refresh(db_schedule)
     return db_schedule
@@ -98,11 +109,59 @@ def delete_schedule(db: Session, schedule_id: int) -> None:
     sched = db.query(Schedule).filter(Schedule.id == schedule_id).first()
     if not sched:
         return
+    sales_rollup.drop_schedules(db, [schedule_id])
     db.delete(sched)
+    http_cache.bump(db, http_cache.SCHEDULES)
     db.commit()
+    recommendations.invalidate()
+    occupancy.invalidate(schedule_id)
 
 def get_all_schedules(db: Session):
-    return db.query(Schedule).all()
+    return db.query(Schedule).options(joinedload(Schedule.movie)).all()
+
+REPERTOIRE_MAX_LIMIT = 500
+REPERTOIRE_MAX_DAYS = 62
+
+def _encode_schedule_cursor(s: Schedule) -> str:
+    raw = f"{s.date.isoformat()}|{s.time}|{s.id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+def _decode_schedule_cursor(cursor: str) -> Tuple[date, str, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        d, t, i = raw.split('|')
+        return date.fromisoformat(d), t, int(i)
+    except Exception:
+        raise ValueError("Nieprawidłowy kursor")
+
+def repertoire_statement(date_from: date, date_to: date, hall: int | None = None,
+                         movie_id: int | None = None, limit: int = 100, cursor: str | None = None):
+    if date_to < date_from:
+        raise ValueError("date_to nie może być wcześniejsza niż date_from")
+    if (date_to - date_from).days > REPERTOIRE_MAX_DAYS:
+        raise ValueError(f"Maksymalny zakres to {REPERTOIRE_MAX_DAYS} dni")
+    stmt = (
+        select(Schedule)
+        .options(joinedload(Schedule.movie))
+        .where(Schedule.date >= date_from, Schedule.date <= date_to)
+    )
+    if hall is not None:
+        stmt = stmt.where(Schedule.hall == hall)
+    if movie_id is not None:
+        stmt = stmt.where(Schedule.movie_id == movie_id)
+    if cursor:
+        stmt = stmt.where(tuple_(Schedule.date, Schedule.time, Schedule.id) > _decode_schedule_cursor(cursor))
+    return stmt.order_by(Schedule.date.asc(), Schedule.time.asc(), Schedule.id.asc()).limit(limit + 1)
+
+def repertoire_page(rows, limit: int):
+    next_cursor = _encode_schedule_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+def get_repertoire(db: Session, date_from: date, date_to: date, hall: int | None = None,
+                   movie_id: int | None = None, limit: int = 100, cursor: str | None = None):
+    limit = max(1, min(limit, REPERTOIRE_MAX_LIMIT))
+    stmt = repertoire_statement(date_from, date_to, hall, movie_id, limit, cursor)
+    return repertoire_page(db.execute(stmt).unique().scalars().all(), limit)
 
 def get_schedule(db: Session, schedule_id: int):
     return db.query(Schedule).filter(Schedule.id == schedule_id).first()
@@ -125,48 +184,91 @@ def _row_label_to_index(label: str) -> int | None:
     return idx
 
 
-def _get_sold_seats_from_db(db: Session, schedule_id: int) -> Set[Tuple[int, int]]:
+def _seat_position(r_idx, c_idx, r_label, seat_num, seat_txt) -> Tuple[int, int] | None:
+    r = r_idx
+    c = c_idx
+    if r is None and r_label:
+        r = _row_label_to_index(r_label)
+    if c is None and seat_num is not None:
+        try:
+            c = int(seat_num) - 1
+        except Exception:
+            c = None
+    if (r is None or c is None) and seat_txt:
+        try:
+            parts = str(seat_txt).split('-')
+            if len(parts) >= 2:
+                r_guess = _row_label_to_index(parts[0])
+                c_guess = int(parts[1]) - 1
+                r = r if r is not None else r_guess
+                c = c if c is not None else c_guess
+        except Exception:
+            pass
+    if r is None or c is None:
+        return None
+    return int(r), int(c)
+
+
+def seat_positions(seats) -> List[Tuple[int, int]]:
+    out = []
+    for s in seats:
+        if isinstance(s, dict):
+            pos = _seat_position(s.get('row_index'), s.get('col_index'), s.get('row_label'), s.get('seat_number'), s.get('seat'))
+        else:
+            pos = _seat_position(s.row_index, s.col_index, s.row_label, s.seat_number, s.seat)
+        if pos is not None:
+            out.append(pos)
+    return out
+
+
+def sold_seats_statement(schedule_id: int):
+    return select(
+        TicketSeat.row_index,
+        TicketSeat.col_index,
+        TicketSeat.row_label,
+        TicketSeat.seat_number,
+        TicketSeat.seat,
+    ).where(TicketSeat.schedule_id == schedule_id)
+
+
+def sold_seat_positions(rows) -> Set[Tuple[int, int]]:
     sold: Set[Tuple[int, int]] = set()
-    try:
-        rows = (
-            db.query(
-                TicketSeat.row_index,
-                TicketSeat.col_index,
-                TicketSeat.row_label,
-                TicketSeat.seat_number,
-                TicketSeat.seat,
-            )
-            .join(Ticket, TicketSeat.ticket_id == Ticket.id)
-            .filter(Ticket.schedule_id == schedule_id)
-            .all()
-        )
-        for r_idx, c_idx, r_label, seat_num, seat_txt in rows:
-            r = r_idx
-            c = c_idx
-            if r is None and r_label:
-                r = _row_label_to_index(r_label)
-            if c is None and seat_num is not None:
-                try:
-                    c = int(seat_num) - 1
-                except Exception:
-                    c = None
-            if (r is None or c is None) and seat_txt:
-                try:
-                    parts = str(seat_txt).split('-')
-                    if len(parts) >= 2:
-                        r_guess = _row_label_to_index(parts[0])
-                        c_guess = int(parts[1]) - 1
-                        r = r if r is not None else r_guess
-                        c = c if c is not None else c_guess
-                except Exception:
-                    pass
-            if r is not None and c is not None:
-                sold.add((int(r), int(c)))
-    except Exception:
-        return sold
+    for row in rows:
+        pos = _seat_position(*row)
+        if pos is not None:
+            sold.add(pos)
     return sold
 
 
+def _get_sold_seats_from_db(db: Session, schedule_id: int) -> Set[Tuple[int, int]]:
+    # errors propagate: an empty result here would be cached as "nothing
+    # sold" until the next sale bumps seat_version
+    return sold_seat_positions(db.execute(sold_seats_statement(schedule_id)).all())
+
+
+def get_sold_seats(db: Session, schedule_id: int) -> occupancy.SeatOccupancy:
+    # The version is read before the seats so a concurrent sale can only make
+    # the cached copy look older than it is, never newer.
+    version = db.query(Schedule.seat_version).filter(Schedule.id == schedule_id).scalar()
+    if version is None:
+        return occupancy.SeatOccupancy(0)
+    cached = occupancy.get(schedule_id, version)
+    if cached is not None:
+        return cached
+    return occupancy.put(schedule_id, occupancy.SeatOccupancy(version, _get_sold_seats_from_db(db, schedule_id)))
+
+
+def bump_seat_version(db: Session, schedule_id: int) -> int | None:
+    stmt = (
+        update(Schedule)
+        .where(Schedule.id == schedule_id)
+        .values(seat_version=Schedule.seat_version + 1)
+        .returning(Schedule.seat_version)
+        .execution_options(synchronize_session=False)
+    )
+    return db.execute(stmt).scalar()
+
+
 def update_schedule(db: Session, schedule: Schedule, payload: ScheduleUpdate):
     changed = False
     if payload.date is not None:
@@ -179,10 +281,13 @@ def update_schedule(db: Session, schedule: Schedule, payload: ScheduleUpdate):
         schedule.movie_type = payload.movie_type
         changed = True
     if payload.hall is not None:
+        if payload.hall != schedule.hall:
+            sales_rollup.move_schedule_hall(db, schedule.id, payload.hall)
         schedule.hall = payload.hall
         changed = True
     if changed:
         db.add(schedule)
+        http_cache.bump(db, http_cache.SCHEDULES)
         db.commit()
         db.refresh(schedule)
     return schedule
@@ -190,58 +295,52 @@ def update_schedule(db: Session, schedule: Schedule, payload: ScheduleUpdate):
 
 def block_seat(db: Session, schedule_id: int, row: int, col: int):
     try:
-        sold = _get_sold_seats_from_db(db, schedule_id)
+        sold = get_sold_seats(db, schedule_id)
         if (row, col) in sold:
             return False, 'sold'
     except Exception:
         pass
 
     now = datetime.utcnow()
-    expiry = now + timedelta(minutes=2)
-    if schedule_id not in blocked_seats:
-        blocked_seats[schedule_id] = {}
-    seat_block = blocked_seats[schedule_id].get((row, col))
-    if seat_block and seat_block > now:
-        return False, seat_block
-    blocked_seats[schedule_id][(row, col)] = expiry
-    return True, expiry
+    expiry = now + timedelta(seconds=SEAT_HOLD_SECONDS)
+    success, info = seat_hold_store.hold(schedule_id, row, col, expiry, now)
+    if success:
+        seat_events.publish_hold(schedule_id, row, col, info)
+    return success, info
 
 
 def get_blocked_seats(db: Session, schedule_id: int):
-    now = datetime.utcnow()
-    seats = blocked_seats.get(schedule_id, {})
-    seats = {k: v for k, v in seats.items() if v > now}
-    blocked_seats[schedule_id] = seats
-    temp_blocked = set(seats.keys())
+    temp_blocked = set(seat_hold_store.held(schedule_id, datetime.utcnow()))
 
-    sold = _get_sold_seats_from_db(db, schedule_id)
-    merged = temp_blocked.union(sold)
+    sold = get_sold_seats(db, schedule_id)
+    merged = temp_blocked.union(sold.seats())
     return list(merged)
 
 
+def seat_snapshot(db: Session, schedule_id: int):
+    held = seat_hold_store.held(schedule_id, datetime.utcnow())
+    sold = get_sold_seats(db, schedule_id)
+    return {
+        'held': [[r, c] for r, c in held],
+        'sold': [[r, c] for r, c in sold.seats()],
+    }
+
+
 def release_seat(schedule_id: int, row: int, col: int):
     try:
-        schedule_map = blocked_seats.get(schedule_id)
-        if not schedule_map:
-            return False
-        if (row, col) in schedule_map:
-            del schedule_map[(row, col)]
-            return True
-        return False
+        released = seat_hold_store.release(schedule_id, row, col)
     except Exception:
         return False
+    if released:
+        seat_events.publish_release(schedule_id, [(row, col)])
+    return released
 
 
 def release_seats(schedule_id: int, seats: List[Tuple[int, int]]):
-    schedule_map = blocked_seats.get(schedule_id)
-    if not schedule_map:
-        return 0
-    count = 0
-    for row, col in seats:
-        if (row, col) in schedule_map:
-            del schedule_map[(row, col)]
-            count += 1
-    return count
+    released = seat_hold_store.release_many(schedule_id, seats)
+    if released:
+        seat_events.publish_release(schedule_id, seats)
+    return released
 
 
 def delete_movie(db: Session, movie_id: int) -> None:
@@ -252,8 +351,13 @@ def delete_movie(db: Session, movie_id: int) -> None:
             db.delete(t)  
         db.delete(sched)
 
+    sales_rollup.drop_schedules(db, [sched.id for sched in schedules])
     movie = db.query(Movie).filter(Movie.id == movie_id).first()
     if movie:
         db.delete(movie)
 
-    db.commit()
\ No newline at end of file
+    http_cache.bump(db, http_cache.MOVIES, http_cache.SCHEDULES)
+    db.commit()
+    recommendations.invalidate()
+    for sched in schedules:
+        occupancy.invalidate(sched.id)
\ No newline at end of file
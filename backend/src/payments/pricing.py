@@ -0,0 +1,163 @@
+import math
+from dataclasses import dataclass, field
+from datetime import datetime, time
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from threading import Lock
+from typing import Any, Dict, List, Optional
+from zoneinfo import ZoneInfo
+from fastapi import HTTPException
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from config import PRICING_TIMEZONE
+from schemas import Schedule, TicketPrice
+import http_cache
+
+# Seat prices are decided here; the price a client sends is ignored. The
+# ticket_prices table is read once into a PriceMatrix and kept until its
+# cache_versions counter moves (admin_update_ticket_price bumps it, so every
+# worker notices within CACHE_VERSION_TTL_SECONDS) or invalidate() runs; when
+# the counters cannot be read the table is read on every call. The
+# rules are the ones the purchase page shows: the cheap Thursday price when
+# the show or the purchase falls on a Thursday, otherwise by whole days left
+# until the show.
+
+CHEAP_THURSDAY = 'cheap_thursday'
+THREE_DAYS_BEFORE = 'three_days_before'
+TWO_DAYS_BEFORE = 'two_days_before'
+ONE_DAY_BEFORE = 'one_day_before'
+SAME_DAY = 'same_day'
+RULES = (CHEAP_THURSDAY, THREE_DAYS_BEFORE, TWO_DAYS_BEFORE, ONE_DAY_BEFORE, SAME_DAY)
+
+CENT = Decimal('0.01')
+TZ = ZoneInfo(PRICING_TIMEZONE)
+
+
+@dataclass(frozen=True)
+class PriceMatrix:
+    # lower-cased ticket type -> rule -> price (None when the cell is not a number)
+    prices: Dict[str, Dict[str, Optional[Decimal]]]
+    # lower-cased ticket type -> type as stored, in table order
+    types: Dict[str, str]
+    version: Optional[int] = None
+
+    def price(self, ticket_type: str, rules: List[str]) -> Optional[Decimal]:
+        row = self.prices.get((ticket_type or '').strip().lower())
+        if row is None:
+            return None
+        for rule in rules:
+            if row.get(rule) is not None:
+                return row[rule]
+        return None
+
+
+@dataclass
+class Quote:
+    schedule_id: int
+    rules: List[str]
+    seats: List[Dict[str, Any]] = field(default_factory=list)
+    total: float = 0.0
+
+
+_matrix: Optional[PriceMatrix] = None
+_lock = Lock()
+
+
+def parse_price(raw: Any) -> Optional[Decimal]:
+    text = str(raw or '').lower().replace('zł', '').replace('pln', '').replace(',', '.').replace(' ', '')
+    try:
+        value = Decimal(text)
+    except InvalidOperation:
+        return None
+    if not value.is_finite() or value < 0:
+        return None
+    return value.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def _version() -> Optional[int]:
+    current = http_cache.versions()
+    return current.get(http_cache.TICKET_PRICES) if current is not None else None
+
+
+def load_matrix(db: Session, version: Optional[int] = None) -> PriceMatrix:
+    prices, types = {}, {}
+    for row in db.execute(select(TicketPrice).order_by(TicketPrice.id.asc())).scalars():
+        key = (row.type or '').strip().lower()
+        if not key or key in prices:
+            continue
+        types[key] = row.type
+        prices[key] = {rule: parse_price(getattr(row, rule)) for rule in RULES}
+    return PriceMatrix(prices=prices, types=types, version=version)
+
+
+def matrix(db: Session) -> PriceMatrix:
+    global _matrix
+    version = _version()
+    with _lock:
+        cached = _matrix
+    if cached is not None and version is not None and cached.version == version:
+        return cached
+    loaded = load_matrix(db, version)
+    with _lock:
+        _matrix = loaded
+    return loaded
+
+
+def _forget(*_):
+    global _matrix
+    with _lock:
+        _matrix = None
+
+
+def invalidate(db: Optional[Session] = None):
+    _forget()
+    if db is not None:
+        event.listen(db, 'after_commit', _forget, once=True)
+
+
+def show_start(schedule: Schedule) -> datetime:
+    hh, _, mm = (schedule.time or '00:00').partition(':')
+    try:
+        at = time(int(hh), int(mm[:2] or 0))
+    except ValueError:
+        at = time(0, 0)
+    return datetime.combine(schedule.date, at, tzinfo=TZ)
+
+
+def rules_for(show_at: datetime, now: datetime) -> List[str]:
+    # preferred rule first; a cell that does not parse falls through to the
+    # next one and finally to the same-day price
+    rules = []
+    if show_at.weekday() == 3 or now.weekday() == 3:
+        rules.append(CHEAP_THURSDAY)
+    days = math.floor((show_at - now).total_seconds() / 86400)
+    if days >= 3:
+        rules.append(THREE_DAYS_BEFORE)
+    elif days == 2:
+        rules.append(TWO_DAYS_BEFORE)
+    elif days == 1:
+        rules.append(ONE_DAY_BEFORE)
+    rules.append(SAME_DAY)
+    return rules
+
+
+def price_basket(db: Session, schedule_id: int, seats: List[Dict[str, Any]], now: Optional[datetime] = None) -> Quote:
+    schedule = db.get(Schedule, schedule_id)
+    if schedule is None:
+        raise HTTPException(status_code=404, detail="Seans nie istnieje")
+    prices = matrix(db)
+    if not prices.types:
+        raise HTTPException(status_code=503, detail="Cennik biletów jest niedostępny")
+    rules = rules_for(show_start(schedule), now or datetime.now(TZ))
+    default_type = next(iter(prices.types))
+
+    quote = Quote(schedule_id=schedule_id, rules=rules)
+    total = Decimal('0')
+    for seat in seats:
+        key = (seat.get('type') or default_type).strip().lower()
+        price = prices.price(key, rules)
+        if price is None:
+            raise HTTPException(status_code=400, detail=f"Nieznany rodzaj biletu: {seat.get('type')}")
+        total += price
+        quote.seats.append({**seat, 'type': prices.types[key], 'price': float(price)})
+    quote.total = float(total)
+    return quote
@@ -1,19 +1,31 @@
-from fastapi import APIRouter, Depends, Body, HTTPException
+from dataclasses import asdict
+from functools import partial
+from fastapi import APIRouter, Depends, Body, HTTPException, Response
 from sqlalchemy.orm import Session
 from get_db import get_db
-from payments import service
-from user.service import get_current_user, create_ticket as create_ticket_fn
+from payments import service, pricing
+from payments.schemas import QuoteRequest, CheckoutCreate
+from user.service import get_current_principal, create_ticket as create_ticket_fn
+import db_routing
 
 router = APIRouter()
 
+@router.post('/quote')
+def quote(payload: QuoteRequest, db: Session = Depends(get_db), current_user = Depends(get_current_principal)):
+    # the prices create-checkout-session will charge for these seats
+    seats = [seat.dict(exclude_none=True) for seat in payload.seats]
+    return asdict(pricing.price_basket(db, payload.schedule_id, seats))
+
 @router.post('/create-checkout-session')
-def create_checkout_session(payload: dict = Body(...), db: Session = Depends(get_db), current_user = Depends(get_current_user)):
-    return service.create_checkout_session(current_user.id, current_user.email, payload)
+def create_checkout_session(payload: CheckoutCreate, db: Session = Depends(get_db), current_user = Depends(get_current_principal)):
+    return service.create_checkout_session(db, current_user.id, current_user.email, payload.dict(exclude_none=True))
 
 @router.post('/confirm')
-def confirm_payment(payload: dict = Body(...), db: Session = Depends(get_db)):
+def confirm_payment(response: Response, payload: dict = Body(...), db: Session = Depends(get_db)):
     session_id = payload.get('session_id')
     if not session_id:
         raise HTTPException(status_code=400, detail='Brak session_id')
-    ticket = service.confirm_and_create_ticket(db, session_id, create_ticket_fn)
+    # seats carry the prices charged at checkout
+    ticket = service.confirm_and_create_ticket(db, session_id, partial(create_ticket_fn, reprice=False))
+    db_routing.mark_write(response, getattr(ticket, 'user_id', None))
     return ticket
@@ -0,0 +1,21 @@
+from pydantic import BaseModel
+from typing import Optional, List, Union
+
+class BasketSeat(BaseModel):
+    type: Optional[str] = None
+    seat: Optional[str] = None
+    row_index: Optional[int] = None
+    col_index: Optional[int] = None
+    row_label: Optional[str] = None
+    seat_number: Optional[int] = None
+    # ignored; payments.pricing prices every seat
+    price: Optional[float] = None
+
+class QuoteRequest(BaseModel):
+    schedule_id: int
+    seats: List[BasketSeat] = []
+
+class CheckoutCreate(QuoteRequest):
+    hall: Optional[Union[int, str]] = None
+    success_url: Optional[str] = None
+    cancel_url: Optional[str] = None
@@ -4,6 +4,8 @@ from typing import Any, Dict, List, Tuple
 from fastapi import HTTPException, status
 from config import SECRET_KEY, STRIPE_SECRET_KEY, FRONTEND_BASE_URL
 from sqlalchemy.orm import Session
+from user.qr import attach_ticket_qr
+from payments import pricing
 
 
 def _ensure_stripe_key():
@@ -96,22 +98,6 @@ def _decode_seats(seat_str: str) -> List[Dict[str, Any]]:
     return seats
 
 
-def _attach_qr_code(ticket):
-    try:
-        import pyqrcode
-        import base64
-        import io
-        code = getattr(ticket, 'ticket_code', None)
-        data_str = str(code) if code is not None else ''
-        qr = pyqrcode.create(data_str, error='M')
-        buf = io.BytesIO()
-        qr.png(buf, scale=4)
-        b64 = base64.b64encode(buf.getvalue()).decode('ascii')
-        setattr(ticket, 'qr_code_data_url', f"data:image/png;base64,{b64}")
-    except Exception:
-        setattr(ticket, 'qr_code_data_url', None)
-
-
 def _normalize_hall_value(h: Any) -> int | None:
     if h is None:
         return None
@@ -131,11 +117,13 @@ def _normalize_hall_value(h: Any) -> int | None:
         return None
 
 
-def create_checkout_session(user_id: int, user_email: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+def create_checkout_session(db: Session, user_id: int, user_email: str, payload: Dict[str, Any]) -> Dict[str, Any]:
     _ensure_stripe_key()
 
-    seats = payload.get('seats') or []
     schedule_id = payload.get('schedule_id')
+    if not schedule_id:
+        raise HTTPException(status_code=400, detail="Brak schedule_id")
+    seats = pricing.price_basket(db, int(schedule_id), payload.get('seats') or []).seats
     hall_raw = payload.get('hall')
     hall_num = _normalize_hall_value(hall_raw)
 
@@ -196,7 +184,7 @@ def confirm_and_create_ticket(db, session_id: str, create_ticket_fn):
         from schemas import Ticket
         existing = db.query(Ticket).filter(Ticket.stripe_session_id == session.id).first()
         if existing:
-            _attach_qr_code(existing)
+            attach_ticket_qr(existing, inline=True)
             return existing
     except Exception:
         pass
@@ -251,7 +239,7 @@ def confirm_and_create_ticket(db, session_id: str, create_ticket_fn):
             except Exception:
                 pass
 
-            _attach_qr_code(db_ticket)
+            attach_ticket_qr(db_ticket, inline=True)
             return db_ticket
     except Exception:
         pass
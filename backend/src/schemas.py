@@ -1,7 +1,7 @@
 from typing import List, Optional
 from datetime import date
 from pydantic import BaseModel
-from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, Table, DateTime
+from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, Table, DateTime, Index
 from sqlalchemy.orm import relationship, Mapped
 
 try:
@@ -37,6 +37,8 @@ class Movie(Base):
     genre = Column(String, nullable=False)
     duration = Column(String, nullable=False)
     rating = Column(Float, nullable=True)
+    rating_avg = Column(Float, nullable=True)
+    rating_count = Column(Integer, nullable=False, default=0, server_default='0')
     description = Column(String, nullable=True)
     image = Column(String, nullable=True)
     big_image = Column(String, nullable=True)
@@ -66,6 +68,9 @@ class Category(Base):
 
 class Schedule(Base):
     __tablename__ = 'schedules'
+    __table_args__ = (
+        Index('ix_schedules_date_hall', 'date', 'hall'),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     date = Column(Date, nullable=False)
@@ -73,6 +78,7 @@ class Schedule(Base):
     movie_type = Column(String, nullable=True) 
     movie_id = Column(Integer, ForeignKey('movies.id'))
     hall = Column(Integer, nullable=True)
+    seat_version = Column(Integer, nullable=False, default=0, server_default='0')
     seats: List[List[bool]] = []
 
     movie = relationship("Movie", back_populates="schedules")
@@ -90,9 +96,13 @@ class TicketPrice(Base):
 
 class TicketSeat(Base):
     __tablename__ = 'ticket_seats'
+    __table_args__ = (
+        Index('uq_ticket_seats_schedule_position', 'schedule_id', 'row_index', 'col_index', unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     ticket_id = Column(Integer, ForeignKey('tickets.id'), nullable=False)
+    schedule_id = Column(Integer, ForeignKey('schedules.id'), nullable=False)
     seat = Column(String, nullable=False)
     price = Column(Float, nullable=False)
     type = Column(String, nullable=False)
@@ -119,6 +129,32 @@ class Ticket(Base):
     schedule = relationship("Schedule")
     seats = relationship("TicketSeat", back_populates="ticket", cascade="all, delete-orphan")
 
+class SalesDaily(Base):
+    __tablename__ = 'sales_daily'
+
+    day = Column(Date, primary_key=True)
+    schedule_id = Column(Integer, ForeignKey('schedules.id', ondelete='CASCADE'), primary_key=True)
+    movie_id = Column(Integer, ForeignKey('movies.id', ondelete='CASCADE'), nullable=False, index=True)
+    hall = Column(Integer, nullable=True)
+    orders = Column(Integer, nullable=False, default=0, server_default='0')
+    seats = Column(Integer, nullable=False, default=0, server_default='0')
+    revenue = Column(Float, nullable=False, default=0.0, server_default='0')
+    seat_revenue = Column(Float, nullable=False, default=0.0, server_default='0')
+
+class CacheVersion(Base):
+    __tablename__ = 'cache_versions'
+
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0, server_default='0')
+
+class SeatHold(Base):
+    __tablename__ = 'seat_holds'
+
+    schedule_id = Column(Integer, ForeignKey('schedules.id', ondelete='CASCADE'), primary_key=True)
+    row_index = Column(Integer, primary_key=True)
+    col_index = Column(Integer, primary_key=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
 class Slide(Base):
     __tablename__ = 'slides'
 
@@ -0,0 +1,12 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from get_db import get_async_db
+from user import async_service
+from user.schemas import TicketResponse
+from user.principal import Principal
+
+router = APIRouter()
+
+@router.get("/tickets", response_model=list[TicketResponse])
+async def get_my_tickets(db: AsyncSession = Depends(get_async_db), current_user: Principal = Depends(async_service.get_current_principal)):
+    return await async_service.get_user_tickets(db, current_user.id)
@@ -0,0 +1,57 @@
+from fastapi import Depends, HTTPException, status
+from jose import JWTError, jwt
+from jose.exceptions import ExpiredSignatureError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from config import SECRET_KEY, ALGORITHM
+from get_db import get_async_db
+from schemas import User, Ticket, Schedule
+from user import principal as principal_cache
+from user.principal import Principal
+from user.qr import attach_ticket_qr
+from user.service import oauth2_scheme, principal_from_token
+
+
+async def _principal_for_subject(db: AsyncSession, email: str) -> Principal | None:
+    cached = principal_cache.get(email)
+    if cached is not None:
+        return cached
+    user = (await db.execute(select(User).where(User.email == email))).scalars().first()
+    if user is None:
+        return None
+    return principal_cache.put(principal_cache.from_user(user))
+
+
+async def get_current_principal(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> Principal:
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except ExpiredSignatureError:
+        raise HTTPException(status_code=401, detail="Token expired")
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    email = payload.get("sub")
+    principal = None
+    if email is not None:
+        principal = principal_from_token(payload) or await _principal_for_subject(db, email)
+    if principal is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found"
+        )
+    return principal
+
+
+async def get_user_tickets(db: AsyncSession, user_id: int):
+    stmt = (
+        select(Ticket)
+        .where(Ticket.user_id == user_id)
+        .options(
+            selectinload(Ticket.seats),
+            selectinload(Ticket.schedule).selectinload(Schedule.movie),
+        )
+    )
+    tickets = (await db.execute(stmt)).scalars().all()
+    for t in tickets:
+        attach_ticket_qr(t)
+    return tickets
@@ -0,0 +1,112 @@
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from threading import BoundedSemaphore, Lock
+from typing import Optional
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from config import PASSWORD_HASH_EXECUTOR, PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE
+
+# bcrypt is deliberately slow; running it on the request threadpool lets a
+# burst of logins occupy every worker thread. Hashing goes through a small
+# dedicated pool instead, and callers beyond workers + queue get a 429 at
+# once rather than waiting in line behind everyone else.
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify(password: str, hashed: str) -> bool:
+    return pwd_context.verify(password, hashed)
+
+
+class PasswordHasher:
+    def __init__(self, kind: str, workers: int, queue_size: int):
+        self.kind = kind
+        self.workers = max(1, workers)
+        self.queue_size = max(0, queue_size)
+        self._slots = BoundedSemaphore(self.workers + self.queue_size)
+        self._executor: Optional[Executor] = None
+        self._lock = Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.last_wait_ms: Optional[float] = None
+        self.max_wait_ms: Optional[float] = None
+
+    def _get_executor(self) -> Executor:
+        # Created on first use so process workers are not forked at import
+        # time (e.g. in the uvicorn reloader or Alembic).
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.kind == 'process':
+                        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                    else:
+                        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='bcrypt')
+        return self._executor
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HTTPException(
+                status_code=429,
+                detail="Serwer jest chwilowo przeciążony. Spróbuj ponownie za chwilę.",
+                headers={"Retry-After": "1"},
+            )
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        started = time.perf_counter()
+        try:
+            return self._get_executor().submit(fn, *args).result()
+        finally:
+            elapsed_ms = round((time.perf_counter() - started) * 1000, 3)
+            with self._lock:
+                self.in_flight -= 1
+                self.completed += 1
+                self.last_wait_ms = elapsed_ms
+                self.max_wait_ms = max(self.max_wait_ms or 0.0, elapsed_ms)
+            self._slots.release()
+
+    def hash(self, password: str) -> str:
+        return self._run(_hash, password)
+
+    def verify(self, password: str, hashed: str) -> bool:
+        return self._run(_verify, password, hashed)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                'executor': self.kind,
+                'workers': self.workers,
+                'queue_limit': self.queue_size,
+                'in_flight': self.in_flight,
+                'queued': max(0, self.in_flight - self.workers),
+                'max_in_flight': self.max_in_flight,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'last_wait_ms': self.last_wait_ms,
+                'max_wait_ms': self.max_wait_ms,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+hasher = PasswordHasher(PASSWORD_HASH_EXECUTOR, PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE)
+
+
+def hash_password(password: str) -> str:
+    return hasher.hash(password)
+
+
+def verify_password(password: str, hashed: str) -> bool:
+    return hasher.verify(password, hashed)
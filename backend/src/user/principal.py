@@ -0,0 +1,83 @@
+import time
+from dataclasses import dataclass
+from threading import Lock
+from typing import Dict, Optional, Tuple
+from config import PRINCIPAL_CACHE_SECONDS, PRINCIPAL_CACHE_SIZE, ACCESS_TOKEN_EXPIRE_MINUTES
+
+# Authorization only needs who the caller is and whether they are an admin.
+# Tokens carry both (uid / is_admin claims), so a request is authorized
+# without touching the database unless the account changed after the token
+# was issued; in that case the user is re-read once and cached briefly.
+
+
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    email: str
+    is_admin: int
+
+
+_cache: Dict[str, Tuple[Principal, float]] = {}
+# subject -> wall-clock time of the last change; tokens issued before it
+# cannot be trusted for their claims any more
+_changed_at: Dict[str, float] = {}
+_lock = Lock()
+
+
+def get(subject: str) -> Optional[Principal]:
+    if PRINCIPAL_CACHE_SECONDS <= 0:
+        return None
+    with _lock:
+        hit = _cache.get(subject)
+        if hit is None:
+            return None
+        principal, expires = hit
+        if expires <= time.monotonic():
+            del _cache[subject]
+            return None
+        return principal
+
+
+def put(principal: Principal) -> Principal:
+    if PRINCIPAL_CACHE_SECONDS <= 0:
+        return principal
+    with _lock:
+        if len(_cache) >= PRINCIPAL_CACHE_SIZE:
+            now = time.monotonic()
+            for key in [k for k, (_, exp) in _cache.items() if exp <= now]:
+                del _cache[key]
+            while len(_cache) >= PRINCIPAL_CACHE_SIZE:
+                del _cache[next(iter(_cache))]
+        _cache[principal.email] = (principal, time.monotonic() + PRINCIPAL_CACHE_SECONDS)
+    return principal
+
+
+def from_claims(payload: dict) -> Optional[Principal]:
+    subject = payload.get('sub')
+    uid = payload.get('uid')
+    is_admin = payload.get('is_admin')
+    issued_at = payload.get('iat')
+    if not subject or uid is None or is_admin is None or issued_at is None:
+        return None
+    with _lock:
+        changed = _changed_at.get(subject)
+    if changed is not None and issued_at <= changed:
+        return None
+    return Principal(id=int(uid), email=subject, is_admin=int(is_admin or 0))
+
+
+def from_user(user) -> Principal:
+    return Principal(id=user.id, email=user.email, is_admin=int(user.is_admin or 0))
+
+
+def invalidate(*subjects: Optional[str]):
+    now = time.time()
+    horizon = now - ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    with _lock:
+        for key in [k for k, ts in _changed_at.items() if ts < horizon]:
+            del _changed_at[key]
+        for subject in subjects:
+            if not subject:
+                continue
+            _cache.pop(subject, None)
+            _changed_at[subject] = now
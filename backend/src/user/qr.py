@@ -0,0 +1,101 @@
+import base64
+import hashlib
+import io
+import os
+from collections import OrderedDict
+from threading import Lock
+from config import QR_CACHE_SIZE, QR_CACHE_DIR, API_ROOT_PATH
+try:
+    import pyqrcode
+except Exception:
+    pyqrcode = None
+
+CACHE_CONTROL = 'private, max-age=31536000, immutable'
+
+_cache: "OrderedDict[str, bytes]" = OrderedDict()
+_lock = Lock()
+
+
+def cache_key(data: str) -> str:
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+def _disk_path(key: str) -> str | None:
+    if not QR_CACHE_DIR:
+        return None
+    return os.path.join(QR_CACHE_DIR, key[:2], f"{key}.png")
+
+
+def _render(data: str) -> bytes:
+    qr = pyqrcode.create(data, error='M')
+    buf = io.BytesIO()
+    qr.png(buf, scale=4)
+    return buf.getvalue()
+
+
+def _read_disk(path: str | None) -> bytes | None:
+    if not path or not os.path.isfile(path):
+        return None
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _write_disk(path: str | None, png: bytes):
+    if not path:
+        return
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(png)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def render_png(data: str) -> bytes | None:
+    if pyqrcode is None:
+        return None
+    key = cache_key(data)
+    with _lock:
+        png = _cache.get(key)
+        if png is not None:
+            _cache.move_to_end(key)
+            return png
+    path = _disk_path(key)
+    png = _read_disk(path)
+    if png is None:
+        png = _render(data)
+        _write_disk(path, png)
+    with _lock:
+        _cache[key] = png
+        _cache.move_to_end(key)
+        while len(_cache) > QR_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return png
+
+
+def data_url(data: str) -> str | None:
+    png = render_png(data)
+    if png is None:
+        return None
+    return f"data:image/png;base64,{base64.b64encode(png).decode('ascii')}"
+
+
+def ticket_qr_url(ticket) -> str:
+    return f"{API_ROOT_PATH}/user/tickets/{ticket.id}/qr.png"
+
+
+def attach_ticket_qr(ticket, inline: bool = False):
+    code = getattr(ticket, 'ticket_code', None)
+    setattr(ticket, 'qr_code_url', ticket_qr_url(ticket))
+    if inline:
+        try:
+            setattr(ticket, 'qr_code_data_url', data_url(str(code) if code is not None else ''))
+        except Exception:
+            setattr(ticket, 'qr_code_data_url', None)
+    else:
+        setattr(ticket, 'qr_code_data_url', None)
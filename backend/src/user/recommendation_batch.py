@@ -0,0 +1,155 @@
+from dataclasses import dataclass
+from datetime import date
+from threading import Lock
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+from sqlalchemy.orm import Session
+from user import recommendations
+from user.recommendations import RecommendationIndex, UserProfile
+
+CHUNK_SIZE = 256
+
+
+@dataclass
+class MovieMatrix:
+    # Row i of every array describes index.movies in insertion (id) order, so
+    # a stable sort breaks full ties the same way the per-user ranker does.
+    index: RecommendationIndex
+    revision: int
+    entries: list
+    pos: Dict[int, int]
+    cat_pos: Dict[int, int]
+    membership: np.ndarray
+    avg: np.ndarray
+    has_rating: np.ndarray
+    pop: np.ndarray
+    title_rank: np.ndarray
+    premiere: np.ndarray
+    max_pop: int
+
+
+_matrix: Optional[MovieMatrix] = None
+_matrix_lock = Lock()
+
+
+def build_matrix(index: RecommendationIndex) -> MovieMatrix:
+    entries = list(index.movies.values())
+    pos = {e.id: i for i, e in enumerate(entries)}
+    cat_pos = {cid: j for j, cid in enumerate(sorted(index.by_category))}
+    membership = np.zeros((len(entries), len(cat_pos)), dtype=np.float64)
+    for i, e in enumerate(entries):
+        for cid in e.category_ids:
+            membership[i, cat_pos[cid]] = 1.0
+    titles = sorted({e.title for e in entries})
+    title_order = {t: k for k, t in enumerate(titles)}
+    return MovieMatrix(
+        index=index,
+        revision=index.revision,
+        entries=entries,
+        pos=pos,
+        cat_pos=cat_pos,
+        membership=membership,
+        avg=np.array([e.avg or 0.0 for e in entries], dtype=np.float64),
+        has_rating=np.array([1 if e.avg is not None else 0 for e in entries], dtype=np.int8),
+        pop=np.array([e.pop for e in entries], dtype=np.float64),
+        title_rank=np.array([title_order[e.title] for e in entries], dtype=np.int64),
+        premiere=np.array(
+            [e.premiere_date.toordinal() if e.premiere_date else 0 for e in entries], dtype=np.int64
+        ),
+        max_pop=index.max_pop,
+    )
+
+
+def _current_matrix(index: RecommendationIndex) -> MovieMatrix:
+    global _matrix
+    with _matrix_lock:
+        m = _matrix
+        if m is None or m.index is not index or m.revision != index.revision:
+            with recommendations._lock:
+                m = build_matrix(index)
+            _matrix = m
+        return m
+
+
+def score_users(matrix: MovieMatrix, profiles: List[UserProfile], today: date):
+    # Same formula as recommendations._rank, evaluated for a block of users:
+    # (users x categories) affinity @ (categories x movies) membership gives
+    # every user's category score for every movie in one product.
+    n_users, n_movies = len(profiles), len(matrix.entries)
+    affinity = np.zeros((n_users, len(matrix.cat_pos)), dtype=np.float64)
+    watched = np.zeros((n_users, n_movies), dtype=bool)
+    has_cats = np.zeros(n_users, dtype=bool)
+    for u, profile in enumerate(profiles):
+        has_cats[u] = bool(profile.cat_scores)
+        for cid, cnt in profile.cat_scores.items():
+            j = matrix.cat_pos.get(cid)
+            if j is not None:
+                affinity[u, j] = cnt
+        for mid in profile.watched:
+            i = matrix.pos.get(mid)
+            if i is not None:
+                watched[u, i] = True
+
+    released = matrix.premiere <= today.toordinal()
+    cat = affinity @ matrix.membership.T
+    candidates = np.where(has_cats[:, None], (cat > 0) & released, released)
+    no_available = ~(candidates & ~watched).any(axis=1)
+    candidates[no_available] = released
+
+    max_cat = np.where(released, cat, 0.0).max(axis=1, initial=0.0)
+    safe_max = np.where(max_cat > 0, max_cat, 1.0)
+    norm_cat = np.where((max_cat > 0)[:, None], cat / safe_max[:, None], 0.0)
+    norm_rating = matrix.avg / 5.0
+    norm_pop = matrix.pop / matrix.max_pop if matrix.max_pop > 0 else np.zeros(n_movies)
+    score = 0.6 * norm_cat + 0.3 * norm_rating + 0.1 * norm_pop
+    valid = candidates & ~watched
+    return score, valid
+
+
+def _top(matrix: MovieMatrix, score: np.ndarray, valid: np.ndarray, limit: int) -> List[List[int]]:
+    shape = score.shape
+    keys = (
+        np.broadcast_to(matrix.title_rank, shape),
+        np.broadcast_to(-matrix.pop, shape),
+        np.broadcast_to(-matrix.avg, shape),
+        -score,
+        np.broadcast_to(-matrix.has_rating, shape),
+        ~valid,
+    )
+    order = np.lexsort(keys, axis=-1)[:, :limit]
+    counts = np.minimum(valid.sum(axis=1), limit)
+    return [order[u, :counts[u]].tolist() for u in range(shape[0])]
+
+
+def rank_batch(index: RecommendationIndex, user_ids: Iterable[int], limit: int = 10,
+               today: date | None = None) -> Dict[int, List]:
+    today = today or date.today()
+    matrix = _current_matrix(index)
+    user_ids = list(user_ids)
+    out: Dict[int, List] = {}
+    anonymous = None
+    for start in range(0, len(user_ids), CHUNK_SIZE):
+        chunk = user_ids[start:start + CHUNK_SIZE]
+        with recommendations._lock:
+            profiles = [index.profiles.get(uid) or UserProfile() for uid in chunk]
+            score, valid = score_users(matrix, profiles, today)
+        for uid, profile, rows in zip(chunk, profiles, _top(matrix, score, valid, limit)):
+            if rows:
+                out[uid] = [matrix.entries[i] for i in rows]
+                continue
+            # nothing left after removing watched titles: the rating/popularity
+            # fallback is rare, so reuse the per-user ranker for it
+            with recommendations._lock:
+                picked = recommendations._rank(index, profile, limit)
+                if not picked:
+                    if anonymous is None:
+                        anonymous = recommendations._rank(index, UserProfile(), limit)
+                    picked = anonymous
+            out[uid] = picked
+    return out
+
+
+def recommend_batch(db: Session, user_ids: Iterable[int], limit: int = 10) -> Dict[int, List[dict]]:
+    index = recommendations._current(db)
+    ranked = rank_batch(index, user_ids, limit)
+    return {uid: [recommendations._to_dict(e) for e in entries] for uid, entries in ranked.items()}
@@ -0,0 +1,297 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from threading import Lock
+from typing import Dict, List, Optional, Set, Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from schemas import Movie, Schedule, Ticket
+from media import images
+
+
+@dataclass
+class MovieEntry:
+    id: int
+    title: str
+    image: Optional[str]
+    duration: Optional[str]
+    cast: Optional[str]
+    description: Optional[str]
+    premiere_date: Optional[date]
+    category_ids: Tuple[int, ...]
+    category_names: List[str]
+    avg: Optional[float] = None
+    pop: int = 0
+
+
+@dataclass
+class UserProfile:
+    # tickets bought per category and the set of movies the user has seen
+    cat_scores: Dict[int, int] = field(default_factory=dict)
+    watched: Set[int] = field(default_factory=set)
+
+
+@dataclass
+class RecommendationIndex:
+    movies: Dict[int, MovieEntry]
+    by_category: Dict[int, Set[int]]
+    profiles: Dict[int, UserProfile]
+    max_pop: int
+    built_at: datetime
+    build_ms: float
+    # bumped by the incremental hooks so derived structures know to refresh
+    revision: int = 0
+
+
+_index: Optional[RecommendationIndex] = None
+_stale = False
+_lock = Lock()
+_build_lock = Lock()
+
+stats = {
+    'builds': 0,
+    'last_build_ms': None,
+    'last_built_at': None,
+    'requests': 0,
+    'last_rank_ms': None,
+    'max_rank_ms': None,
+}
+
+
+def build(db: Session) -> RecommendationIndex:
+    started = time.perf_counter()
+    movies: Dict[int, MovieEntry] = {}
+    by_category: Dict[int, Set[int]] = {}
+    for m in db.query(Movie).order_by(Movie.id).all():
+        cats = [c for c in (m.categories or []) if c is not None]
+        movies[m.id] = MovieEntry(
+            id=m.id,
+            title=m.title or '',
+            image=m.image,
+            duration=m.duration,
+            cast=m.cast,
+            description=m.description,
+            premiere_date=m.premiere_date,
+            category_ids=tuple(c.id for c in cats),
+            category_names=[c.name for c in cats if c.name],
+            avg=float(m.rating_avg) if m.rating_count and m.rating_avg is not None else None,
+        )
+        for c in cats:
+            by_category.setdefault(c.id, set()).add(m.id)
+
+    profiles: Dict[int, UserProfile] = {}
+    rows = (
+        db.query(Ticket.user_id, Schedule.movie_id, func.count(Ticket.id))
+        .join(Schedule, Ticket.schedule_id == Schedule.id)
+        .group_by(Ticket.user_id, Schedule.movie_id)
+        .all()
+    )
+    for user_id, movie_id, cnt in rows:
+        entry = movies.get(movie_id)
+        if entry is not None:
+            entry.pop += int(cnt)
+        if user_id is None:
+            continue
+        profile = profiles.setdefault(user_id, UserProfile())
+        profile.watched.add(movie_id)
+        if entry is not None:
+            for cid in entry.category_ids:
+                profile.cat_scores[cid] = profile.cat_scores.get(cid, 0) + int(cnt)
+
+    build_ms = round((time.perf_counter() - started) * 1000, 3)
+    return RecommendationIndex(
+        movies=movies,
+        by_category=by_category,
+        profiles=profiles,
+        max_pop=max((e.pop for e in movies.values()), default=0),
+        built_at=datetime.utcnow(),
+        build_ms=build_ms,
+    )
+
+
+def rebuild(db: Session) -> RecommendationIndex:
+    global _index, _stale
+    with _build_lock:
+        index = build(db)
+        with _lock:
+            _index = index
+            _stale = False
+        stats['builds'] += 1
+        stats['last_build_ms'] = index.build_ms
+        stats['last_built_at'] = index.built_at
+    return index
+
+
+def _current(db: Session) -> RecommendationIndex:
+    index = _index
+    if index is None or _stale:
+        index = rebuild(db)
+    return index
+
+
+def invalidate():
+    # Catalogue changes (new movie, edited categories, deletion) are rare;
+    # the next request rebuilds instead of patching the index in place.
+    global _stale
+    _stale = True
+
+
+def on_ticket(db: Session, user_id: int | None, schedule_id: int, count: int = 1):
+    index = _index
+    if index is None:
+        return
+    movie_id = db.query(Schedule.movie_id).filter(Schedule.id == schedule_id).scalar()
+    if movie_id is None:
+        return
+    with _lock:
+        entry = index.movies.get(movie_id)
+        if entry is not None:
+            entry.pop += count
+            index.max_pop = max(index.max_pop, entry.pop)
+        index.revision += 1
+        if user_id is None:
+            return
+        profile = index.profiles.setdefault(user_id, UserProfile())
+        profile.watched.add(movie_id)
+        if entry is not None:
+            for cid in entry.category_ids:
+                profile.cat_scores[cid] = profile.cat_scores.get(cid, 0) + count
+
+
+def on_review(db: Session, movie_id: int):
+    index = _index
+    if index is None:
+        return
+    row = db.query(Movie.rating_avg, Movie.rating_count).filter(Movie.id == movie_id).first()
+    if row is None:
+        return
+    rating_avg, rating_count = row
+    with _lock:
+        entry = index.movies.get(movie_id)
+        if entry is not None:
+            entry.avg = float(rating_avg) if rating_count and rating_avg is not None else None
+            index.revision += 1
+
+
+def _released(entry: MovieEntry, today: date) -> bool:
+    return entry.premiere_date is None or entry.premiere_date <= today
+
+
+def _rank(index: RecommendationIndex, profile: UserProfile, limit: int) -> List[MovieEntry]:
+    today = date.today()
+    movies = index.movies
+    watched = profile.watched
+    cat_scores = profile.cat_scores
+
+    if cat_scores:
+        ids: Set[int] = set()
+        for cid in cat_scores:
+            ids |= index.by_category.get(cid, set())
+        candidates = [movies[mid] for mid in sorted(ids) if _released(movies[mid], today)]
+    else:
+        candidates = [e for e in movies.values() if _released(e, today)]
+    if not candidates or all(e.id in watched for e in candidates):
+        candidates = [e for e in movies.values() if _released(e, today)]
+
+    max_cat_score = 0
+    cat_score_per_movie: Dict[int, int] = {}
+    if cat_scores:
+        for e in candidates:
+            score = sum(cat_scores.get(cid, 0) for cid in e.category_ids)
+            cat_score_per_movie[e.id] = score
+            if score > max_cat_score:
+                max_cat_score = score
+
+    max_pop = index.max_pop
+    scored = []
+    for e in candidates:
+        if e.id in watched:
+            continue
+        avg = e.avg or 0.0
+        norm_cat = (cat_score_per_movie.get(e.id, 0) / max_cat_score) if max_cat_score > 0 else 0.0
+        norm_rating = (avg / 5.0) if avg else 0.0
+        norm_pop = (e.pop / max_pop) if max_pop > 0 else 0.0
+        score = 0.6 * norm_cat + 0.3 * norm_rating + 0.1 * norm_pop
+        has_rating = 1 if e.avg is not None else 0
+        scored.append((has_rating, score, avg, e.pop, e.title, e))
+
+    if scored:
+        scored.sort(key=lambda x: (-x[0], -x[1], -x[2], -x[3], x[4]))
+        return [e for *_, e in scored[:limit]]
+
+    released = [e for e in movies.values() if _released(e, today)]
+    picked: List[MovieEntry] = []
+    for e in sorted((e for e in released if e.avg is not None), key=lambda e: (e.avg or 0.0, e.id), reverse=True):
+        if e.id not in watched:
+            picked.append(e)
+        if len(picked) >= limit:
+            break
+    if len(picked) < limit:
+        picked_ids = {e.id for e in picked}
+        for e in sorted((e for e in released if e.pop), key=lambda e: (e.pop, e.id), reverse=True):
+            if e.id not in watched and e.id not in picked_ids:
+                picked.append(e)
+                picked_ids.add(e.id)
+            if len(picked) >= limit:
+                break
+    return picked
+
+
+def _to_dict(e: MovieEntry) -> dict:
+    return {
+        'id': e.id,
+        'title': e.title,
+        'image': e.image,
+        'image_srcset': images.srcset_for_url(e.image),
+        'rating': round(float(e.avg), 1) if e.avg is not None else None,
+        'time': e.duration,
+        'cast': e.cast,
+        'content': e.description,
+        'categories': list(e.category_names),
+    }
+
+
+def recommend(db: Session, user_id: int | None, limit: int = 10) -> List[dict]:
+    index = _current(db)
+    started = time.perf_counter()
+    with _lock:
+        profile = index.profiles.get(user_id) if user_id is not None else None
+        picked = _rank(index, profile or UserProfile(), limit)
+        if user_id is not None and not picked:
+            picked = _rank(index, UserProfile(), limit)
+        out = [_to_dict(e) for e in picked]
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 3)
+    stats['requests'] += 1
+    stats['last_rank_ms'] = elapsed_ms
+    stats['max_rank_ms'] = max(stats['max_rank_ms'] or 0.0, elapsed_ms)
+    return out
+
+
+def _rebuild_once():
+    db = SessionLocal()
+    try:
+        rebuild(db)
+    finally:
+        db.close()
+
+
+async def run_builder(interval_seconds: float):
+    while True:
+        try:
+            await asyncio.to_thread(_rebuild_once)
+        except Exception:
+            pass
+        await asyncio.sleep(interval_seconds)
+
+
+def metrics() -> dict:
+    index = _index
+    return {
+        'built': index is not None,
+        'stale': _stale,
+        'movies': len(index.movies) if index else 0,
+        'profiles': len(index.profiles) if index else 0,
+        **stats,
+    }
@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from sqlalchemy.orm import Session
 from get_db import get_db
-from user import service
+from user import service, qr
 from user.schemas import UserCreate, UserResponse, UserLogin, UserUpdate, PasswordChange, RefreshTokenRequest, TicketCreate, TicketResponse, ReviewCreate, ReviewResponse
-from user.service import get_current_user, admin_required, update_user, change_password
+from user.service import get_current_user, get_current_principal, admin_required, update_user, change_password
+from user.principal import Principal
 from schemas import User 
 from user.schemas import TwoFactorSetupResponse, TwoFactorCode, TwoFactorStatus
+import db_routing
 
 router = APIRouter()
 
@@ -18,7 +20,7 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
             detail="Email został już zarejestrowany!"
         )
     created_user = service.create_user(db, user)
-    access_token = service.create_access_token({"sub": created_user.email})
+    access_token = service.create_access_token(service.access_token_claims(created_user))
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/login")
@@ -43,10 +45,7 @@ def login_user(user: UserLogin, request: Request, db: Session = Depends(get_db))
 
     service.record_login_success(user.email, client_ip)
 
-    access_token = service.create_access_token({
-        "sub": authenticated_user.email,
-        "is_admin": authenticated_user.is_admin
-    })
+    access_token = service.create_access_token(service.access_token_claims(authenticated_user))
     refresh_token = service.create_refresh_token({
         "sub": authenticated_user.email
     })
@@ -63,15 +62,15 @@ def login_user(user: UserLogin, request: Request, db: Session = Depends(get_db))
     }
 
 @router.post("/refresh-token")
-def refresh_token(request: RefreshTokenRequest):
-    return service.refresh_access_token(request.refresh_token)
+def refresh_token(request: RefreshTokenRequest, db: Session = Depends(get_db)):
+    return service.refresh_access_token(request.refresh_token, db)
 
 @router.get("/me", response_model=UserResponse)
 def get_me(current_user: UserResponse = Depends(get_current_user)):
     return current_user
 
 @router.get("/is-logged-in")
-def is_logged_in(current_user: UserResponse = Depends(get_current_user)):
+def is_logged_in(current_user: Principal = Depends(get_current_principal)):
     return {"is_logged_in": current_user is not None}
 
 @router.get("/admin-only")
@@ -87,24 +86,38 @@ def update_password(passwords: PasswordChange, db: Session = Depends(get_db), cu
     return change_password(db, current_user, passwords.old_password, passwords.new_password)
 
 @router.post("/tickets", response_model=TicketResponse)
-def buy_ticket(ticket: TicketCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    return service.create_ticket(db, current_user.id, ticket.dict())
+def buy_ticket(ticket: TicketCreate, response: Response, db: Session = Depends(get_db), current_user: Principal = Depends(get_current_principal)):
+    created = service.create_ticket(db, current_user.id, ticket.dict())
+    db_routing.mark_write(response, current_user.id)
+    return created
 
 @router.get("/tickets", response_model=list[TicketResponse])
-def get_my_tickets(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def get_my_tickets(db: Session = Depends(get_db), current_user: Principal = Depends(get_current_principal)):
     return service.get_user_tickets(db, current_user.id)
 
+@router.get("/tickets/{ticket_id}/qr.png")
+def get_ticket_qr(ticket_id: int, request: Request, db: Session = Depends(get_db), current_user: Principal = Depends(get_current_principal)):
+    key, data = service.get_ticket_qr_png(db, current_user, ticket_id)
+    headers = {'ETag': f'"{key}"', 'Cache-Control': qr.CACHE_CONTROL}
+    if request.headers.get('if-none-match') == headers['ETag']:
+        return Response(status_code=304, headers=headers)
+    png = qr.render_png(data)
+    if png is None:
+        raise HTTPException(status_code=503, detail="Generator kodów QR jest niedostępny")
+    return Response(content=png, media_type='image/png', headers=headers)
+
 @router.post("/reviews", response_model=ReviewResponse)
-def create_review(payload: ReviewCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def create_review(payload: ReviewCreate, response: Response, db: Session = Depends(get_db), current_user: Principal = Depends(get_current_principal)):
     rev = service.create_review(db, current_user.id, payload.movie_id, payload.rating, payload.comment, bool(payload.is_anonymous))
+    db_routing.mark_write(response, current_user.id)
     return rev
 
 @router.get("/reviews", response_model=list[ReviewResponse])
-def my_reviews(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def my_reviews(db: Session = Depends(get_db), current_user: Principal = Depends(get_current_principal)):
     return service.list_my_reviews(db, current_user.id)
 
 @router.get('/recommendations')
-def recommended_movies(limit: int = 10, db: Session = Depends(get_db), current_user: User | None = Depends(service.get_current_user_optional)):
+def recommended_movies(limit: int = 10, db: Session = Depends(get_db), current_user: Principal | None = Depends(service.get_current_principal_optional)):
     user_id = current_user.id if current_user else None
     result = service.recommend_movies(db, user_id, limit)
 
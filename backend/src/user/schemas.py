@@ -87,7 +87,8 @@ class TicketSeatBase(BaseModel):
     seat_number: Optional[int] = None
 
 class TicketSeatCreate(TicketSeatBase):
-    pass
+    # ignored; payments.pricing prices every seat
+    price: Optional[float] = None
 
 class TicketSeatResponse(TicketSeatBase):
     id: int
@@ -108,6 +109,7 @@ class TicketResponse(BaseModel):
     seats: List[TicketSeatResponse]
     schedule: ScheduleResponse
     qr_code_data_url: Optional[str] = None
+    qr_code_url: Optional[str] = None
     ticket_code: Optional[str] = None
     class Config:
         orm_mode = True
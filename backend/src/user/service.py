@@ -1,19 +1,27 @@
 from sqlalchemy.orm import Session
-from passlib.context import CryptContext
 from schemas import User, Ticket, TicketSeat, Schedule, Review
 from user.schemas import UserCreate, UserUpdate
 from datetime import datetime, timedelta, date
 from jose import JWTError, jwt
 from fastapi import HTTPException, status
 from config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, REFRESH_TOKEN_EXPIRE_MINUTES
-from fastapi import Depends
+from fastapi import Depends, Response
 from fastapi.security import OAuth2PasswordBearer
 from get_db import get_db
 from jose.exceptions import ExpiredSignatureError
-from sqlalchemy import and_, or_
+from sqlalchemy import tuple_, insert
+from sqlalchemy.exc import IntegrityError
 import secrets
-from sqlalchemy import func
-from schemas import Movie, Category, movie_categories
+from movie.service import bump_seat_version, seat_positions
+from movie import occupancy, seat_events, ratings
+from user.qr import attach_ticket_qr, cache_key as qr_cache_key
+from user import recommendations
+from admin import sales_rollup
+from payments import pricing
+from user import principal as principal_cache
+from user.passwords import hash_password, verify_password
+from user.principal import Principal
+import db_routing
 from collections import deque
 import pyotp
 import base64
@@ -26,7 +34,6 @@ except Exception:
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/user/login")
 oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="/api/user/login", auto_error=False)
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 LOGIN_WINDOW_SECONDS = 15 * 60  
 LOGIN_MAX_ATTEMPTS = 5 
@@ -87,7 +94,7 @@ def list_users(db: Session):
     return db.query(User).order_by(User.id.asc()).all()
 
 def create_user(db: Session, user: UserCreate):
-    hashed_password = pwd_context.hash(user.password)
+    hashed_password = hash_password(user.password)
     db_user = User(
         email=user.email,
         first_name=user.first_name,
@@ -102,7 +109,7 @@ def create_user(db: Session, user: UserCreate):
 
 def authenticate_user(db: Session, email: str, password: str):
     user = get_user_by_email(db, email)
-    if not user or not pwd_context.verify(password, user.password):
+    if not user or not verify_password(password, user.password):
         return None
     return user
 
@@ -130,8 +137,9 @@ def verify_totp_code(secret: str, code: str) -> bool:
 
 def create_access_token(data: dict):
     to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    now = datetime.utcnow()
+    expire = now + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    to_encode.update({"exp": expire, "iat": now})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -142,6 +150,9 @@ def create_refresh_token(data: dict):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def access_token_claims(user) -> dict:
+    return {"sub": user.email, "uid": user.id, "is_admin": int(user.is_admin or 0)}
+
 def verify_access_token(token: str):
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
@@ -158,61 +169,107 @@ def verify_access_token(token: str):
             detail="Invalid token"
         )
 
-def refresh_access_token(refresh_token: str):
+def _principal_for_subject(db: Session, email: str) -> Principal | None:
+    cached = principal_cache.get(email)
+    if cached is not None:
+        return cached
+    user = get_user_by_email(db, email)
+    if user is None:
+        return None
+    return principal_cache.put(principal_cache.from_user(user))
+
+def principal_from_token(payload: dict) -> Principal | None:
+    email = payload.get("sub")
+    if not email:
+        return None
+    cached = principal_cache.get(email)
+    if cached is not None:
+        return cached
+    claimed = principal_cache.from_claims(payload)
+    if claimed is not None:
+        return principal_cache.put(claimed)
+    return None
+
+def _resolve_principal(db: Session, payload: dict) -> Principal | None:
+    email = payload.get("sub")
+    if not email:
+        return None
+    return principal_from_token(payload) or _principal_for_subject(db, email)
+
+def refresh_access_token(refresh_token: str, db: Session):
     try:
         payload = jwt.decode(refresh_token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
         if email is None:
             raise HTTPException(status_code=401, detail="Invalid refresh token")
-        from get_db import get_db as _get_db  
-        access_token = create_access_token({"sub": email})
+        principal = _principal_for_subject(db, email)
+        if principal is None:
+            raise HTTPException(status_code=401, detail="Invalid refresh token")
+        access_token = create_access_token(access_token_claims(principal))
         return {"access_token": access_token}
     except ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Refresh token expired")
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid refresh token")
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+def get_current_principal(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Principal:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
+        if payload.get("sub") is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="User not found"
             )
-        user = get_user_by_email(db, email)
-        if user is None:
+        principal = _resolve_principal(db, payload)
+        if principal is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="User not found"
             )
-        return user
+        return principal
     except ExpiredSignatureError:
             raise HTTPException(status_code=401, detail="Token expired")
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
-def get_current_user_optional(token: str | None = Depends(oauth2_scheme_optional), db: Session = Depends(get_db)) -> User | None:
+def get_current_principal_optional(token: str | None = Depends(oauth2_scheme_optional), db: Session = Depends(get_db)) -> Principal | None:
     if not token:
         return None
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if not email:
-            return None
-        user = get_user_by_email(db, email)
-        return user
+        return _resolve_principal(db, payload)
     except Exception:
         return None
 
-def admin_required(current_user = Depends(get_current_user)):
+def get_current_user(principal: Principal = Depends(get_current_principal), db: Session = Depends(get_db)):
+    user = db.get(User, principal.id)
+    if user is None:
+        principal_cache.invalidate(principal.email)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found"
+        )
+    return user
+
+def get_current_user_optional(principal: Principal | None = Depends(get_current_principal_optional), db: Session = Depends(get_db)) -> User | None:
+    if principal is None:
+        return None
+    return db.get(User, principal.id)
+
+def admin_required(current_user: Principal = Depends(get_current_principal)):
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Brak uprawnień administratora")
     return current_user
 
+def admin_catalogue_write(response: Response, current_user: Principal = Depends(admin_required)):
+    # catalogue reads go to replicas; the admin who changed it reads from the
+    # primary for a while so the edit shows up in the next listing
+    db_routing.mark_write(response, current_user.id)
+    return current_user
+
 def update_user(db: Session, user: User, user_update: dict):
     try:
+        previous_email = user.email
         if 'first_name' in user_update:
             user.first_name = user_update['first_name']
         if 'last_name' in user_update:
@@ -222,6 +279,7 @@ def update_user(db: Session, user: User, user_update: dict):
         if 'phone' in user_update:
             user.phone = user_update['phone']
         db.commit()
+        principal_cache.invalidate(previous_email, user.email)
         db.refresh(user)
         return user
     except ExpiredSignatureError:
@@ -233,6 +291,7 @@ def admin_update_user(db: Session, user_id: int, updates: dict):
     user = get_user_by_id(db, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="Użytkownik nie istnieje")
+    previous_email = user.email
     if 'first_name' in updates:
         user.first_name = updates['first_name']
     if 'last_name' in updates:
@@ -244,6 +303,7 @@ def admin_update_user(db: Session, user_id: int, updates: dict):
     if 'is_admin' in updates and updates['is_admin'] is not None:
         user.is_admin = int(updates['is_admin'])
     db.commit()
+    principal_cache.invalidate(previous_email, user.email)
     db.refresh(user)
     return user
 
@@ -252,22 +312,34 @@ def delete_user(db: Session, user_id: int):
     if not user:
         raise HTTPException(status_code=404, detail="Użytkownik nie istnieje")
     tickets = db.query(Ticket).filter(Ticket.user_id == user_id).all()
+    released: dict[int, list] = {}
+    sales_rollup.remove_tickets(db, tickets)
     for t in tickets:
+        released.setdefault(t.schedule_id, []).extend(seat_positions(t.seats))
         db.query(TicketSeat).filter(TicketSeat.ticket_id == t.id).delete()
         db.delete(t)
+    versions = {sid: bump_seat_version(db, sid) for sid in released}
     db.delete(user)
     db.commit()
+    principal_cache.invalidate(user.email)
+    for sid, seats in released.items():
+        if versions.get(sid) is not None:
+            occupancy.apply(sid, versions[sid], released=seats)
+        seat_events.publish_unsold(sid, seats)
+    if tickets:
+        recommendations.invalidate()
     return {"status": "deleted"}
 
 def change_password(db: Session, user: User, old_password: str, new_password: str):
     try:
-        if not pwd_context.verify(old_password, user.password):
+        if not verify_password(old_password, user.password):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Stare hasło jest nieprawidłowe!"
             )
-        user.password = pwd_context.hash(new_password)
+        user.password = hash_password(new_password)
         db.commit()
+        principal_cache.invalidate(user.email)
         db.refresh(user)
         return {"msg": "Hasło zostało zaktualizowane pomyślnie!"}
     except ExpiredSignatureError:
@@ -275,96 +347,121 @@ def change_password(db: Session, user: User, old_password: str, new_password: st
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
-def _attach_qr_code(ticket: Ticket):
-    try:
-        import pyqrcode
-        import base64
-        import io
-        code = getattr(ticket, 'ticket_code', None)
-        data_str = str(code) if code is not None else ''
-        qr = pyqrcode.create(data_str, error='M')
-        buf = io.BytesIO()
-        qr.png(buf, scale=4)
-        png_b64 = base64.b64encode(buf.getvalue()).decode('ascii')
-        setattr(ticket, 'qr_code_data_url', f"data:image/png;base64,{png_b64}")
-    except Exception:
-        setattr(ticket, 'qr_code_data_url', None)
+TICKET_CODE_ATTEMPTS = 5
+SEAT_UNIQUE_INDEX = 'uq_ticket_seats_schedule_position'
+
+def _is_seat_conflict(e: IntegrityError) -> bool:
+    constraint = getattr(getattr(e.orig, 'diag', None), 'constraint_name', None)
+    if constraint:
+        return constraint == SEAT_UNIQUE_INDEX
+    # drivers without diagnostics (SQLite) only name the columns
+    message = str(e.orig)
+    return SEAT_UNIQUE_INDEX in message or 'ticket_seats.schedule_id, ticket_seats.row_index, ticket_seats.col_index' in message
+
+def _sold_seat_label(db: Session, schedule_id: int, positions: list) -> str:
+    row = (
+        db.query(TicketSeat.seat, TicketSeat.row_label, TicketSeat.seat_number)
+        .filter(TicketSeat.schedule_id == schedule_id)
+        .filter(tuple_(TicketSeat.row_index, TicketSeat.col_index).in_(positions))
+        .first()
+    )
+    if row is None:
+        return 'unknown'
+    return row.seat or (row.row_label and row.seat_number and f'{row.row_label}-{row.seat_number}') or 'unknown'
 
-def create_ticket(db: Session, user_id: int, ticket_data: dict):
+def create_ticket(db: Session, user_id: int, ticket_data: dict, reprice: bool = True):
     seats_data = ticket_data.get('seats', []) or []
 
     schedule_id = ticket_data.get('schedule_id')
     if not schedule_id:
         raise HTTPException(status_code=400, detail="Brak schedule_id")
+    if reprice:
+        seats_data = pricing.price_basket(db, schedule_id, seats_data).seats
 
+    positions = []
     for s in seats_data:
-        r = s.get('row_index')
-        c = s.get('col_index')
-        r_label = s.get('row_label')
-        seat_num = s.get('seat_number')
-        seat_txt = s.get('seat')
-        conflict = db.query(TicketSeat) \
-            .join(Ticket, TicketSeat.ticket_id == Ticket.id) \
-            .filter(Ticket.schedule_id == schedule_id) \
-            .filter(
-                or_(
-                    and_(TicketSeat.row_index == r, TicketSeat.col_index == c),
-                    and_(TicketSeat.row_label == r_label, TicketSeat.seat_number == seat_num),
-                    TicketSeat.seat == seat_txt
-                )
-            ) \
-            .first()
-        if conflict:
-            raise HTTPException(status_code=409, detail=f"Seat already sold: {seat_txt or (r_label and seat_num and f'{r_label}-{seat_num}') or 'unknown'}")
-
-    code = None
-    for _ in range(5):
-        candidate = secrets.token_urlsafe(10)
-        if not db.query(Ticket).filter(Ticket.ticket_code == candidate).first():
-            code = candidate
+        pos = seat_positions([s])
+        if not pos:
+            raise HTTPException(status_code=400, detail=f"Nieprawidłowe miejsce: {s.get('seat') or 'unknown'}")
+        positions.append(pos[0])
+    if len(set(positions)) != len(positions):
+        raise HTTPException(status_code=400, detail="Powtórzone miejsce w zamówieniu")
+
+    total = sum(float(s.get('price') or 0.0) for s in seats_data)
+
+    ticket = None
+    for _ in range(TICKET_CODE_ATTEMPTS):
+        ticket = Ticket(
+            user_id=user_id,
+            schedule_id=schedule_id,
+            hall=ticket_data.get('hall'),
+            ticket_code=secrets.token_urlsafe(10),
+            total_price=total,
+        )
+        db.add(ticket)
+        try:
+            db.flush()
             break
-    if code is None:
+        except IntegrityError as e:
+            db.rollback()
+            if 'ticket_code' not in str(e.orig):
+                raise
+            ticket = None
+    if ticket is None:
         raise HTTPException(status_code=500, detail="Nie udało się wygenerować kodu biletu")
 
-    ticket = Ticket(
-        user_id=user_id,
-        schedule_id=schedule_id,
-        hall=ticket_data.get('hall'),
-        ticket_code=code,
+    seat_rows = [
+        {
+            'ticket_id': ticket.id,
+            'schedule_id': schedule_id,
+            'seat': s.get('seat'),
+            'price': float(s.get('price') or 0.0),
+            'type': s.get('type'),
+            'row_index': r,
+            'col_index': c,
+            'row_label': s.get('row_label'),
+            'seat_number': s.get('seat_number'),
+        }
+        for s, (r, c) in zip(seats_data, positions)
+    ]
+    if seat_rows:
+        try:
+            db.execute(insert(TicketSeat), seat_rows)
+        except IntegrityError as e:
+            db.rollback()
+            if not _is_seat_conflict(e):
+                raise
+            raise HTTPException(status_code=409, detail=f"Seat already sold: {_sold_seat_label(db, schedule_id, positions)}")
+
+    sales_rollup.record_ticket(
+        db, ticket.purchase_date, schedule_id,
+        len(seat_rows), total, sum(r['price'] for r in seat_rows),
     )
-    db.add(ticket)
-    db.flush()
-
-    total = 0.0
-    for s in seats_data:
-        seat_price = float(s.get('price') or 0.0)
-        ts = TicketSeat(
-            ticket_id=ticket.id,
-            seat=s.get('seat'),
-            price=seat_price,
-            type=s.get('type'),
-            row_index=s.get('row_index'),
-            col_index=s.get('col_index'),
-            row_label=s.get('row_label'),
-            seat_number=s.get('seat_number'),
-        )
-        db.add(ts)
-        total += seat_price
-
-    ticket.total_price = total
+    seat_version = bump_seat_version(db, schedule_id)
     db.commit()
     db.refresh(ticket)
+    if seat_version is not None:
+        occupancy.apply(schedule_id, seat_version, sold=positions)
+    seat_events.publish_sold(schedule_id, positions)
+    recommendations.on_ticket(db, user_id, schedule_id)
 
-    _attach_qr_code(ticket)
+    attach_ticket_qr(ticket, inline=True)
 
     return ticket
 
 def get_user_tickets(db: Session, user_id: int):
     tickets = db.query(Ticket).filter(Ticket.user_id == user_id).all()
     for t in tickets:
-        _attach_qr_code(t)
+        attach_ticket_qr(t)
     return tickets
 
+def get_ticket_qr_png(db: Session, user, ticket_id: int):
+    row = db.query(Ticket.id, Ticket.user_id, Ticket.ticket_code).filter(Ticket.id == ticket_id).first()
+    if row is None or (row.user_id != user.id and not user.is_admin):
+        raise HTTPException(status_code=404, detail="Bilet nie istnieje")
+    data = str(row.ticket_code) if row.ticket_code is not None else ''
+    return qr_cache_key(data), data
+
 def _user_attended_movie(db: Session, user_id: int, movie_id: int) -> bool:
     now_date = date.today()
     q = (
@@ -384,6 +481,7 @@ def create_review(db: Session, user_id: int, movie_id: int, rating: int, comment
         raise HTTPException(status_code=403, detail="Możesz ocenić film tylko po udziale w seansie")
     existing = db.query(Review).filter(Review.user_id == user_id, Review.movie_id == movie_id).first()
     if existing:
+        ratings.record_review(db, movie_id, rating, previous=existing.rating)
         existing.rating = rating
         existing.comment = comment
         existing.is_anonymous = 1 if is_anonymous else 0
@@ -391,6 +489,7 @@ def create_review(db: Session, user_id: int, movie_id: int, rating: int, comment
         db.add(existing)
         db.commit()
         db.refresh(existing)
+        recommendations.on_review(db, movie_id)
         return existing
     rev = Review(
         user_id=user_id,
@@ -400,8 +499,10 @@ def create_review(db: Session, user_id: int, movie_id: int, rating: int, comment
         is_anonymous=1 if is_anonymous else 0,
     )
     db.add(rev)
+    ratings.record_review(db, movie_id, rating)
     db.commit()
     db.refresh(rev)
+    recommendations.on_review(db, movie_id)
     return rev
 
 
@@ -437,145 +538,14 @@ def list_movie_reviews(db: Session, movie_id: int):
 
 
 
-def recommend_movies(db: Session, user_id: int | None, limit: int = 10, _fallback: bool = False):
-    if user_id is not None:
-        watched_movie_ids = set(
-            mid for (mid,) in (
-                db.query(Schedule.movie_id)
-                .join(Ticket, Ticket.schedule_id == Schedule.id)
-                .filter(Ticket.user_id == user_id)
-                .all()
-            )
-        )
-    else:
-        watched_movie_ids = set()
-
-    if user_id is not None:
-        cat_freq_rows = (
-            db.query(Category.id, func.count().label('cnt'))
-            .join(movie_categories, Category.id == movie_categories.c.category_id)
-            .join(Movie, Movie.id == movie_categories.c.movie_id)
-            .join(Schedule, Schedule.movie_id == Movie.id)
-            .join(Ticket, Ticket.schedule_id == Schedule.id)
-            .filter(Ticket.user_id == user_id)
-            .group_by(Category.id)
-            .all()
-        )
-        cat_scores = {cid: int(cnt) for cid, cnt in cat_freq_rows}
-    else:
-        cat_scores = {}
-
-    released_filter = or_(Movie.premiere_date == None, Movie.premiere_date <= date.today())
-    if cat_scores:
-        candidate_q = (
-            db.query(Movie)
-            .join(movie_categories, Movie.id == movie_categories.c.movie_id)
-            .filter(movie_categories.c.category_id.in_(list(cat_scores.keys())))
-            .filter(released_filter)
-        )
-    else:
-        candidate_q = db.query(Movie).filter(released_filter)
-
-    candidates = {m.id: m for m in candidate_q.all()}
-
-    available_candidate_ids = set(candidates.keys()) - watched_movie_ids
-    if not candidates or not available_candidate_ids:
-        candidates = {m.id: m for m in db.query(Movie).filter(released_filter).all()}
-
-    avg_rows = db.query(Review.movie_id, func.avg(Review.rating)).group_by(Review.movie_id).all()
-    avg_map = {mid: (float(avg) if avg is not None else None) for mid, avg in avg_rows}
-
-    pop_rows = (
-        db.query(Schedule.movie_id, func.count(Ticket.id))
-        .join(Ticket, Ticket.schedule_id == Schedule.id)
-        .group_by(Schedule.movie_id)
-        .all()
-    )
-    pop_map = {mid: int(cnt) for mid, cnt in pop_rows}
-
-    cat_score_per_movie: dict[int, int] = {}
-    max_cat_score = 0
-    if cat_scores:
-        for m in candidates.values():
-            score = 0
-            try:
-                for c in getattr(m, 'categories', []) or []:
-                    if c and c.id in cat_scores:
-                        score += cat_scores.get(c.id, 0)
-            except Exception:
-                score = 0
-            cat_score_per_movie[m.id] = score
-            if score > max_cat_score:
-                max_cat_score = score
-
-    max_pop = max(pop_map.values()) if pop_map else 0
-
-    scored = []
-    for mid, m in candidates.items():
-        if mid in watched_movie_ids:
-            continue
-        avg = avg_map.get(mid) or 0.0
-        pop = pop_map.get(mid, 0)
-        if max_cat_score > 0:
-            norm_cat = (cat_score_per_movie.get(mid, 0) / max_cat_score)
-        else:
-            norm_cat = 0.0
-        norm_rating = (avg / 5.0) if avg else 0.0
-        norm_pop = (pop / max_pop) if max_pop > 0 else 0.0
-        score = 0.6 * norm_cat + 0.3 * norm_rating + 0.1 * norm_pop
-        title = getattr(m, 'title', '') or ''
-        has_rating = 1 if (avg_map.get(mid) is not None) else 0
-        scored.append((has_rating, score, avg, pop, title, m))
-
-    if not scored:
-        all_released = {m.id: m for m in db.query(Movie).filter(released_filter).all()}
-        top_by_rating = sorted(
-            [(avg or 0.0, mid) for mid, avg in avg_rows if mid in all_released], reverse=True
-        )
-        picked_ids: list[int] = []
-        for _, mid in top_by_rating:
-            if mid not in watched_movie_ids and mid in all_released:
-                picked_ids.append(mid)
-            if len(picked_ids) >= limit:
-                break
-        if len(picked_ids) < limit:
-            for _cnt, mid in sorted([(cnt, mid) for mid, cnt in pop_map.items() if mid in all_released], reverse=True):
-                if mid not in watched_movie_ids and mid in all_released and mid not in picked_ids:
-                    picked_ids.append(mid)
-                if len(picked_ids) >= limit:
-                    break
-        movies = [all_released[mid] for mid in picked_ids]
-    else:
-        movies = [m for _, _, _, _, _, m in sorted(scored, key=lambda x: (-x[0], -x[1], -x[2], -x[3], x[4]))[:limit]]
-
-    if user_id is not None and not movies and not _fallback:
-        return recommend_movies(db, None, limit, _fallback=True)
-
-    out = []
-    for m in movies:
-        avg = avg_map.get(m.id)
-        img = m.image
-        
-        try:
-            cat_names = [c.name for c in (getattr(m, 'categories', []) or []) if getattr(c, 'name', None)]
-        except Exception:
-            cat_names = []
-        out.append({
-            'id': m.id,
-            'title': m.title,
-            'image': img,
-            'rating': round(float(avg), 1) if avg is not None else None,
-            'time': m.duration,
-            'cast': m.cast,
-            'content': m.description,
-            'categories': cat_names,
-        })
-    return out
+def recommend_movies(db: Session, user_id: int | None, limit: int = 10):
+    return recommendations.recommend(db, user_id, limit)
 
 def setup_two_factor(db: Session, user: User):
     secret = generate_2fa_secret()
     user.two_factor_secret = secret
     db.commit()
+    principal_cache.invalidate(user.email)
     db.refresh(user)
     otpauth = build_otpauth_url(user.email, secret)
     qr_data_url = build_qr_data_url(otpauth)
@@ -589,6 +559,7 @@ def enable_two_factor(db: Session, user: User, code: str):
         raise HTTPException(status_code=400, detail="Nieprawidłowy kod 2FA")
     user.two_factor_enabled = 1
     db.commit()
+    principal_cache.invalidate(user.email)
     db.refresh(user)
     return { 'enabled': True }
 
@@ -600,6 +571,7 @@ def disable_two_factor(db: Session, user: User, code: str | None = None):
     user.two_factor_enabled = 0
     user.two_factor_secret = None
     db.commit()
+    principal_cache.invalidate(user.email)
     db.refresh(user)
     return { 'enabled': False }
 
@@ -0,0 +1,114 @@
+import os
+import sys
+import tempfile
+from datetime import date, timedelta
+
+import pytest
+
+SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, SRC)
+
+# The app reads its configuration at import time, so the test database and
+# settings have to be in place before anything from src is imported.
+_TMP = tempfile.mkdtemp(prefix='cinema-tests-')
+os.environ['SQLALCHEMY_DATABASE_URL'] = f"sqlite:///{os.path.join(_TMP, 'test.db')}"
+os.environ['SQLALCHEMY_READ_DATABASE_URL'] = ''
+os.environ['SQLALCHEMY_REPLICA_URLS'] = ''
+os.environ['JWT_SECRET_KEY'] = 'test-secret'
+os.environ['SEAT_HOLD_BACKEND'] = 'memory'
+os.environ['ASYNC_DB_ENABLED'] = 'false'
+os.environ['CACHE_VERSION_TTL_SECONDS'] = '0'
+os.environ['QR_CACHE_DIR'] = ''
+os.environ['UPLOAD_MAX_BYTES'] = str(256 * 1024)
+
+
+@pytest.fixture(scope='session')
+def engine():
+    import schemas  # noqa: F401  (registers the models)
+    from database import Base, engine
+    Base.metadata.create_all(engine)
+    yield engine
+    Base.metadata.drop_all(engine)
+
+
+def _reset_caches():
+    # ids restart after the tables are emptied, so per-process caches keyed
+    # by id must not leak from one test into the next
+    import http_cache
+    from movie import occupancy
+    from user import principal
+    from payments import pricing
+    occupancy._cache.clear()
+    pricing.invalidate()
+    http_cache._versions = http_cache._seen = None
+    http_cache._changed_at.clear()
+    principal._cache.clear()
+    principal._changed_at.clear()
+
+
+@pytest.fixture
+def db(engine):
+    from database import Base, SessionLocal
+    _reset_caches()
+    session = SessionLocal()
+    yield session
+    session.close()
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+    _reset_caches()
+
+
+@pytest.fixture
+def client(db):
+    from fastapi.testclient import TestClient
+    import main
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def schedule(db):
+    from schemas import Movie, Schedule
+    movie = Movie(title='Test', genre='Dramat', duration='120')
+    db.add(movie)
+    db.flush()
+    row = Schedule(date=date.today() + timedelta(days=7), time='18:00', movie_id=movie.id, hall=1)
+    db.add(row)
+    db.commit()
+    return row
+
+
+@pytest.fixture
+def user(db):
+    from schemas import User
+    from user.passwords import pwd_context
+    row = User(first_name='Jan', last_name='Kowalski', email='jan@example.com', password=pwd_context.hash('secret'))
+    db.add(row)
+    db.commit()
+    return row
+
+
+@pytest.fixture
+def user_headers(user):
+    from user.service import create_access_token
+    return {'Authorization': f"Bearer {create_access_token({'sub': user.email})}"}
+
+
+@pytest.fixture
+def admin_headers(db, user):
+    from user.service import create_access_token
+    user.is_admin = 1
+    db.commit()
+    return {'Authorization': f"Bearer {create_access_token({'sub': user.email})}"}
+
+
+@pytest.fixture
+def ticket_prices(db):
+    from schemas import TicketPrice
+    db.add_all([
+        TicketPrice(type='normalny', cheap_thursday='15', three_days_before='20', two_days_before='22',
+                    one_day_before='24', same_day='25'),
+        TicketPrice(type='ulgowy', cheap_thursday='12,50', three_days_before='16', two_days_before='17',
+                    one_day_before='18', same_day='19 zł'),
+    ])
+    db.commit()
@@ -0,0 +1,108 @@
+import gzip
+import os
+
+import pytest
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.testclient import TestClient
+
+from media.assets import StaticAssets, parse_range
+
+HASH = '0123456789abcdef0123456789abcdef'
+
+
+@pytest.fixture
+def static(tmp_path):
+    (tmp_path / 'uploads').mkdir()
+    app = Starlette(routes=[Mount('/static', StaticAssets(directory=str(tmp_path)))])
+    return tmp_path, TestClient(app)
+
+
+def test_dotfiles_are_not_served(static):
+    root, client = static
+    (root / 'uploads' / '.upload-abc').write_bytes(b'partial')
+    (root / 'uploads' / '.backfill-state.jsonl').write_text('{}\n')
+    (root / 'uploads' / f'{HASH}.png').write_bytes(b'png')
+    assert client.get('/static/uploads/.upload-abc').status_code == 404
+    assert client.get('/static/uploads/.backfill-state.jsonl').status_code == 404
+    assert client.get(f'/static/uploads/{HASH}.png').status_code == 200
+
+
+@pytest.mark.parametrize('header,size,expected', [
+    ('bytes=0-9', 100, (0, 9)),
+    ('bytes=90-', 100, (90, 99)),
+    ('bytes=-10', 100, (90, 99)),
+    ('bytes=-500', 100, (0, 99)),
+    ('bytes=50-500', 100, (50, 99)),
+    ('bytes=10-5', 100, None),
+    ('bytes=0-1,5-6', 100, None),
+    ('items=0-1', 100, None),
+    ('bytes=a-b', 100, None),
+])
+def test_parse_range(header, size, expected):
+    assert parse_range(header, size) == expected
+
+
+@pytest.mark.parametrize('header,size', [('bytes=100-', 100), ('bytes=-0', 100), ('bytes=-5', 0)])
+def test_parse_range_unsatisfiable(header, size):
+    with pytest.raises(ValueError):
+        parse_range(header, size)
+
+
+def test_variants_and_originals_are_immutable_but_manifests_are_not(static):
+    root, client = static
+    (root / 'uploads' / f'{HASH}-640w.webp').write_bytes(b'webp')
+    (root / 'uploads' / f'{HASH}.jpg').write_bytes(b'jpg')
+    (root / 'uploads' / f'{HASH}.json').write_text('{}')
+    for name in (f'{HASH}-640w.webp', f'{HASH}.jpg'):
+        response = client.get(f'/static/uploads/{name}')
+        assert 'immutable' in response.headers['cache-control']
+        assert response.headers['etag'] == f'"{name}"'
+    manifest = client.get(f'/static/uploads/{HASH}.json')
+    assert manifest.headers['cache-control'] == 'no-cache'
+    assert manifest.headers['etag'] != f'"{HASH}.json"'
+
+
+def test_rewritten_manifest_gets_a_new_etag(static):
+    root, client = static
+    path = root / 'uploads' / f'{HASH}.json'
+    path.write_text('{"variants": []}')
+    etag = client.get(f'/static/uploads/{HASH}.json').headers['etag']
+    path.write_text('{"variants": [1]}')
+    os.utime(path, ns=(path.stat().st_mtime_ns + 10**9,) * 2)
+    response = client.get(f'/static/uploads/{HASH}.json', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.json() == {'variants': [1]}
+
+
+def test_conditional_requests_get_304(static):
+    root, client = static
+    (root / 'site.css').write_text('body{}')
+    first = client.get('/static/site.css')
+    assert client.get('/static/site.css', headers={'If-None-Match': first.headers['etag']}).status_code == 304
+    assert client.get('/static/site.css', headers={'If-Modified-Since': first.headers['last-modified']}).status_code == 304
+    assert client.get('/static/site.css', headers={'If-None-Match': '"other"'}).status_code == 200
+
+
+def test_ranges(static):
+    root, client = static
+    (root / 'uploads' / f'{HASH}.png').write_bytes(bytes(range(100)))
+    url = f'/static/uploads/{HASH}.png'
+    part = client.get(url, headers={'Range': 'bytes=10-19'})
+    assert part.status_code == 206
+    assert part.content == bytes(range(10, 20))
+    assert part.headers['content-range'] == 'bytes 10-19/100'
+    assert client.get(url, headers={'Range': 'bytes=100-'}).status_code == 416
+    stale = client.get(url, headers={'Range': 'bytes=10-19', 'If-Range': '"old"'})
+    assert stale.status_code == 200 and len(stale.content) == 100
+
+
+def test_gzip_sidecar_is_sent_to_clients_that_accept_it(static):
+    root, client = static
+    body = b'{"a": "' + b'x' * 500 + b'"}'
+    (root / 'uploads' / f'{HASH}.json').write_bytes(body)
+    (root / 'uploads' / f'{HASH}.json.gz').write_bytes(gzip.compress(body))
+    response = client.get(f'/static/uploads/{HASH}.json', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['content-encoding'] == 'gzip'
+    assert response.content == body
+    assert response.headers['etag'].endswith('-gzip"')
@@ -0,0 +1,69 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from config import SQLALCHEMY_DATABASE_URL
+from database import async_database_url
+from get_db import get_async_db
+from movie import async_router as movie_async_router
+from user import async_router as user_async_router
+from user.service import create_ticket
+
+
+@pytest.fixture
+def async_client(db):
+    # Same paths as main.app mounts with ASYNC_DB_ENABLED, against the test database.
+    engine = create_async_engine(async_database_url(SQLALCHEMY_DATABASE_URL), poolclass=NullPool)
+    sessions = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+    async def override():
+        async with sessions() as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(user_async_router.router, prefix='/user')
+    app.include_router(movie_async_router.router, prefix='/movie')
+    app.dependency_overrides[get_async_db] = override
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def sold(db, schedule, user, ticket_prices):
+    seats = [{'seat': f'2-{c + 1}', 'type': 'normalny', 'row_index': 2, 'col_index': c, 'seat_number': c + 1}
+             for c in range(2)]
+    create_ticket(db, user.id, {'schedule_id': schedule.id, 'seats': seats})
+    return schedule
+
+
+def same_body(client, async_client, path, headers=None):
+    sync = client.get(path, headers=headers)
+    async_ = async_client.get(path, headers=headers)
+    assert sync.status_code == async_.status_code == 200, path
+    assert async_.json() == sync.json(), path
+    return sync.json()
+
+
+def test_movies_match_sync(client, async_client, sold):
+    assert same_body(client, async_client, '/movie/movies')
+    body = same_body(client, async_client, '/movie/movies?include=schedules')
+    assert body[0]['schedules']
+
+
+def test_repertoire_matches_sync(client, async_client, sold):
+    day = sold.date.isoformat()
+    body = same_body(client, async_client, f'/movie/repertoire?date_from={day}&date_to={day}')
+    assert [item['id'] for item in body['items']] == [sold.id]
+    same_body(client, async_client, f'/movie/repertoire?date_from={day}&date_to={day}&hall=2')
+
+
+def test_blocked_seats_match_sync(client, async_client, sold):
+    body = same_body(client, async_client, f'/movie/schedules/{sold.id}/blocked-seats')
+    assert body['blocked_seats']
+
+
+def test_tickets_match_sync(client, async_client, sold, user_headers):
+    body = same_body(client, async_client, '/user/tickets', headers=user_headers)
+    assert len(body) == 1
@@ -0,0 +1,75 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import OperationalError, TimeoutError as PoolTimeoutError
+
+import database
+import main
+from get_db import get_replica_db
+
+
+class QueryCanceled(Exception):
+    pgcode = '57014'
+
+
+def failing_db(exc):
+    def dependency():
+        raise exc
+        yield
+    return dependency
+
+
+@pytest.fixture
+def failing_client(db):
+    client = TestClient(main.app, raise_server_exceptions=False)
+    yield client
+    main.app.dependency_overrides.clear()
+
+
+def test_pool_metrics_track_checked_out_connections(db):
+    before = database.pool_metrics()['engines']['primary']
+    with database.engine.connect():
+        during = database.pool_metrics()['engines']['primary']
+    assert during['checkedout'] == before['checkedout'] + 1
+    assert during['pool'] == 'QueuePool'
+    assert during['utilization'] == round(during['checkedout'] / (during['size'] + during['max_overflow']), 3)
+
+
+def test_db_pool_endpoint_is_admin_only(client, db, user_headers):
+    assert client.get('/admin/metrics/db-pool', headers=user_headers).status_code in (401, 403)
+
+
+def test_db_pool_endpoint(client, admin_headers):
+    body = client.get('/admin/metrics/db-pool', headers=admin_headers).json()
+    assert set(body) >= {'engines', 'statement_timeout_ms', 'pool_timeouts', 'statement_timeouts'}
+    assert 'primary' in body['engines']
+
+
+def test_pool_timeout_returns_503_with_retry_after(failing_client):
+    before = database.pool_metrics()['pool_timeouts']
+    main.app.dependency_overrides[get_replica_db] = failing_db(PoolTimeoutError('QueuePool limit reached'))
+
+    response = failing_client.get('/movie/categories')
+
+    assert response.status_code == 503
+    assert response.headers['retry-after'] == '1'
+    assert database.pool_metrics()['pool_timeouts'] == before + 1
+
+
+def test_statement_timeout_returns_503(failing_client):
+    before = database.pool_metrics()['statement_timeouts']
+    main.app.dependency_overrides[get_replica_db] = failing_db(OperationalError('SELECT 1', {}, QueryCanceled()))
+
+    response = failing_client.get('/movie/categories')
+
+    assert response.status_code == 503
+    assert database.pool_metrics()['statement_timeouts'] == before + 1
+
+
+def test_other_operational_errors_are_not_reported_as_timeouts(failing_client):
+    before = database.pool_metrics()['statement_timeouts']
+    main.app.dependency_overrides[get_replica_db] = failing_db(OperationalError('SELECT 1', {}, Exception('disk I/O error')))
+
+    response = failing_client.get('/movie/categories')
+
+    assert response.status_code == 500
+    assert database.pool_metrics()['statement_timeouts'] == before
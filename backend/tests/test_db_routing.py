@@ -0,0 +1,48 @@
+import pytest
+
+import db_routing
+
+
+@pytest.fixture
+def routed(monkeypatch):
+    # mark_write is a no-op without replicas; a placeholder is enough since
+    # nothing here reads through the router
+    monkeypatch.setattr(db_routing.router, 'replicas', [object()])
+    monkeypatch.setattr(db_routing.router, 'sticky_seconds', 30)
+    monkeypatch.setattr(db_routing.router, '_pinned', {})
+    return db_routing.router
+
+
+def test_admin_catalogue_write_pins_the_admin(routed, client, schedule, user, admin_headers):
+    response = client.patch(f'/movie/movies/{schedule.movie_id}', json={'title': 'Nowy'}, headers=admin_headers)
+    assert response.status_code == 200
+    assert db_routing.STICKY_COOKIE in response.cookies
+    assert routed.is_pinned(user.id)
+
+
+def test_admin_reads_do_not_pin(routed, client, user, admin_headers):
+    response = client.get('/admin/ticket-prices', headers=admin_headers)
+    assert response.status_code == 200
+    assert db_routing.STICKY_COOKIE not in response.cookies
+    assert not routed.is_pinned(user.id)
+
+
+def _sticky_with_cookie(value):
+    from starlette.requests import Request
+    cookie = f'{db_routing.STICKY_COOKIE}={value}'.encode()
+    return db_routing.is_sticky(Request({'type': 'http', 'headers': [(b'cookie', cookie)]}))
+
+
+def test_sticky_cookie_must_be_signed_and_recent(routed):
+    from starlette.responses import Response
+    response = Response()
+    db_routing.mark_write(response, None)
+    issued = response.headers['set-cookie'].split(';')[0].split('=', 1)[1]
+    assert _sticky_with_cookie(issued)
+
+    until = int(issued.split('.')[0])
+    assert not _sticky_with_cookie(str(until))
+    assert not _sticky_with_cookie('99999999999')
+    assert not _sticky_with_cookie(f'{until}.{"0" * 64}')
+    far = until + 3600
+    assert not _sticky_with_cookie(f'{far}.{db_routing._sign(far)}')
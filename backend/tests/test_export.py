@@ -0,0 +1,55 @@
+import csv
+import io
+import json
+
+from admin import export
+from schemas import Ticket
+from user.service import create_ticket
+
+
+def seats(count, kind='normalny'):
+    return [{'seat': f'0-{c + 1}', 'type': kind, 'row_index': 0, 'col_index': c, 'seat_number': c + 1} for c in range(count)]
+
+
+def test_csv_export_has_one_row_per_seat(client, db, admin_headers, schedule, user, ticket_prices):
+    create_ticket(db, user.id, {'schedule_id': schedule.id, 'seats': seats(2)})
+    ticket = db.query(Ticket).one()
+
+    response = client.get('/admin/export/sales?format=csv', headers=admin_headers)
+
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/csv')
+    assert response.headers['content-disposition'] == 'attachment; filename="sales_all.csv"'
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert list(rows[0]) == export.CSV_COLUMNS
+    assert [r['seat'] for r in rows] == ['0-1', '0-2']
+    assert {r['ticket_id'] for r in rows} == {str(ticket.id)}
+    assert rows[0]['movie_title'] == 'Test'
+    assert rows[0]['schedule_date'] == schedule.date.isoformat()
+
+
+def test_ndjson_export_groups_seats_by_ticket(client, db, admin_headers, schedule, user, ticket_prices):
+    create_ticket(db, user.id, {'schedule_id': schedule.id, 'seats': seats(2)})
+    ticket = db.query(Ticket).one()
+
+    response = client.get('/admin/export/sales?format=ndjson', headers=admin_headers)
+
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    lines = response.text.splitlines()
+    assert len(lines) == 1
+    record = json.loads(lines[0])
+    assert record['ticket_id'] == ticket.id
+    assert record['total_price'] == ticket.total_price
+    assert record['schedule'] == {'id': schedule.id, 'date': schedule.date.isoformat(), 'time': '18:00', 'hall': 1}
+    assert record['movie'] == {'id': schedule.movie_id, 'title': 'Test'}
+    assert [s['seat'] for s in record['seats']] == ['0-1', '0-2']
+    assert sum(s['price'] for s in record['seats']) == ticket.total_price
+
+
+def test_export_rejects_unknown_format(client, admin_headers):
+    assert client.get('/admin/export/sales?format=xml', headers=admin_headers).status_code == 400
+
+
+def test_export_requires_admin(client, user_headers):
+    assert client.get('/admin/export/sales?format=csv', headers=user_headers).status_code in (401, 403)
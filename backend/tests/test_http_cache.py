@@ -0,0 +1,59 @@
+import pytest
+
+import db_routing
+import http_cache
+
+
+def test_matching_etag_gets_304_until_the_table_changes(client, ticket_prices, admin_headers):
+    first = client.get('/general/ticket-prices')
+    etag = first.headers['etag']
+    assert first.status_code == 200
+    assert 'max-age=' in first.headers['cache-control']
+
+    again = client.get('/general/ticket-prices', headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.headers['etag'] == etag
+    assert client.get('/general/ticket-prices', headers={'If-None-Match': f'W/{etag}'}).status_code == 304
+
+    price_id = first.json()[0]['id']
+    assert client.patch(f'/admin/ticket-prices/{price_id}', json={'same_day': '30'}, headers=admin_headers).status_code == 200
+    changed = client.get('/general/ticket-prices', headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['etag'] != etag
+
+
+def test_etag_depends_on_the_query(client, db):
+    a = client.get('/general/public/news', params={'limit': 5}).headers['etag']
+    b = client.get('/general/public/news', params={'limit': 6}).headers['etag']
+    assert a != b
+
+
+@pytest.fixture
+def routed_sessions(monkeypatch):
+    # records the sticky flag of every replica-routed session
+    calls = []
+    session = db_routing.router.session
+    monkeypatch.setattr(db_routing.router, 'session', lambda sticky=False: calls.append(sticky) or session(sticky))
+    monkeypatch.setattr(db_routing.router, '_pinned', {})
+    return calls
+
+
+def test_first_load_does_not_count_as_a_change(db):
+    http_cache.versions()
+    assert not http_cache.changed_within([http_cache.NEWS, http_cache.MOVIES], 5)
+
+
+def test_only_routes_whose_tables_moved_read_from_the_primary(client, db, routed_sessions):
+    client.get('/general/public/news')
+    client.get('/general/public/slides')
+    assert routed_sessions == [False, False]
+
+    http_cache.bump(db, http_cache.NEWS)
+    db.commit()
+    routed_sessions.clear()
+    client.get('/general/public/news')
+    client.get('/general/public/slides')
+    client.get('/movie/repertoire')
+    assert routed_sessions == [True, False, False]
+    assert http_cache.changed_within([http_cache.NEWS], 5)
+    assert not http_cache.changed_within([http_cache.NEWS], 0)
@@ -0,0 +1,49 @@
+import io
+
+from PIL import Image
+
+from config import API_ROOT_PATH
+from media import images
+
+
+def png(width, height):
+    buf = io.BytesIO()
+    Image.new('RGB', (width, height), (200, 30, 30)).save(buf, 'PNG')
+    return buf.getvalue()
+
+
+def test_srcset_lists_real_widths_once(tmp_path):
+    result = images.process_bytes(png(500, 250), out_dir=str(tmp_path))
+    srcset = result.srcset('jpeg')
+    widths = [part.rsplit(' ', 1)[1] for part in srcset.split(', ')]
+    assert widths == ['320w', '500w']
+    assert srcset.startswith(API_ROOT_PATH + '/static/uploads/')
+    assert (tmp_path / f'{result.hash}.json').exists()
+
+
+def test_manifest_endpoint_is_not_immutable(client, tmp_path, monkeypatch):
+    result = images.process_bytes(png(100, 100), out_dir=str(tmp_path))
+    monkeypatch.setitem(images._manifests, result.hash, result)
+    response = client.get(f'/general/images/{result.hash}')
+    assert response.status_code == 200
+    assert 'immutable' not in response.headers['cache-control']
+    assert set(response.json()['srcset']) == set(images.FORMATS)
+    assert client.get('/general/images/not-a-hash').status_code == 404
+
+
+def test_catalogue_payloads_carry_the_srcset(client, db, schedule, tmp_path, monkeypatch):
+    from schemas import Slide
+    result = images.process_bytes(png(800, 400), out_dir=str(tmp_path))
+    monkeypatch.setitem(images._manifests, result.hash, result)
+    schedule.movie.image = result.url()
+    db.add(Slide(title='S', image=result.url(), sort_order=0, is_public=1))
+    db.add(Slide(title='Old', image='/api/static/uploads/legacy.png', sort_order=1, is_public=1))
+    db.commit()
+    expected = result.srcset('webp' if 'webp' in images.FORMATS else 'jpeg')
+    assert '800w' in expected
+
+    assert client.get('/movie/movies').json()[0]['image_srcset'] == expected
+    assert client.get(f'/movie/movies/{schedule.movie_id}').json()['image_srcset'] == expected
+    assert client.get('/movie/repertoire', params={'date_to': schedule.date.isoformat()}).json()['items'][0]['movie']['image_srcset'] == expected
+    slides = client.get('/general/public/slides').json()
+    assert [s['image_srcset'] for s in slides] == [expected, None]
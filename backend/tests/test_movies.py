@@ -0,0 +1,27 @@
+from datetime import date, timedelta
+
+from schemas import Schedule
+
+
+def test_movie_list_leaves_out_schedules_unless_asked(client, schedule):
+    plain = client.get('/movie/movies').json()
+    assert len(plain) == 1
+    assert 'schedules' not in plain[0]
+    assert plain[0]['title'] == 'Test'
+
+    expanded = client.get('/movie/movies', params={'include': 'schedules'}).json()
+    assert [s['id'] for s in expanded[0]['schedules']] == [schedule.id]
+
+
+def test_schedule_expansion_starts_at_from(client, db, schedule):
+    db.add(Schedule(date=date.today() - timedelta(days=3), time='10:00', movie_id=schedule.movie_id, hall=1))
+    db.commit()
+    expanded = client.get('/movie/movies', params={'include': 'schedules'}).json()
+    assert [s['id'] for s in expanded[0]['schedules']] == [schedule.id]
+    since = (date.today() - timedelta(days=5)).isoformat()
+    expanded = client.get('/movie/movies', params={'include': 'schedules', 'from': since}).json()
+    assert len(expanded[0]['schedules']) == 2
+
+
+def test_unknown_expansion_is_rejected(client):
+    assert client.get('/movie/movies', params={'include': 'tickets'}).status_code == 400
@@ -0,0 +1,56 @@
+import pytest
+
+from movie import occupancy
+from movie.occupancy import SeatOccupancy
+from movie.service import get_sold_seats
+from schemas import Ticket, TicketSeat
+
+
+def test_bitmap_membership_and_listing():
+    occ = SeatOccupancy(3, [(0, 0), (2, 5), (1, 3)])
+    assert (2, 5) in occ
+    assert (2, 4) not in occ
+    assert (9, 9) not in occ
+    assert sorted(occ.seats()) == [(0, 0), (1, 3), (2, 5)]
+    assert len(occ) == 3
+
+
+def test_with_changes_grows_the_grid_and_releases():
+    occ = SeatOccupancy(1, [(0, 0), (0, 1)])
+    updated = occ.with_changes(2, sold=[(4, 7)], released=[(0, 0)])
+    assert updated.version == 2
+    assert sorted(updated.seats()) == [(0, 1), (4, 7)]
+    assert sorted(occ.seats()) == [(0, 0), (0, 1)]
+
+
+def test_apply_only_follows_consecutive_versions():
+    occupancy.put(1, SeatOccupancy(4, [(0, 0)]))
+    occupancy.apply(1, 5, sold=[(0, 1)])
+    assert sorted(occupancy.get(1, 5).seats()) == [(0, 0), (0, 1)]
+    occupancy.apply(1, 7, sold=[(0, 2)])
+    assert occupancy.get(1, 7) is None
+    assert occupancy.get(1, 5) is None
+
+
+def test_sold_seats_are_cached_per_version(db, schedule, user):
+    ticket = Ticket(user_id=user.id, schedule_id=schedule.id, total_price=20)
+    db.add(ticket)
+    db.flush()
+    db.add(TicketSeat(ticket_id=ticket.id, schedule_id=schedule.id, seat='B-3', price=20, type='normalny',
+                      row_index=1, col_index=2))
+    db.commit()
+    sold = get_sold_seats(db, schedule.id)
+    assert sold.seats() == [(1, 2)]
+    assert occupancy.get(schedule.id, schedule.seat_version) is sold
+
+
+def test_failed_read_is_not_cached(db, schedule, monkeypatch):
+    import movie.service
+
+    def boom(rows):
+        raise RuntimeError('statement timeout')
+
+    monkeypatch.setattr(movie.service, 'sold_seat_positions', boom)
+    with pytest.raises(RuntimeError):
+        get_sold_seats(db, schedule.id)
+    assert occupancy.get(schedule.id, schedule.seat_version) is None
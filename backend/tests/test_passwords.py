@@ -0,0 +1,62 @@
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from user import passwords
+from user.passwords import PasswordHasher
+
+
+@pytest.fixture
+def busy_hasher():
+    # one worker, no queue, and that worker parked on an event
+    hasher = PasswordHasher('thread', workers=1, queue_size=0)
+    release = threading.Event()
+    started = threading.Event()
+
+    def park():
+        started.set()
+        release.wait(5)
+
+    worker = threading.Thread(target=hasher._run, args=(park,))
+    worker.start()
+    assert started.wait(5)
+    yield hasher
+    release.set()
+    worker.join(5)
+    hasher.shutdown()
+
+
+def test_second_hash_is_shed_with_429(busy_hasher):
+    with pytest.raises(HTTPException) as e:
+        busy_hasher.hash('secret')
+    assert e.value.status_code == 429
+    assert e.value.headers == {'Retry-After': '1'}
+    metrics = busy_hasher.metrics()
+    assert metrics['rejected'] == 1
+    assert metrics['in_flight'] == 1
+
+
+def test_slot_is_released_after_an_exception():
+    hasher = PasswordHasher('thread', workers=1, queue_size=0)
+
+    def boom():
+        raise ValueError('boom')
+
+    with pytest.raises(ValueError):
+        hasher._run(boom)
+    assert hasher.verify('secret', hasher.hash('secret'))
+    metrics = hasher.metrics()
+    assert metrics['completed'] == 3
+    assert metrics['in_flight'] == 0
+    assert metrics['max_in_flight'] == 1
+    assert metrics['rejected'] == 0
+    assert metrics['max_wait_ms'] > 0
+    hasher.shutdown()
+
+
+def test_login_is_shed_when_the_pool_is_full(client, user, busy_hasher, monkeypatch):
+    monkeypatch.setattr(passwords, 'hasher', busy_hasher)
+    response = client.post('/user/login', json={'email': user.email, 'password': 'secret'})
+    assert response.status_code == 429
+    assert response.headers['retry-after'] == '1'
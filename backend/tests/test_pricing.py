@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+import http_cache
+from payments import pricing
+from payments.pricing import CHEAP_THURSDAY, ONE_DAY_BEFORE, SAME_DAY, THREE_DAYS_BEFORE, TWO_DAYS_BEFORE
+
+TZ = pricing.TZ
+MONDAY = datetime(2026, 10, 12, 10, 0, tzinfo=TZ)
+
+
+@pytest.mark.parametrize('show_at,now,rules', [
+    (MONDAY + timedelta(days=7), MONDAY, [THREE_DAYS_BEFORE, SAME_DAY]),
+    (MONDAY + timedelta(days=2, hours=1), MONDAY, [TWO_DAYS_BEFORE, SAME_DAY]),
+    (MONDAY + timedelta(days=1, hours=1), MONDAY, [ONE_DAY_BEFORE, SAME_DAY]),
+    (MONDAY + timedelta(hours=23), MONDAY, [SAME_DAY]),
+    (MONDAY - timedelta(hours=1), MONDAY, [SAME_DAY]),
+    (MONDAY + timedelta(days=3), MONDAY, [CHEAP_THURSDAY, THREE_DAYS_BEFORE, SAME_DAY]),
+    (MONDAY + timedelta(days=4), MONDAY + timedelta(days=3), [CHEAP_THURSDAY, ONE_DAY_BEFORE, SAME_DAY]),
+])
+def test_rules_for(show_at, now, rules):
+    assert pricing.rules_for(show_at, now) == rules
+
+
+@pytest.mark.parametrize('raw,price', [('15', '15.00'), ('12,50', '12.50'), ('19 zł', '19.00'), ('', None), ('-1', None), ('nan', None)])
+def test_parse_price(raw, price):
+    assert pricing.parse_price(raw) == (None if price is None else pricing.Decimal(price))
+
+
+def _now_before(schedule, days):
+    # a purchase moment `days` whole days before the show, never on a Thursday
+    now = pricing.show_start(schedule) - timedelta(days=days, hours=1)
+    assert now.weekday() != 3 and pricing.show_start(schedule).weekday() != 3
+    return now
+
+
+@pytest.fixture
+def weekday_schedule(db, schedule):
+    while schedule.date.weekday() in (2, 3, 4):
+        schedule.date += timedelta(days=1)
+    db.commit()
+    return schedule
+
+
+def test_price_basket_prices_each_seat_on_the_server(db, weekday_schedule, ticket_prices):
+    seats = [{'type': 'Normalny', 'price': 1}, {'type': 'ulgowy', 'price': 1}, {}]
+    quote = pricing.price_basket(db, weekday_schedule.id, seats, now=_now_before(weekday_schedule, 0))
+    assert quote.rules == [SAME_DAY]
+    assert [(s['type'], s['price']) for s in quote.seats] == [('normalny', 25.0), ('ulgowy', 19.0), ('normalny', 25.0)]
+    assert quote.total == 69.0
+
+
+def test_price_basket_rejects_unknown_types_and_schedules(db, weekday_schedule, ticket_prices):
+    with pytest.raises(HTTPException) as e:
+        pricing.price_basket(db, weekday_schedule.id, [{'type': 'vip'}])
+    assert e.value.status_code == 400
+    with pytest.raises(HTTPException) as e:
+        pricing.price_basket(db, weekday_schedule.id + 1, [{'type': 'normalny'}])
+    assert e.value.status_code == 404
+
+
+def test_price_basket_without_a_price_list(db, schedule):
+    with pytest.raises(HTTPException) as e:
+        pricing.price_basket(db, schedule.id, [{'type': 'normalny'}])
+    assert e.value.status_code == 503
+
+
+def test_matrix_is_reloaded_when_versions_are_unavailable(db, ticket_prices, monkeypatch):
+    monkeypatch.setattr(http_cache, 'versions', lambda: None)
+    first = pricing.matrix(db)
+    assert first.price('normalny', [SAME_DAY]) == pricing.Decimal('25.00')
+    row = db.query(pricing.TicketPrice).filter_by(type='normalny').one()
+    row.same_day = '27'
+    db.commit()
+    assert pricing.matrix(db).price('normalny', [SAME_DAY]) == pricing.Decimal('27.00')
+
+
+def test_quote_endpoint(client, weekday_schedule, ticket_prices, user_headers):
+    response = client.post('/payments/quote', json={'schedule_id': weekday_schedule.id, 'seats': [{'type': 'ulgowy', 'row_index': 0, 'col_index': 1}]}, headers=user_headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert body['seats'][0]['row_index'] == 0
+    assert body['total'] == body['seats'][0]['price']
+
+
+def test_quote_needs_a_login(client, weekday_schedule, ticket_prices):
+    assert client.post('/payments/quote', json={'schedule_id': weekday_schedule.id, 'seats': []}).status_code == 401
+
+
+@pytest.mark.parametrize('payload', [
+    {'seats': []},
+    {'schedule_id': 'abc', 'seats': []},
+    {'schedule_id': 1, 'seats': ['A-1']},
+    {'schedule_id': 1, 'seats': [{'type': 5}]},
+])
+def test_quote_rejects_malformed_bodies(client, user_headers, payload):
+    assert client.post('/payments/quote', json=payload, headers=user_headers).status_code == 422
+
+
+@pytest.mark.parametrize('payload', [{'schedule_id': 'abc', 'seats': []}, {'schedule_id': 1, 'seats': [{'type': 5}]}])
+def test_checkout_rejects_malformed_bodies(client, user_headers, payload):
+    assert client.post('/payments/create-checkout-session', json=payload, headers=user_headers).status_code == 422
@@ -0,0 +1,38 @@
+import time
+
+from user import principal
+from user.service import _resolve_principal
+
+
+def claims(email='jan@example.com', uid=1, is_admin=0, iat=None):
+    return {'sub': email, 'uid': uid, 'is_admin': is_admin, 'iat': iat if iat is not None else int(time.time()) - 5}
+
+
+def test_claims_are_trusted_until_the_subject_changes():
+    assert principal.from_claims(claims()) == principal.Principal(id=1, email='jan@example.com', is_admin=0)
+    principal.invalidate('jan@example.com')
+    assert principal.from_claims(claims()) is None
+    assert principal.from_claims(claims(iat=int(time.time()) + 5)) is not None
+
+
+def test_tokens_without_the_claims_are_not_trusted():
+    payload = claims()
+    del payload['uid']
+    assert principal.from_claims(payload) is None
+
+
+def test_cache_entries_expire(monkeypatch):
+    monkeypatch.setattr(principal, 'PRINCIPAL_CACHE_SECONDS', 0.05)
+    principal.put(principal.Principal(id=1, email='a@example.com', is_admin=0))
+    assert principal.get('a@example.com') is not None
+    time.sleep(0.06)
+    assert principal.get('a@example.com') is None
+
+
+def test_role_change_is_seen_by_an_older_token(db, user):
+    payload = claims(email=user.email, uid=user.id, is_admin=0)
+    assert _resolve_principal(db, payload).is_admin == 0
+    user.is_admin = 1
+    db.commit()
+    principal.invalidate(user.email)
+    assert _resolve_principal(db, payload).is_admin == 1
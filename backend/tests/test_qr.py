@@ -0,0 +1,29 @@
+from types import SimpleNamespace
+
+from user import qr
+
+
+def test_qr_url_follows_the_app_root_path():
+    import main
+    ticket = SimpleNamespace(id=42, ticket_code='abc')
+    qr.attach_ticket_qr(ticket)
+    assert ticket.qr_code_url == f'{main.app.root_path}/user/tickets/42/qr.png'
+
+
+def test_qr_endpoint_only_serves_the_owner(client, db, schedule, user):
+    from schemas import Ticket, User
+    from user.service import create_access_token
+    other = User(first_name='A', last_name='B', email='other@example.com', password='x')
+    db.add(other)
+    ticket = Ticket(user_id=user.id, schedule_id=schedule.id, total_price=0, ticket_code='code-1')
+    db.add(ticket)
+    db.commit()
+
+    def get(email):
+        token = create_access_token({'sub': email})
+        return client.get(f'/user/tickets/{ticket.id}/qr.png', headers={'Authorization': f'Bearer {token}'})
+
+    own = get(user.email)
+    assert own.status_code == 200
+    assert own.headers['content-type'] == 'image/png'
+    assert get(other.email).status_code == 404
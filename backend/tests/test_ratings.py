@@ -0,0 +1,56 @@
+import pytest
+
+from movie import ratings
+from schemas import Movie, Review, User
+
+
+@pytest.fixture
+def movie(db):
+    row = Movie(title='Test', genre='Dramat', duration='120', rating=7.0)
+    db.add(row)
+    db.commit()
+    return row
+
+
+def aggregates(db, movie):
+    db.expire_all()
+    m = db.get(Movie, movie.id)
+    return m.rating_count, m.rating_avg
+
+
+def test_new_reviews_update_the_running_average(db, movie):
+    for rating in (4, 5, 3):
+        ratings.record_review(db, movie.id, rating)
+    db.commit()
+    count, avg = aggregates(db, movie)
+    assert count == 3
+    assert avg == pytest.approx(4.0)
+
+
+def test_changed_review_shifts_the_average(db, movie):
+    ratings.record_review(db, movie.id, 2)
+    ratings.record_review(db, movie.id, 4)
+    ratings.record_review(db, movie.id, 5, previous=2)
+    db.commit()
+    assert aggregates(db, movie) == (2, pytest.approx(4.5))
+
+
+def test_reconcile_repairs_drift(db, movie, user):
+    other = User(first_name='A', last_name='B', email='b@example.com', password='x')
+    db.add(other)
+    db.flush()
+    db.add_all([Review(user_id=user.id, movie_id=movie.id, rating=3), Review(user_id=other.id, movie_id=movie.id, rating=4)])
+    movie.rating_count, movie.rating_avg = 7, 1.0
+    db.commit()
+    assert ratings.reconcile(db) == 1
+    assert aggregates(db, movie) == (2, pytest.approx(3.5))
+    assert ratings.reconcile(db) == 0
+
+
+def test_reviews_override_the_admin_rating_on_read(db, movie):
+    m = db.get(Movie, movie.id)
+    ratings.expose([m])
+    assert m.rating == 7.0
+    m.rating_count, m.rating_avg = 3, 4.26
+    ratings.expose([m])
+    assert m.rating == 4.3
@@ -0,0 +1,150 @@
+import random
+from datetime import date, datetime, timedelta
+
+from user import recommendation_batch, recommendations
+from user.recommendations import MovieEntry, RecommendationIndex, UserProfile
+
+
+def synthetic_index(n_movies=120, n_categories=8, n_users=60, seed=7):
+    rng = random.Random(seed)
+    today = date.today()
+    movies, by_category = {}, {}
+    for mid in range(1, n_movies + 1):
+        cats = tuple(sorted(rng.sample(range(1, n_categories + 1), rng.randint(0, 3))))
+        movies[mid] = MovieEntry(
+            id=mid, title=f'Movie {mid}', image=None, duration='120', cast=None, description=None,
+            premiere_date=today + timedelta(days=rng.randint(-400, 30)),
+            category_ids=cats, category_names=[f'C{c}' for c in cats],
+            avg=round(rng.uniform(1, 5), 2) if rng.random() < 0.7 else None,
+            pop=rng.randint(0, 50),
+        )
+        for c in cats:
+            by_category.setdefault(c, set()).add(mid)
+    profiles = {}
+    for uid in range(1, n_users + 1):
+        profile = UserProfile()
+        for mid in rng.sample(range(1, n_movies + 1), rng.randint(0, 15)):
+            profile.watched.add(mid)
+            for c in movies[mid].category_ids:
+                profile.cat_scores[c] = profile.cat_scores.get(c, 0) + 1
+        profiles[uid] = profile
+    return RecommendationIndex(
+        movies=movies, by_category=by_category, profiles=profiles,
+        max_pop=max(e.pop for e in movies.values()), built_at=datetime.utcnow(), build_ms=0.0,
+    )
+
+
+def test_batch_scorer_matches_per_user_ranking():
+    index = synthetic_index()
+    user_ids = list(index.profiles) + [999]
+    batch = recommendation_batch.rank_batch(index, user_ids, limit=10)
+    for uid in user_ids:
+        expected = recommendations._rank(index, index.profiles.get(uid) or UserProfile(), 10)
+        assert [e.id for e in batch[uid]] == [e.id for e in expected], uid
+
+
+def test_watched_movies_are_not_recommended():
+    index = synthetic_index()
+    for uid, picked in recommendation_batch.rank_batch(index, list(index.profiles), limit=10).items():
+        assert not {e.id for e in picked} & index.profiles[uid].watched
+
+
+def legacy_recommend(db, user_id, limit=10):
+    from sqlalchemy import or_
+    from schemas import Movie, Schedule, Ticket
+
+    released = {m.id: m for m in db.query(Movie).filter(
+        or_(Movie.premiere_date == None, Movie.premiere_date <= date.today())).all()}  # noqa: E711
+    rows = db.query(Ticket.user_id, Schedule.movie_id).join(Schedule, Ticket.schedule_id == Schedule.id).all()
+    pop = {}
+    watched, cat_scores = set(), {}
+    for uid, mid in rows:
+        pop[mid] = pop.get(mid, 0) + 1
+        if uid == user_id:
+            watched.add(mid)
+            for c in db.get(Movie, mid).categories:
+                cat_scores[c.id] = cat_scores.get(c.id, 0) + 1
+    avg_map = {m.id: m.rating_avg for m in db.query(Movie).filter(Movie.rating_count > 0)}
+    candidates = {mid: m for mid, m in released.items() if {c.id for c in m.categories} & set(cat_scores)}
+    if not candidates or not set(candidates) - watched:
+        candidates = released
+    cat_per_movie = {mid: sum(cat_scores.get(c.id, 0) for c in m.categories) for mid, m in candidates.items()}
+    max_cat = max(cat_per_movie.values(), default=0) if cat_scores else 0
+    max_pop = max(pop.values(), default=0)
+    scored = []
+    for mid, m in candidates.items():
+        if mid in watched:
+            continue
+        avg = avg_map.get(mid) or 0.0
+        score = (0.6 * (cat_per_movie[mid] / max_cat if max_cat else 0.0) + 0.3 * avg / 5.0
+                 + 0.1 * (pop.get(mid, 0) / max_pop if max_pop else 0.0))
+        scored.append((mid in avg_map, score, avg, pop.get(mid, 0), m.title, mid))
+    picked = [s[-1] for s in sorted(scored, key=lambda x: (-x[0], -x[1], -x[2], -x[3], x[4]))[:limit]]
+    if user_id is not None and not picked:
+        return legacy_recommend(db, None, limit)
+    return [{
+        'id': mid, 'title': released[mid].title, 'image': released[mid].image,
+        'rating': round(avg_map[mid], 1) if mid in avg_map else None,
+        'time': released[mid].duration, 'cast': released[mid].cast, 'content': released[mid].description,
+        'categories': [c.name for c in released[mid].categories],
+    } for mid in picked]
+
+
+def normalized(rows):
+    return [{**row, 'categories': sorted(row['categories']), 'image_srcset': None} for row in rows]
+
+
+def seed_catalogue(db, seed=11):
+    from schemas import Category, Movie, Schedule, Ticket, User
+
+    rng = random.Random(seed)
+    today = date.today()
+    categories = [Category(name=f'Kategoria {i}') for i in range(5)]
+    db.add_all(categories)
+    movies = []
+    for i in range(30):
+        rated = rng.random() < 0.7
+        movie = Movie(
+            title=f'Film {i:02d}', genre='Dramat', duration='120',
+            rating_avg=round(rng.uniform(1, 5), 2) if rated else None, rating_count=rng.randint(1, 9) if rated else 0,
+            premiere_date=today + timedelta(days=rng.randint(-300, 20)),
+            categories=rng.sample(categories, rng.randint(1, 2)),
+        )
+        movies.append(movie)
+    db.add_all(movies)
+    users = [User(first_name='U', last_name=str(i), email=f'u{i}@example.com', password='x') for i in range(6)]
+    db.add_all(users)
+    db.flush()
+    schedules = [Schedule(date=today, time='18:00', movie_id=m.id, hall=1) for m in movies]
+    db.add_all(schedules)
+    db.flush()
+    for u in users[:-1]:
+        for s in rng.sample(schedules, rng.randint(1, 6)):
+            db.add_all(Ticket(user_id=u.id, schedule_id=s.id) for _ in range(rng.randint(1, 3)))
+    db.commit()
+    return users
+
+
+def test_index_matches_legacy_ranking(db):
+    users = seed_catalogue(db)
+    recommendations.rebuild(db)
+    for uid in [u.id for u in users] + [None]:
+        got = recommendations.recommend(db, uid, 10)
+        assert normalized(got) == normalized(legacy_recommend(db, uid, 10)), uid
+
+
+def test_incremental_hooks_match_legacy_ranking(db):
+    from schemas import Movie, Schedule, Ticket
+
+    users = seed_catalogue(db)
+    recommendations.rebuild(db)
+    schedule = db.query(Schedule).order_by(Schedule.id.desc()).first()
+    db.add(Ticket(user_id=users[-1].id, schedule_id=schedule.id))
+    movie = db.get(Movie, schedule.movie_id)
+    movie.rating_avg, movie.rating_count = 4.9, 3
+    db.commit()
+    recommendations.on_ticket(db, users[-1].id, schedule.id)
+    recommendations.on_review(db, movie.id)
+    for uid in [u.id for u in users] + [None]:
+        got = recommendations.recommend(db, uid, 10)
+        assert normalized(got) == normalized(legacy_recommend(db, uid, 10)), uid
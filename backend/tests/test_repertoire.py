@@ -0,0 +1,50 @@
+from datetime import date, timedelta
+
+import pytest
+
+from movie.service import get_repertoire
+from schemas import Movie, Schedule
+
+DAY = date(2026, 11, 2)
+
+
+@pytest.fixture
+def shows(db):
+    movie = Movie(title='Test', genre='Dramat', duration='120')
+    db.add(movie)
+    db.flush()
+    # same date and time on several halls, so the id breaks the tie
+    rows = [
+        Schedule(date=DAY + timedelta(days=d), time=t, movie_id=movie.id, hall=h)
+        for d in range(3) for t in ('12:00', '18:00') for h in (1, 2)
+    ]
+    db.add_all(rows)
+    db.commit()
+    return rows
+
+
+def test_cursor_pages_cover_every_show_once_in_order(db, shows):
+    seen, cursor = [], None
+    while True:
+        items, cursor = get_repertoire(db, DAY, DAY + timedelta(days=2), limit=5, cursor=cursor)
+        seen.extend(items)
+        if cursor is None:
+            break
+    assert [s.id for s in seen] == [s.id for s in sorted(shows, key=lambda s: (s.date, s.time, s.id))]
+
+
+def test_last_full_page_has_no_cursor(db, shows):
+    items, cursor = get_repertoire(db, DAY, DAY + timedelta(days=2), limit=len(shows))
+    assert len(items) == len(shows)
+    assert cursor is None
+
+
+def test_filters_and_window(db, shows):
+    items, _ = get_repertoire(db, DAY, DAY, hall=2)
+    assert {(s.date, s.hall) for s in items} == {(DAY, 2)}
+
+
+def test_bad_cursor_and_window_are_rejected(client):
+    assert client.get('/movie/repertoire', params={'cursor': 'not-a-cursor'}).status_code == 400
+    r = client.get('/movie/repertoire', params={'date_from': '2026-01-01', 'date_to': '2026-06-01'})
+    assert r.status_code == 400
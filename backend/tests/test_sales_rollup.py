@@ -0,0 +1,112 @@
+from collections import defaultdict
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import select
+
+from admin import sales_rollup
+from schemas import Movie, SalesDaily, Schedule, Ticket, User
+from user.service import create_ticket, delete_user
+
+
+def seats(row, count, kind='normalny'):
+    return [
+        {'seat': f'{row}-{c + 1}', 'type': kind, 'row_index': row, 'col_index': c, 'seat_number': c + 1}
+        for c in range(count)
+    ]
+
+
+@pytest.fixture
+def other(db):
+    row = User(first_name='Anna', last_name='Nowak', email='anna@example.com', password='x')
+    db.add(row)
+    db.commit()
+    return row
+
+
+@pytest.fixture
+def sales(db, schedule, user, other, ticket_prices):
+    movie = Movie(title='Drugi', genre='Komedia', duration='90')
+    db.add(movie)
+    db.flush()
+    second = Schedule(date=schedule.date + timedelta(days=1), time='20:00', movie_id=movie.id, hall=2)
+    db.add(second)
+    db.commit()
+    create_ticket(db, user.id, {'schedule_id': schedule.id, 'seats': seats(0, 2)})
+    create_ticket(db, user.id, {'schedule_id': second.id, 'seats': seats(0, 1, 'ulgowy')})
+    create_ticket(db, other.id, {'schedule_id': schedule.id, 'seats': seats(1, 3)})
+    create_ticket(db, other.id, {'schedule_id': second.id, 'seats': seats(1, 2)})
+    return schedule, second
+
+
+def rollup(db):
+    db.expire_all()
+    rows = db.execute(select(SalesDaily)).scalars()
+    return {
+        (r.day, r.schedule_id): (r.movie_id, r.hall, r.orders, r.seats, round(r.revenue, 2), round(r.seat_revenue, 2))
+        for r in rows
+        # removing every ticket of a day leaves a zero row that rebuild drops
+        if r.orders or r.seats
+    }
+
+
+def rebuilt(db):
+    live = rollup(db)
+    sales_rollup.rebuild(db)
+    return live, rollup(db)
+
+
+def from_tickets(db):
+    db.expire_all()
+    totals = {'revenue': 0.0, 'orders': 0, 'tickets': 0}
+    movies = defaultdict(lambda: [0, 0.0])
+    for t in db.execute(select(Ticket)).scalars():
+        totals['revenue'] += t.total_price
+        totals['orders'] += 1
+        totals['tickets'] += len(t.seats)
+        movies[t.schedule.movie_id][0] += len(t.seats)
+        movies[t.schedule.movie_id][1] += t.total_price
+    return totals, {mid: (n, round(rev, 2)) for mid, (n, rev) in movies.items()}
+
+
+def test_live_counters_match_a_rebuild(db, sales):
+    live, rebuilt_rows = rebuilt(db)
+    assert len(live) == 2
+    assert live == rebuilt_rows
+
+
+def test_removed_tickets_match_a_rebuild(db, sales, other):
+    delete_user(db, other.id)
+    live, rebuilt_rows = rebuilt(db)
+    assert live == rebuilt_rows
+    assert sum(v[2] for v in live.values()) == 2
+
+
+def test_hall_change_and_schedule_delete_match_a_rebuild(client, db, sales, admin_headers):
+    first, second = sales
+    assert client.patch(f'/movie/schedules/{first.id}', json={'hall': 5}, headers=admin_headers).status_code == 200
+    assert client.delete(f'/movie/schedules/{second.id}', headers=admin_headers).status_code == 204
+    live, rebuilt_rows = rebuilt(db)
+    assert live == rebuilt_rows
+    assert [v[1] for v in live.values()] == [5]
+
+
+def _dashboard(client, headers):
+    overview = client.get('/admin/stats/overview', headers=headers).json()
+    top = client.get('/admin/stats/top-movies', headers=headers).json()
+    return (
+        {'revenue': round(overview['total_revenue'], 2), 'orders': overview['total_orders'], 'tickets': overview['total_tickets']},
+        {m['movie_id']: (m['tickets_sold'], round(m['revenue'], 2)) for m in top},
+    )
+
+
+def test_dashboard_matches_the_tickets(client, db, sales, other, admin_headers):
+    totals, movies = from_tickets(db)
+    totals['revenue'] = round(totals['revenue'], 2)
+    assert _dashboard(client, admin_headers) == (totals, movies)
+
+    assert client.delete(f'/admin/users/{other.id}', headers=admin_headers).status_code == 200
+    totals, movies = from_tickets(db)
+    totals['revenue'] = round(totals['revenue'], 2)
+    assert totals['orders'] == 2
+    assert _dashboard(client, admin_headers) == (totals, movies)
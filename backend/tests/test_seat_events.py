@@ -0,0 +1,69 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from movie import seat_events
+from movie.seat_events import SeatEventBroker
+
+
+class Connected:
+    async def is_disconnected(self):
+        return False
+
+
+def parse(chunk):
+    kind, data = chunk.strip().split('\n')
+    return kind.removeprefix('event: '), json.loads(data.removeprefix('data: '))
+
+
+@pytest.mark.asyncio
+async def test_events_published_from_a_thread_reach_only_their_schedule():
+    broker = SeatEventBroker()
+    mine, other = broker.subscribe(1), broker.subscribe(2)
+    thread = threading.Thread(target=broker.publish, args=(1, {'type': 'sold', 'seats': [[0, 1]]}))
+    thread.start()
+    thread.join()
+    assert await asyncio.wait_for(mine.get(), 1) == {'type': 'sold', 'seats': [[0, 1]]}
+    assert other.empty()
+
+    broker.unsubscribe(1, mine)
+    assert broker.subscriber_count(1) == 0
+    assert broker.subscriber_count() == 1
+
+
+@pytest.mark.asyncio
+async def test_full_queue_is_replaced_by_a_resync(monkeypatch):
+    monkeypatch.setattr(seat_events, 'QUEUE_SIZE', 2)
+    broker = SeatEventBroker()
+    queue = broker.subscribe(1)
+    for col in range(3):
+        broker.publish(1, {'type': 'hold', 'seats': [[0, col]]})
+    await asyncio.sleep(0)
+    assert queue.qsize() == 1
+    assert queue.get_nowait() == {'type': 'resync'}
+
+
+@pytest.mark.asyncio
+async def test_stream_sends_a_snapshot_then_events_and_resnapshots_on_resync(monkeypatch):
+    broker = SeatEventBroker()
+    monkeypatch.setattr(seat_events, 'broker', broker)
+    snapshots = []
+
+    def snapshot(schedule_id):
+        snapshots.append(schedule_id)
+        return {'held': [], 'sold': [[0, len(snapshots)]]}
+
+    stream = seat_events.stream(7, Connected(), snapshot)
+    assert (await stream.__anext__()).startswith('retry:')
+    assert parse(await stream.__anext__()) == ('snapshot', {'held': [], 'sold': [[0, 1]]})
+    assert broker.subscriber_count(7) == 1
+
+    seat_events.publish_release(7, [(2, 3)])
+    assert parse(await stream.__anext__()) == ('release', {'seats': [[2, 3]]})
+    broker.publish(7, {'type': 'resync'})
+    assert parse(await stream.__anext__()) == ('snapshot', {'held': [], 'sold': [[0, 2]]})
+
+    await stream.aclose()
+    assert broker.subscriber_count(7) == 0
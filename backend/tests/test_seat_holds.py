@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from movie.seat_holds import DatabaseSeatHoldStore, InMemorySeatHoldStore, SeatHoldStore
+
+NOW = datetime(2026, 10, 18, 12, 0, 0)
+
+
+@pytest.fixture(params=['memory', 'database'])
+def store(request, engine, db):
+    if request.param == 'memory':
+        return InMemorySeatHoldStore()
+    return DatabaseSeatHoldStore(bind=engine)
+
+
+def test_store_without_overrides_cannot_be_created():
+    class Partial(SeatHoldStore):
+        def hold(self, schedule_id, row, col, expiry, now):
+            return True, expiry
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_second_hold_on_a_live_seat_conflicts(store):
+    expiry = NOW + timedelta(seconds=120)
+    assert store.hold(1, 0, 0, expiry, NOW) == (True, expiry)
+    won, current = store.hold(1, 0, 0, NOW + timedelta(seconds=200), NOW + timedelta(seconds=10))
+    assert not won
+    assert current == expiry
+    assert store.held(1, NOW) == [(0, 0)]
+
+
+def test_expired_hold_can_be_taken_again(store):
+    store.hold(1, 0, 0, NOW + timedelta(seconds=60), NOW)
+    later = NOW + timedelta(seconds=61)
+    expiry = later + timedelta(seconds=60)
+    assert store.hold(1, 0, 0, expiry, later) == (True, expiry)
+
+
+def test_held_skips_expired_and_other_schedules(store):
+    store.hold(1, 0, 0, NOW + timedelta(seconds=30), NOW)
+    store.hold(1, 0, 1, NOW + timedelta(seconds=90), NOW)
+    store.hold(2, 5, 5, NOW + timedelta(seconds=90), NOW)
+    assert store.held(1, NOW + timedelta(seconds=60)) == [(0, 1)]
+    assert store.live_count(NOW + timedelta(seconds=60)) == 2
+
+
+def test_release_and_release_many(store):
+    for col in range(3):
+        store.hold(1, 0, col, NOW + timedelta(seconds=60), NOW)
+    assert store.release(1, 0, 0)
+    assert not store.release(1, 0, 0)
+    assert store.release_many(1, [(0, 1), (0, 2), (4, 4)]) == 2
+    assert store.held(1, NOW) == []
+
+
+def test_sweep_reports_each_expired_hold_once():
+    store = InMemorySeatHoldStore()
+    store.hold(1, 0, 0, NOW + timedelta(seconds=10), NOW)
+    store.hold(1, 0, 1, NOW + timedelta(seconds=20), NOW)
+    store.hold(2, 3, 3, NOW + timedelta(seconds=90), NOW)
+    assert sorted(store.sweep(NOW + timedelta(seconds=30))) == [(1, 0, 0), (1, 0, 1)]
+    assert store.sweep(NOW + timedelta(seconds=30)) == []
+    assert store.live_count(NOW + timedelta(seconds=30)) == 1
+
+
+def test_sweep_skips_stale_heap_entries():
+    store = InMemorySeatHoldStore()
+    store.hold(1, 0, 0, NOW + timedelta(seconds=10), NOW)
+    store.release(1, 0, 0)
+    # re-held with a later expiry; the first heap entry must not evict it
+    store.hold(1, 0, 0, NOW + timedelta(seconds=100), NOW + timedelta(seconds=5))
+    assert store.sweep(NOW + timedelta(seconds=50)) == []
+    assert store.held(1, NOW + timedelta(seconds=50)) == [(0, 0)]
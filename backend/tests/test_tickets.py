@@ -0,0 +1,65 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+
+from user.service import create_ticket
+
+
+def seats(row, count):
+    return [
+        {'seat': f'{row}-{c + 1}', 'type': 'normalny', 'row_index': row, 'col_index': c, 'seat_number': c + 1}
+        for c in range(count)
+    ]
+
+
+def test_booking_statement_count_does_not_grow_with_seats(db, engine, schedule, user, ticket_prices):
+    create_ticket(db, user.id, {'schedule_id': schedule.id, 'seats': seats(0, 1)})
+    counts = []
+    for row, count in ((1, 1), (2, 20)):
+        statements = []
+
+        def count_statement(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(engine, 'before_cursor_execute', count_statement)
+        try:
+            create_ticket(db, user.id, {'schedule_id': schedule.id, 'seats': seats(row, count)})
+        finally:
+            event.remove(engine, 'before_cursor_execute', count_statement)
+        counts.append(len(statements))
+    assert counts[0] == counts[1]
+
+
+def test_repeated_seat_in_one_order_is_rejected(db, schedule, user, ticket_prices):
+    with pytest.raises(HTTPException) as exc:
+        create_ticket(db, user.id, {'schedule_id': schedule.id, 'seats': seats(0, 1) * 2})
+    assert exc.value.status_code == 400
+
+
+def test_seat_sold_twice_is_a_conflict(db, schedule, user, ticket_prices):
+    create_ticket(db, user.id, {'schedule_id': schedule.id, 'seats': seats(0, 2)})
+    with pytest.raises(HTTPException) as exc:
+        create_ticket(db, user.id, {'schedule_id': schedule.id, 'seats': seats(0, 1)})
+    assert exc.value.status_code == 409
+    assert '0-1' in exc.value.detail
+
+
+def test_other_integrity_errors_are_not_reported_as_sold(db, schedule, user, ticket_prices):
+    from sqlalchemy.exc import IntegrityError
+    broken = [{'type': 'normalny', 'row_index': 0, 'col_index': 0}]
+    with pytest.raises(IntegrityError):
+        create_ticket(db, user.id, {'schedule_id': schedule.id, 'seats': broken})
+
+
+def test_seat_conflict_is_recognised_by_constraint_name():
+    from types import SimpleNamespace
+    from sqlalchemy.exc import IntegrityError
+    from user.service import _is_seat_conflict
+
+    def error(constraint):
+        orig = Exception('duplicate key')
+        orig.diag = SimpleNamespace(constraint_name=constraint)
+        return IntegrityError('INSERT', {}, orig)
+
+    assert _is_seat_conflict(error('uq_ticket_seats_schedule_position'))
+    assert not _is_seat_conflict(error('ticket_seats_schedule_id_fkey'))
@@ -0,0 +1,57 @@
+import io
+import os
+
+import pytest
+from PIL import Image
+
+from config import UPLOAD_MAX_BYTES
+from media import uploads
+
+URL = '/movie/movies/upload-image'
+
+
+def png(width=64, height=64):
+    buf = io.BytesIO()
+    Image.new('RGB', (width, height), (10, 120, 200)).save(buf, 'PNG')
+    return buf.getvalue()
+
+
+def test_store_sniffs_the_type_and_names_by_content(tmp_path):
+    data = png()
+    first = uploads.store(io.BytesIO(data), UPLOAD_MAX_BYTES, out_dir=str(tmp_path))
+    assert first.mime == 'image/png'
+    assert os.path.basename(first.path) == f'{first.digest}.png'
+    second = uploads.store(io.BytesIO(data), UPLOAD_MAX_BYTES, out_dir=str(tmp_path))
+    assert second.duplicate and second.path == first.path
+
+
+@pytest.mark.parametrize('data', [b'GIF89a' + b'\0' * 300, b'<svg xmlns="http://www.w3.org/2000/svg"/>', b''])
+def test_store_rejects_other_types(tmp_path, data):
+    with pytest.raises(uploads.UnsupportedType):
+        uploads.store(io.BytesIO(data), UPLOAD_MAX_BYTES, out_dir=str(tmp_path))
+    assert os.listdir(tmp_path) == []
+
+
+def test_store_stops_at_the_cap(tmp_path):
+    data = png() + b'\0' * 1000
+    with pytest.raises(uploads.UploadTooLarge):
+        uploads.store(io.BytesIO(data), len(data) - 1, out_dir=str(tmp_path))
+    assert os.listdir(tmp_path) == []
+
+
+def test_oversized_content_length_is_refused_before_auth(client):
+    body = b'x' * (UPLOAD_MAX_BYTES + uploads.MULTIPART_OVERHEAD + 1)
+    response = client.post(URL, content=body, headers={'content-type': 'multipart/form-data; boundary=b'})
+    assert response.status_code == 413
+
+
+def test_oversized_chunked_body_is_refused(client):
+    chunk = b'x' * (64 * 1024)
+    count = (UPLOAD_MAX_BYTES + uploads.MULTIPART_OVERHEAD) // len(chunk) + 2
+    response = client.post(URL, content=iter([chunk] * count), headers={'content-type': 'multipart/form-data; boundary=b'})
+    assert response.status_code == 413
+
+
+def test_small_upload_still_needs_an_admin(client):
+    response = client.post(URL, files={'file': ('a.png', png(), 'image/png')})
+    assert response.status_code == 401
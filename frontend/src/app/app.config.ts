@@ -33,11 +33,19 @@ export const appConfig: ApplicationConfig = {
       withInterceptors([
         (req: HttpRequest<any>, next: HttpHandlerFn): Observable<HttpEvent<any>> => {
           const authService = inject(AuthService);
+          const apiBase = inject(API_BASE_URL_TOKEN);
           const ssrAuth = inject(SSR_AUTH_HEADER_TOKEN, { optional: true }) || null;
           const token = authService.getToken();
           const skipAuth = req.headers.has('X-Skip-Auth');
           let modifiedReq = req;
 
+          // the API answers writes with a short-lived cookie that keeps the
+          // following reads on the primary database; it only comes back when
+          // cross-origin calls carry credentials
+          if (req.url.startsWith(apiBase)) {
+            modifiedReq = modifiedReq.clone({ withCredentials: true });
+          }
+
           if (skipAuth) {
             modifiedReq = modifiedReq.clone({ headers: modifiedReq.headers.delete('X-Skip-Auth') });
           }
@@ -55,7 +63,7 @@ export const appConfig: ApplicationConfig = {
                 return authService.refreshToken().pipe(
                   switchMap((data: any) => {
                     authService.saveToken(data.access_token);
-                    const retryReq = req.clone({ setHeaders: { Authorization: `Bearer ${data.access_token}` } });
+                    const retryReq = req.clone({ setHeaders: { Authorization: `Bearer ${data.access_token}` }, withCredentials: modifiedReq.withCredentials });
                     return next(retryReq);
                   }),
                   catchError(refreshError => {
@@ -4,7 +4,7 @@ import { HeaderComponent } from '../header/header.component';
 import { FooterComponent } from '../footer/footer.component';
 import { SliderComponent } from '../slider/slider.component';
 import { RouterModule } from '@angular/router';
-import { toAbs as toAbsHelper } from '../shared/env';
+import { toAbs as toAbsHelper, absSrcset } from '../shared/env';
 import { ServerService } from '../services/server.service';
 import { forkJoin, of } from 'rxjs';
 import { catchError } from 'rxjs/operators';
@@ -133,4 +133,8 @@ export class HomeComponent implements AfterViewInit {
   toAbs(url?: string): string {
     return (toAbsHelper(url) || '') as string;
   }
+
+  srcset(srcset?: string | null): string | null {
+    return absSrcset(srcset);
+  }
 }
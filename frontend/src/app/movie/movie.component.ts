@@ -5,7 +5,7 @@ import { RouterLink } from '@angular/router';
 import { HeaderComponent } from '../header/header.component';
 import { FooterComponent } from '../footer/footer.component';
 import { ServerService } from '../services/server.service';
-import { toAbs as toAbsHelper } from '../shared/env';
+import { toAbs as toAbsHelper, absSrcset } from '../shared/env';
 import { DomSanitizer, SafeResourceUrl } from '@angular/platform-browser';
 
 @Component({
@@ -165,6 +165,10 @@ export class MovieComponent implements OnInit {
     return (toAbsHelper(url) || '') as string;
   }
 
+  srcset(srcset?: string | null): string | null {
+    return absSrcset(srcset);
+  }
+
   loadReviews(movieId: number) {
     this.serverService.listMovieReviews(movieId).subscribe({
       next: (rows) => { this.reviews = rows || []; },
@@ -37,6 +37,9 @@ export class PurchaseComponent implements OnInit, OnDestroy {
 
   seatMatrix: boolean[][] = []; 
   blockedSeats = new Set<string>();
+  private heldSeats = new Set<string>();
+  private soldSeats = new Set<string>();
+  private seatEvents?: EventSource;
   selectedSeats = new Set<string>();
   maxSeats = 10;
   holdExpiresAt?: Date; 
@@ -52,6 +55,7 @@ export class PurchaseComponent implements OnInit, OnDestroy {
   ticketPrices: any[] = [];
   checkoutItems: Array<{ row: number; col: number; rowLabel: string; seatNumber: number; type: string; price: number }> = [];
   totalPrice = 0;
+  private quoteSeq = 0;
   paymentError: string | null = null;
   isPaying = false;
   paymentCanceled = false;
@@ -87,8 +91,7 @@ export class PurchaseComponent implements OnInit, OnDestroy {
         }
         this.isLoading = false;
         if (this.isBrowser) {
-          this.refreshBlockedSeats();
-          this.seatRefreshTimer = setInterval(() => this.refreshBlockedSeats(), 20000);
+          this.connectSeatEvents(id);
         }
       },
       error: () => {
@@ -101,6 +104,68 @@ export class PurchaseComponent implements OnInit, OnDestroy {
   ngOnDestroy(): void {
     if (this.seatRefreshTimer) clearInterval(this.seatRefreshTimer);
     if (this.holdTimer) clearInterval(this.holdTimer);
+    if (this.seatEvents) this.seatEvents.close();
+  }
+
+  private startSeatPolling() {
+    if (this.seatRefreshTimer) return;
+    this.refreshBlockedSeats();
+    this.seatRefreshTimer = setInterval(() => this.refreshBlockedSeats(), 20000);
+  }
+
+  private connectSeatEvents(scheduleId: number) {
+    if (typeof EventSource === 'undefined') {
+      this.startSeatPolling();
+      return;
+    }
+    const es = new EventSource(this.serverService.seatEventsUrl(scheduleId));
+    this.seatEvents = es;
+    const seatsOf = (e: Event): Array<[number, number]> => {
+      try {
+        return JSON.parse((e as MessageEvent).data)?.seats || [];
+      } catch {
+        return [];
+      }
+    };
+    es.addEventListener('snapshot', (e: Event) => {
+      try {
+        const data = JSON.parse((e as MessageEvent).data) || {};
+        this.heldSeats = new Set((data.held || []).map(([r, c]: [number, number]) => this.key(r, c)));
+        this.soldSeats = new Set((data.sold || []).map(([r, c]: [number, number]) => this.key(r, c)));
+        this.syncBlockedSeats();
+      } catch {}
+    });
+    es.addEventListener('hold', (e: Event) => {
+      seatsOf(e).forEach(([r, c]) => this.heldSeats.add(this.key(r, c)));
+      this.syncBlockedSeats();
+    });
+    es.addEventListener('release', (e: Event) => {
+      seatsOf(e).forEach(([r, c]) => this.heldSeats.delete(this.key(r, c)));
+      this.syncBlockedSeats();
+    });
+    es.addEventListener('sold', (e: Event) => {
+      seatsOf(e).forEach(([r, c]) => this.soldSeats.add(this.key(r, c)));
+      this.syncBlockedSeats();
+    });
+    es.addEventListener('unsold', (e: Event) => {
+      seatsOf(e).forEach(([r, c]) => this.soldSeats.delete(this.key(r, c)));
+      this.syncBlockedSeats();
+    });
+    es.onopen = () => {
+      if (this.seatRefreshTimer) {
+        clearInterval(this.seatRefreshTimer);
+        this.seatRefreshTimer = undefined;
+      }
+    };
+    es.onerror = () => {
+      // EventSource reconnects on its own; poll meanwhile so the map does not go stale.
+      this.startSeatPolling();
+      if (es.readyState === EventSource.CLOSED) this.seatEvents = undefined;
+    };
+  }
+
+  private syncBlockedSeats() {
+    this.blockedSeats = new Set([...this.heldSeats, ...this.soldSeats]);
   }
 
   private key(r: number, c: number) { return `${r}-${c}`; }
@@ -246,6 +311,7 @@ export class PurchaseComponent implements OnInit, OnDestroy {
 
   refreshBlockedSeats() {
     if (!this.isBrowser) return;
+    if (this.seatEvents?.readyState === EventSource.OPEN) return;
     const scheduleId = Number(this.route.snapshot.paramMap.get('id'));
     if (!scheduleId) return;
     this.serverService.getBlockedSeats(scheduleId).subscribe({
@@ -288,58 +354,42 @@ export class PurchaseComponent implements OnInit, OnDestroy {
         this.ticketPrices = prices || [];
         const defaultType = this.ticketPrices?.[0]?.type || 'normalny';
         items.forEach(i => i.type = defaultType);
-        items.forEach(i => i.price = this.computePriceFor(i.type));
         this.checkoutItems = items;
-        this.recomputeTotal();
         this.checkoutMode = true;
+        this.refreshQuote();
       },
       error: () => {
-        const fallbackPrice = 20;
-        items.forEach(i => { i.type = 'normalny'; i.price = fallbackPrice; });
+        items.forEach(i => i.type = 'normalny');
         this.checkoutItems = items;
-        this.recomputeTotal();
         this.checkoutMode = true;
+        this.refreshQuote();
       }
     });
   }
 
   onTypeChange(item: { type: string; price: number }) {
-    item.price = this.computePriceFor(item.type);
-    this.recomputeTotal();
+    this.refreshQuote();
   }
 
-  private recomputeTotal() {
-    this.totalPrice = this.checkoutItems.reduce((sum, i) => sum + (Number(i.price) || 0), 0);
-  }
-
-  private computePriceFor(type: string): number {
-    try {
-      const dateStr: string = this.schedule?.date;
-      const timeStr: string = this.schedule?.time || '00:00';
-      const [hh, mm] = (timeStr || '00:00').split(':').map((v: string) => parseInt(v, 10) || 0);
-      const d = new Date(dateStr);
-      if (!isNaN(hh)) d.setHours(hh, isNaN(mm) ? 0 : mm, 0, 0);
-
-      const now = new Date();
-      const msDiff = d.getTime() - now.getTime();
-      const daysDiff = Math.floor(msDiff / (1000 * 60 * 60 * 24));
-
-      const priceRow = (this.ticketPrices || []).find(p => (p.type || '').toLowerCase() === (type || '').toLowerCase());
-      if (!priceRow) return 0;
-
-      const isThursdayShow = d.getDay() === 4;
-      const isThursdayPurchase = now.getDay() === 4;
-      if ((isThursdayShow || isThursdayPurchase) && priceRow.cheap_thursday != null) {
-        return Number(priceRow.cheap_thursday) || 0;
+  // prices come from the server, which charges the same ones at checkout;
+  // answers to an older basket are dropped
+  private refreshQuote() {
+    const seq = ++this.quoteSeq;
+    const scheduleId = Number(this.route.snapshot.paramMap.get('id'));
+    const seats = this.checkoutItems.map(i => ({ row_index: i.row, col_index: i.col, type: i.type }));
+    this.serverService.quoteTickets({ schedule_id: scheduleId, seats }).subscribe({
+      next: (quote) => {
+        if (seq !== this.quoteSeq) return;
+        (quote?.seats || []).forEach((seat, idx) => {
+          if (this.checkoutItems[idx]) this.checkoutItems[idx].price = Number(seat.price) || 0;
+        });
+        this.totalPrice = Number(quote?.total) || 0;
+      },
+      error: (err) => {
+        if (seq !== this.quoteSeq) return;
+        this.paymentError = err?.error?.detail || 'Nie udało się pobrać cen biletów.';
       }
-
-      if (daysDiff >= 3 && priceRow.three_days_before != null) return Number(priceRow.three_days_before) || 0;
-      if (daysDiff === 2 && priceRow.two_days_before != null) return Number(priceRow.two_days_before) || 0;
-      if (daysDiff === 1 && priceRow.one_day_before != null) return Number(priceRow.one_day_before) || 0;
-      return Number(priceRow.same_day) || 0;
-    } catch {
-      return 0;
-    }
+    });
   }
 
   pay() {
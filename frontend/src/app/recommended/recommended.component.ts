@@ -3,7 +3,7 @@ import { CommonModule, isPlatformBrowser } from '@angular/common';
 import { HeaderComponent } from '../header/header.component';
 import { FooterComponent } from '../footer/footer.component';
 import { RouterLink } from '@angular/router';
-import { toAbs as toAbsHelper } from '../shared/env';
+import { toAbs as toAbsHelper, absSrcset } from '../shared/env';
 import { ServerService } from '../services/server.service';
 
 @Component({
@@ -108,4 +108,8 @@ export class RecommendedComponent implements OnInit, AfterViewInit {
   toAbs(url?: string): string {
     return (toAbsHelper(url) || '') as string;
   }
+
+  srcset(srcset?: string | null): string | null {
+    return absSrcset(srcset);
+  }
 }
@@ -4,7 +4,7 @@ import { HeaderComponent } from '../header/header.component';
 import { FooterComponent } from '../footer/footer.component';
 import { RouterLink } from '@angular/router';
 import { ServerService } from '../services/server.service';
-import { toAbs as toAbsHelper } from '../shared/env';
+import { toAbs as toAbsHelper, absSrcset } from '../shared/env';
 
 @Component({
   selector: 'app-repertoire',
@@ -25,7 +25,9 @@ export class RepertoireComponent implements OnInit {
   ngOnInit(): void {
     this.generateDays();
     this.isLoading = true;
-    this.serverService.getRepertoire().subscribe({
+    const dateFrom = this.days[0].date_numeric;
+    const dateTo = this.days[this.days.length - 1].date_numeric;
+    this.serverService.getRepertoireWindow(dateFrom, dateTo).subscribe({
       next: (schedules) => {
         this.repertoire = schedules;
         this.isLoading = false;
@@ -155,4 +157,8 @@ export class RepertoireComponent implements OnInit {
   toAbs(url?: string): string {
     return (toAbsHelper(url) || '') as string;
   }
+
+  srcset(srcset?: string | null): string | null {
+    return absSrcset(srcset);
+  }
 }
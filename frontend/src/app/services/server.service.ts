@@ -1,6 +1,7 @@
 import { Injectable, Inject } from '@angular/core';
 import { HttpClient, HttpHeaders, HttpParams } from '@angular/common/http';
-import { Observable } from 'rxjs';
+import { Observable, EMPTY } from 'rxjs';
+import { expand, reduce } from 'rxjs/operators';
 import { API_BASE_URL_TOKEN } from '../shared/tokens';
 
 @Injectable({
@@ -135,10 +136,35 @@ export class ServerService {
     return this.http.get<any[]>(`${this.baseUrl}/user/tickets`, this.authHeaders());
   }
 
+  getTicketQr(ticketId: number): Observable<Blob> {
+    return this.http.get(`${this.baseUrl}/user/tickets/${ticketId}/qr.png`, { responseType: 'blob', ...this.authHeaders() });
+  }
+
+  // Fetches the QR image of every ticket that has none inline and sets
+  // ticket.qr_code_data_url to an object URL; the URLs are pushed onto
+  // objectUrls so the caller can revoke them when it is destroyed.
+  loadTicketQrCodes(tickets: any[], objectUrls: string[]): void {
+    if (typeof URL === 'undefined' || !URL.createObjectURL) return;
+    tickets.forEach(ticket => {
+      if (ticket.qr_code_data_url || !ticket.qr_code_url) return;
+      this.getTicketQr(ticket.id).subscribe({
+        next: (blob) => {
+          const url = URL.createObjectURL(blob);
+          objectUrls.push(url);
+          ticket.qr_code_data_url = url;
+        }
+      });
+    });
+  }
+
   createTicket(ticket: any): Observable<any> {
     return this.http.post<any>(`${this.baseUrl}/user/tickets`, ticket, this.authHeaders());
   }
 
+  quoteTickets(payload: { schedule_id: number; seats: any[] }): Observable<{ seats: any[]; total: number; rules: string[] }> {
+    return this.http.post<{ seats: any[]; total: number; rules: string[] }>(`${this.baseUrl}/payments/quote`, payload, this.authHeaders());
+  }
+
   createStripeCheckoutSession(payload: any): Observable<{ id: string; url: string }> {
     return this.http.post<{ id: string; url: string }>(`${this.baseUrl}/payments/create-checkout-session`, payload, this.authHeaders());
   }
@@ -151,6 +177,19 @@ export class ServerService {
     return this.http.get<any[]>(`${this.baseUrl}/movie/get-schedules`);
   }
 
+  getRepertoirePage(dateFrom: string, dateTo: string, cursor?: string | null, limit = 200): Observable<{ items: any[]; next_cursor: string | null }> {
+    let params = new HttpParams().set('date_from', dateFrom).set('date_to', dateTo).set('limit', limit);
+    if (cursor) params = params.set('cursor', cursor);
+    return this.http.get<{ items: any[]; next_cursor: string | null }>(`${this.baseUrl}/movie/repertoire`, { params });
+  }
+
+  getRepertoireWindow(dateFrom: string, dateTo: string): Observable<any[]> {
+    return this.getRepertoirePage(dateFrom, dateTo).pipe(
+      expand(page => page.next_cursor ? this.getRepertoirePage(dateFrom, dateTo, page.next_cursor) : EMPTY),
+      reduce((all: any[], page) => all.concat(page.items || []), [])
+    );
+  }
+
   getScheduleById(id: number): Observable<any> {
     return this.http.get<any>(`${this.baseUrl}/movie/schedules/${id}`);
   }
@@ -186,6 +225,10 @@ export class ServerService {
     );
   }
 
+  seatEventsUrl(scheduleId: number): string {
+    return `${this.baseUrl}/movie/schedules/${scheduleId}/seat-events`;
+  }
+
 
   getAdminOverview(days: number = 30, from_date?: string, to_date?: string): Observable<any> {
     let params = new HttpParams().set('days', days);
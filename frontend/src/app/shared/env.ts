@@ -14,3 +14,13 @@ export function toAbs(u?: string | null): string | null {
   if (u.startsWith('/api/')) return `${resolveApiBase()}${u}`;
   return u;
 }
+
+// Catalogue payloads carry image_srcset next to image (see backend
+// media/images.py) with API-relative URLs and the real pixel widths.
+export function absSrcset(srcset?: string | null): string | null {
+  if (!srcset) return null;
+  return srcset.split(', ').map(part => {
+    const [url, width] = part.split(' ');
+    return `${toAbs(url)} ${width}`;
+  }).join(', ');
+}
@@ -2,7 +2,7 @@ import { Component, ChangeDetectorRef, ChangeDetectionStrategy  } from '@angular
 import { CarouselModule } from 'ngx-owl-carousel-o';
 import { CommonModule } from '@angular/common';
 import { Router, RouterLink } from '@angular/router';
-import { toAbs as toAbsHelper } from '../shared/env';
+import { toAbs as toAbsHelper, absSrcset } from '../shared/env';
 import { ServerService } from '../services/server.service';
 
 @Component({
@@ -55,9 +55,16 @@ export class SliderComponent {
     return (toAbsHelper(url) || '') as string;
   }
 
+  srcset(srcset?: string | null): string | null {
+    return absSrcset(srcset);
+  }
+
   onImgError(ev: Event) {
     const img = ev.target as HTMLImageElement;
-    if (img && this.fallback) img.src = this.fallback;
+    if (img && this.fallback) {
+      img.removeAttribute('srcset');
+      img.src = this.fallback;
+    }
   }
 
   goTo(movieId?: number | null) {
@@ -1,4 +1,4 @@
-import { Component, OnInit } from '@angular/core';
+import { Component, OnInit, OnDestroy } from '@angular/core';
 import { FormBuilder, FormGroup, Validators, ReactiveFormsModule } from '@angular/forms';
 import { CommonModule } from '@angular/common';
 import { ServerService } from '../services/server.service';
@@ -15,14 +15,19 @@ import { FormsModule } from '@angular/forms';
   styles: ``
 })
 
-export class TicketsHistoryComponent  implements OnInit  {
+export class TicketsHistoryComponent  implements OnInit, OnDestroy  {
   constructor(private serverService: ServerService, private router: Router) {}
   tickets: any[] = [];
+  private qrObjectUrls: string[] = [];
   isLoading = true;
   showReviewFor: Record<number, boolean> = {};
   reviewForms: Partial<Record<number, { rating: number; comment: string; is_anonymous: boolean }>> = {};
   hoverRatings: Partial<Record<number, number>> = {};
 
+  ngOnDestroy(): void {
+    this.qrObjectUrls.forEach(u => URL.revokeObjectURL(u));
+  }
+
   ngOnInit(): void {
     this.isLoading = true;
     this.serverService.getUserTickets().subscribe({
@@ -40,7 +45,8 @@ export class TicketsHistoryComponent  implements OnInit  {
             const dateB = b.schedule?.date ? new Date(`${b.schedule.date}T${b.schedule.time}`).getTime() : 0;
             return dateA - dateB;
           });
-          this.isLoading = false;
+        this.serverService.loadTicketQrCodes(this.tickets, this.qrObjectUrls);
+        this.isLoading = false;
       },
       error: () => {
         this.isLoading = false;
@@ -1,4 +1,4 @@
-import { Component, OnInit } from '@angular/core';
+import { Component, OnInit, OnDestroy } from '@angular/core';
 import { FormBuilder, FormGroup, Validators, ReactiveFormsModule } from '@angular/forms';
 import { CommonModule } from '@angular/common';
 import { ServerService } from '../services/server.service';
@@ -14,11 +14,16 @@ import { toAbs as toAbsHelper } from '../shared/env';
   styles: ``
 })
 
-export class TicketsComponent  implements OnInit  {
+export class TicketsComponent  implements OnInit, OnDestroy  {
   constructor(private serverService: ServerService, private router: Router) {}
   tickets: any[] = [];
+  private qrObjectUrls: string[] = [];
   isLoading = true;
 
+  ngOnDestroy(): void {
+    this.qrObjectUrls.forEach(u => URL.revokeObjectURL(u));
+  }
+
   ngOnInit(): void {
     this.isLoading = true;
     this.serverService.getUserTickets().subscribe({
@@ -37,6 +42,7 @@ export class TicketsComponent  implements OnInit  {
             const dateB = b.schedule?.date ? new Date(`${b.schedule.date}T${b.schedule.time}`).getTime() : 0;
             return dateA - dateB;
           });
+        this.serverService.loadTicketQrCodes(this.tickets, this.qrObjectUrls);
         this.isLoading = false;
       },
       error: () => {